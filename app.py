@@ -1,26 +1,55 @@
 """
 Main Flask Module
+
+The application is built by the ``create_app`` factory; nothing is
+created at import time, so several instances can live in one process and
+pre-fork servers can import this module safely:
+
+    flask --app app run
+    gunicorn --preload -w 8 'app:create_app("prefork")'
 """
 from flask import Flask
 from flask_restx import Api
 
-from config import Config
+from cli import register_commands
+from config import CONFIGS, Config
+from helpers.compression import register_compression
+from helpers.foreign_keys import register_foreign_keys
+from helpers.group_commit import register_group_commit
+from helpers.jobs import register_job_runner
+from helpers.migrations import upgrade_database
+from helpers.prefork import prepare_for_fork
+from helpers.request_context import register_request_context
+from helpers.sql_monitor import register_sql_monitor
+from helpers.statement_budget import register_statement_budget
 from setup_db import db
 from views.auth import auth_ns
+from views.changes import changes_ns
 from views.directors import directors_ns
 from views.genres import genres_ns
+from views.jobs import jobs_ns
+from views.metrics import metrics_ns
 from views.movies import movies_ns
 from views.users import users_ns
 
 
-def create_app(config_object: Config) -> Flask:
+def create_app(config_object: Config | str = 'default') -> Flask:
     """
     Create Flask application.
+
+    :param config_object: The configuration, or its name in
+        ``config.CONFIGS``. With ``PREFORK`` set, the application is
+        prepared to be forked into worker processes.
     """
+    if isinstance(config_object, str):
+        config_object = CONFIGS[config_object]()
+
     application = Flask(__name__)
     application.config.from_object(config_object)
-    application.app_context().push()
     register_extensions(application)
+    register_commands(application)
+    if application.config['PREFORK']:
+        prepare_for_fork(application)
     return application
 
 
@@ -30,13 +59,22 @@ def register_extensions(application: Flask) -> None:
     """
 
     db.init_app(application)
+    register_foreign_keys(application)
+    upgrade_database(application)
     api = Api(application)
-    namespaces = [directors_ns, genres_ns, movies_ns, users_ns, auth_ns]
+    namespaces = [
+        directors_ns, genres_ns, movies_ns, users_ns, auth_ns, metrics_ns,
+        changes_ns, jobs_ns
+    ]
     for namespace in namespaces:
         api.add_namespace(namespace)
+    register_compression(application)
+    register_group_commit(application)
+    register_request_context(application)
+    register_statement_budget(application)
+    register_sql_monitor(application)
+    register_job_runner(application)
 
 
-app = create_app(Config())
-
 if __name__ == '__main__':
-    app.run()
+    create_app(Config()).run()
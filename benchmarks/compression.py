@@ -0,0 +1,80 @@
+"""
+Movie list response size and encoding cost benchmark.
+
+Serializes the movie list of instance/movies.db (repeated to simulate a
+larger catalog) with every JSON and compression option and prints the
+response size and the CPU time per request. Run from the project root:
+
+    python -m benchmarks.compression [--repeat N] [--number N]
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+from helpers.compression import CODINGS
+
+JSON_OPTIONS = {
+    'pretty ascii': {'indent': 4},
+    'compact ascii': {'separators': (',', ':')},
+    'compact utf-8': {'separators': (',', ':'), 'ensure_ascii': False},
+}
+
+
+def load_movies(repeat):
+    """
+    Read the movie rows as the list endpoint returns them.
+    """
+    connection = sqlite3.connect('file:instance/movies.db?mode=ro', uri=True)
+    connection.row_factory = sqlite3.Row
+    rows = connection.execute(
+        'SELECT id, title, description, trailer, year, rating, genre_id, '
+        'director_id FROM movie'
+    ).fetchall()
+    connection.close()
+    return [dict(row) for row in rows] * repeat
+
+
+def cpu_per_call(func, number):
+    """
+    Return the CPU time of one call of ``func`` in microseconds.
+    """
+    start = time.process_time()
+    for _ in range(number):
+        func()
+    return (time.process_time() - start) / number * 1e6
+
+
+def main():
+    """
+    Print bytes and CPU per request for every encoding option.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--level', type=int, default=6)
+    args = parser.parse_args()
+
+    movies = load_movies(args.repeat)
+    print(f"{len(movies)} movies per response")
+    print(f"{'json':<15}{'coding':<10}{'bytes':>10}{'cpu us':>10}")
+
+    for name, settings in JSON_OPTIONS.items():
+        encode = lambda: (json.dumps(movies, **settings) + '\n').encode()
+        body = encode()
+        encode_cpu = cpu_per_call(encode, args.number)
+        print(f"{name:<15}{'identity':<10}{len(body):>10}{encode_cpu:>10.0f}")
+
+        for coding, compress in CODINGS.items():
+            compressed = compress(body, args.level)
+            compress_cpu = cpu_per_call(
+                lambda: compress(body, args.level), args.number
+            )
+            print(
+                f"{'':<15}{coding:<10}{len(compressed):>10}"
+                f"{encode_cpu + compress_cpu:>10.0f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,490 @@
+"""
+HTTP load generator with a mixed traffic profile.
+
+Virtual users log in with the accounts given, taken in turn, then send
+requests back to back over a keep-alive connection until the end of the
+run. Each request is drawn from ``MIX`` (80% movie lists and filters,
+10% movie details, 5% logins, 3% token refreshes and 2% admin writes),
+or taken in order from the "Request received: METHOD URL" lines of
+views.log with ``--replay``.
+Throughput, latency percentiles and error rates per endpoint are printed
+every ``--interval`` seconds and for the whole run. Run from the project
+root against a served application:
+
+    python -m benchmarks.load --url http://127.0.0.1:5000 \\
+        --username admin --password secret [--users N] [--duration S]
+    python -m benchmarks.load --url ... --users-file accounts.txt
+    python -m benchmarks.load --serve default ... --replay logs/views/views.log
+
+``--users-file`` holds one ``username:password`` account per line; the
+admin writes need admin accounts. ``--serve`` serves the application in
+the load generator process, which is convenient but shares its CPU:
+serve it separately to measure it. The admin writes of the mix modify
+the database; the replay skips the writes and only sends GET and HEAD
+requests, as the log lines carry no bodies. Logins are throttled per
+username (see LOGIN_USERNAME_CAPACITY), so give about one account per
+virtual user to measure the logins, and per client address (see
+LOGIN_IP_CAPACITY); the 429 responses are counted apart from the errors.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlsplit
+
+# the messages of the views, with or without the '-' of the movie list
+REQUEST_RECEIVED = re.compile(
+    r'Request received: ([A-Z]+)(?: -)? (https?://[^\s"]+)'
+)
+REPLAYED_METHODS = frozenset(('GET', 'HEAD'))
+PERCENTILES = (50, 95, 99)
+
+
+def list_movies(user, catalog):
+    """
+    The unfiltered movie list.
+    """
+    return 'GET', '/movies/', None
+
+
+def filter_by_year(user, catalog):
+    """
+    The movies of a year.
+    """
+    return 'GET', f'/movies/?year={random.choice(catalog["years"])}', None
+
+
+def filter_by_genre(user, catalog):
+    """
+    The movies of a genre.
+    """
+    return 'GET', f'/movies/?genre_id={random.choice(catalog["gids"])}', None
+
+
+def filter_by_director(user, catalog):
+    """
+    The movies of a director.
+    """
+    did = random.choice(catalog['dids'])
+    return 'GET', f'/movies/?director_id={did}', None
+
+
+def movie_detail(user, catalog):
+    """
+    A movie.
+    """
+    return 'GET', f'/movies/{random.choice(catalog["mids"])}', None
+
+
+def login(user, catalog):
+    """
+    A login with the credentials of the user.
+    """
+    return 'POST', '/auth/', user.credentials
+
+
+def refresh(user, catalog):
+    """
+    A refresh of the tokens of the user.
+    """
+    return 'PUT', '/auth/', {'refresh_token': user.refresh_token}
+
+
+def patch_movie(user, catalog):
+    """
+    An admin write, leaving the title of a movie unchanged.
+    """
+    mid = random.choice(catalog['mids'])
+    return 'PATCH', f'/movies/{mid}', {'title': catalog['titles'][mid]}
+
+
+# (endpoint, weight, request builder) of the mixed traffic profile
+MIX = (
+    ('GET /movies/', 50, list_movies),
+    ('GET /movies/?year', 10, filter_by_year),
+    ('GET /movies/?genre_id', 10, filter_by_genre),
+    ('GET /movies/?director_id', 10, filter_by_director),
+    ('GET /movies/<id>', 10, movie_detail),
+    ('POST /auth/', 5, login),
+    ('PUT /auth/', 3, refresh),
+    ('PATCH /movies/<id>', 2, patch_movie),
+)
+
+
+def endpoint_of(method, path):
+    """
+    Name the endpoint of a request, e.g. 'GET /movies/<id>' or
+    'GET /movies/?year', to aggregate the requests.
+    """
+    parts = urlsplit(path)
+    endpoint = f'{method} {re.sub(r"/[0-9]+", "/<id>", parts.path)}'
+    names = sorted({name for name, _ in parse_qsl(parts.query)})
+    return f'{endpoint}?{"&".join(names)}' if names else endpoint
+
+
+def read_credentials(path):
+    """
+    Read the accounts of the virtual users, one ``username:password`` per
+    line; blank lines and lines starting with '#' are skipped.
+
+    :return: A list of credentials dicts.
+    """
+    accounts = []
+    with open(path, encoding='utf-8') as users_file:
+        for number, line in enumerate(users_file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            username, separator, password = line.partition(':')
+            if not separator or not username:
+                raise SystemExit(
+                    f'{path}:{number}: expected username:password'
+                )
+            accounts.append({'username': username, 'password': password})
+    if not accounts:
+        raise SystemExit(f'{path}: no account')
+    return accounts
+
+
+def read_replay(paths):
+    """
+    Reconstruct the requests of views.log files, in order.
+
+    :return: A list of (method, path) tuples and the number of skipped
+        requests, whose methods are not replayed.
+    """
+    requests = []
+    skipped = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as log_file:
+            for line in log_file:
+                match = REQUEST_RECEIVED.search(line)
+                if match is None:
+                    continue
+                method, url = match.groups()
+                if method not in REPLAYED_METHODS:
+                    skipped += 1
+                    continue
+                parts = urlsplit(url)
+                path = parts.path + (f'?{parts.query}' if parts.query else '')
+                requests.append((method, path))
+    return requests, skipped
+
+
+class Stats:
+    """
+    Latencies and statuses of the requests by endpoint, for the current
+    interval and for the whole run.
+    """
+
+    def __init__(self):
+        """
+        Constructor method.
+        """
+        self.lock = threading.Lock()
+        self.window = defaultdict(list)
+        self.total = defaultdict(list)
+
+    def record(self, endpoint, latency, status):
+        """
+        Record a request; ``status`` is None for a connection error.
+        """
+        with self.lock:
+            self.window[endpoint].append((latency, status))
+            self.total[endpoint].append((latency, status))
+
+    def reset(self):
+        """
+        Forget the requests recorded so far.
+        """
+        with self.lock:
+            self.window = defaultdict(list)
+            self.total = defaultdict(list)
+
+    def take_window(self):
+        """
+        Return the requests of the interval and start a new one.
+        """
+        with self.lock:
+            window, self.window = self.window, defaultdict(list)
+        return window
+
+
+def percentile(latencies, rank):
+    """
+    Nearest-rank percentile of sorted latencies.
+    """
+    return latencies[max(math.ceil(rank / 100 * len(latencies)) - 1, 0)]
+
+
+def print_table(title, requests, elapsed):
+    """
+    Print the throughput, latency percentiles, error and throttling rates
+    of every endpoint.
+    """
+    print(f'\n{title}')
+    print(
+        f"{'endpoint':<34}{'reqs':>7}{'req/s':>9}"
+        + ''.join(f"{f'p{rank}':>9}" for rank in PERCENTILES)
+        + f"{'errors':>9}{'429':>7}"
+    )
+    rows = sorted(requests.items())
+    rows.append(('all', [r for _, reqs in rows for r in reqs]))
+    for endpoint, results in rows:
+        if not results:
+            continue
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(
+            1 for _, status in results
+            if status is None or (status >= 400 and status != 429)
+        )
+        throttled = sum(1 for _, status in results if status == 429)
+        print(
+            f'{endpoint:<34}{len(results):>7}'
+            f'{len(results) / elapsed:>9.1f}'
+            + ''.join(
+                f'{percentile(latencies, rank) * 1000:>6.1f} ms'
+                for rank in PERCENTILES
+            )
+            + f'{errors / len(results):>8.1%}'
+            + f'{throttled / len(results):>7.1%}'
+        )
+
+
+class VirtualUser:
+    """
+    A client sending requests one after the other over its own
+    connection.
+    """
+
+    def __init__(self, host, port, credentials, stats):
+        """
+        Constructor method.
+        """
+        self.host = host
+        self.port = port
+        self.credentials = credentials
+        self.stats = stats
+        self.connection = None
+        self.access_token = None
+        self.refresh_token = None
+
+    def send(self, method, path, body=None, endpoint=None):
+        """
+        Send a request, record it and return its status and decoded JSON
+        body; the status is None after a connection error.
+        """
+        headers = {'Connection': 'keep-alive'}
+        if self.access_token:
+            headers['Authorization'] = f'Bearer {self.access_token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=30
+                )
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            status, content = None, b''
+        self.stats.record(
+            endpoint or endpoint_of(method, path),
+            time.perf_counter() - start, status
+        )
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+    def authenticate(self, method='POST', body=None, endpoint=None):
+        """
+        Log in, or refresh the tokens with ``body``, and keep the new
+        tokens.
+        """
+        status, tokens = self.send(
+            method, '/auth/', body or self.credentials, endpoint
+        )
+        if status == 201:
+            self.access_token = tokens['access_token']
+            self.refresh_token = tokens['refresh_token']
+        return status
+
+    def run_mix(self, catalog, deadline):
+        """
+        Send requests drawn from ``MIX`` until ``deadline``.
+        """
+        endpoints, weights, builders = zip(*MIX)
+        while time.monotonic() < deadline:
+            index = random.choices(range(len(MIX)), weights)[0]
+            method, path, body = builders[index](self, catalog)
+            if method in ('POST', 'PUT') and path == '/auth/':
+                self.authenticate(method, body, endpoints[index])
+            else:
+                self.send(method, path, body, endpoints[index])
+
+    def run_replay(self, requests, lock, deadline):
+        """
+        Send the next replayed request, shared by every user, until
+        ``deadline``.
+        """
+        while time.monotonic() < deadline:
+            with lock:
+                method, path = next(requests)
+            self.send(method, path)
+
+
+def load_catalog(user):
+    """
+    Collect the movie, genre and director ids the requests are built
+    from.
+    """
+    status, movies = user.send('GET', '/movies/')
+    if status != 200 or not movies:
+        raise SystemExit(f'Cannot list the movies: status {status}')
+    return {
+        'mids': [movie['id'] for movie in movies],
+        'titles': {movie['id']: movie['title'] for movie in movies},
+        'years': sorted({m['year'] for m in movies if m.get('year')}),
+        'gids': sorted({m['genre_id'] for m in movies if m.get('genre_id')}),
+        'dids': sorted(
+            {m['director_id'] for m in movies if m.get('director_id')}
+        ),
+    }
+
+
+def serve(config_name):
+    """
+    Serve the application on a free local port in a daemon thread.
+
+    :return: The (host, port) of the server.
+    """
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    server = make_server(
+        '127.0.0.1', 0, create_app(config_name), threaded=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.host, server.port
+
+
+def main():
+    """
+    Run the virtual users and print the statistics every interval.
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='e.g. http://127.0.0.1:5000')
+    target.add_argument(
+        '--serve', metavar='CONFIG', help='serve config.CONFIGS[CONFIG]'
+    )
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument(
+        '--users-file', metavar='PATH',
+        help='one username:password account per line'
+    )
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--interval', type=float, default=5)
+    parser.add_argument('--replay', nargs='+', metavar='VIEWS_LOG')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    if args.users_file:
+        if args.username or args.password:
+            parser.error('--users-file excludes --username and --password')
+        accounts = read_credentials(args.users_file)
+    elif args.username and args.password:
+        accounts = [{'username': args.username, 'password': args.password}]
+    else:
+        parser.error('give --username and --password, or --users-file')
+    random.seed(args.seed)
+
+    if args.serve:
+        host, port = serve(args.serve)
+    else:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+
+    stats = Stats()
+    users = [
+        VirtualUser(host, port, accounts[index % len(accounts)], stats)
+        for index in range(args.users)
+    ]
+    # a single login per account: the logins are throttled per username
+    tokens = {}
+    for user in users:
+        username = user.credentials['username']
+        if username not in tokens:
+            if user.authenticate() != 201:
+                raise SystemExit(
+                    f'Login of {username} failed, check the credentials'
+                )
+            tokens[username] = user.access_token, user.refresh_token
+        user.access_token, user.refresh_token = tokens[username]
+
+    deadline = time.monotonic() + args.duration
+    if args.replay:
+        requests, skipped = read_replay(args.replay)
+        if not requests:
+            raise SystemExit('No request to replay in the logs')
+        print(
+            f'Replaying {len(requests)} requests, '
+            f'{skipped} writes skipped'
+        )
+        shared, lock = itertools.cycle(requests), threading.Lock()
+        targets = [
+            (user.run_replay, (shared, lock, deadline)) for user in users
+        ]
+    else:
+        catalog = load_catalog(users[0])
+        targets = [(user.run_mix, (catalog, deadline)) for user in users]
+    stats.reset()
+
+    started = window_started = time.monotonic()
+    threads = [
+        threading.Thread(target=func, args=func_args, daemon=True)
+        for func, func_args in targets
+    ]
+    for thread in threads:
+        thread.start()
+
+    while time.monotonic() < deadline:
+        time.sleep(max(
+            min(window_started + args.interval, deadline) - time.monotonic(),
+            0
+        ))
+        now = time.monotonic()
+        print_table(
+            f'{now - started:.0f} s', stats.take_window(),
+            now - window_started
+        )
+        window_started = now
+    for thread in threads:
+        thread.join()
+
+    print_table(
+        f'Total: {args.users} users, {time.monotonic() - started:.1f} s',
+        stats.total, time.monotonic() - started
+    )
+
+
+if __name__ == '__main__':
+    main()
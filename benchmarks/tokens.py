@@ -0,0 +1,77 @@
+"""
+Token signing and verification microbenchmark.
+
+Run from the project root:
+
+    python -m benchmarks.tokens [--number N]
+"""
+import argparse
+import timeit
+
+from jwt.algorithms import has_crypto
+
+from helpers.tokens import TokenIssuer
+
+
+def generate_keys(algorithm):
+    """
+    Generate a throwaway (signing key, verifying key) pair for
+    ``algorithm``.
+    """
+    if algorithm == 'HS256':
+        return b'benchmark secret', None
+
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+    if algorithm == 'EdDSA':
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = ec.generate_private_key(ec.SECP256R1())
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+def main():
+    """
+    Print the signing and verification cost of every supported algorithm.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    algorithms = ['HS256']
+    if has_crypto:
+        algorithms += ['EdDSA', 'ES256']
+    else:
+        print("cryptography is not installed, skipping EdDSA and ES256")
+
+    print(f"{'algorithm':<10}{'issue pair':>14}{'verify':>14}")
+    for algorithm in algorithms:
+        issuer = TokenIssuer(algorithm, *generate_keys(algorithm))
+        token = issuer.issue('benchmark', 'user')['access_token']
+
+        issue_time = timeit.timeit(
+            lambda: issuer.issue('benchmark', 'user'), number=args.number
+        )
+        verify_time = timeit.timeit(
+            lambda: issuer.decode(token), number=args.number
+        )
+        print(
+            f"{algorithm:<10}"
+            f"{issue_time / args.number * 1e6:>11.1f} us"
+            f"{verify_time / args.number * 1e6:>11.1f} us"
+        )
+
+
+if __name__ == '__main__':
+    main()
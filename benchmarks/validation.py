@@ -0,0 +1,82 @@
+"""
+Request validation microbenchmark.
+
+Validates movie payloads with the compiled schemas of the views and with
+``Schema.load`` of marshmallow, checks that both agree and prints the
+cost per request. Run from the project root:
+
+    python -m benchmarks.validation [--number N]
+"""
+import argparse
+import timeit
+
+from marshmallow import ValidationError
+
+from dao.model.movie import MovieBodySchema
+from helpers.validation import CompiledSchema
+
+PAYLOADS = {
+    'valid POST': {
+        'title': 'Benchmark', 'description': 'A movie', 'trailer': 'url',
+        'year': 2010, 'rating': 7.5, 'genre_id': 1, 'director_id': 2,
+    },
+    'valid PATCH': {'year': '2011', 'rating': '8'},
+    'invalid POST': {
+        'title': 5, 'year': 'unknown', 'genre_id': None, 'bogus': True,
+    },
+}
+
+
+def marshmallow_validate(schema, payload):
+    """
+    Validate ``payload`` with ``Schema.load``, returning (data, errors)
+    like CompiledSchema.validate.
+    """
+    try:
+        return schema.load(payload), {}
+    except ValidationError as err:
+        return err.valid_data, err.messages
+
+
+def main():
+    """
+    Print the validation cost of every payload with both validators.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    schemas = {
+        False: (MovieBodySchema(), CompiledSchema(MovieBodySchema())),
+        True: (
+            MovieBodySchema(partial=True),
+            CompiledSchema(MovieBodySchema(), partial=True)
+        ),
+    }
+
+    print(f"{'payload':<15}{'marshmallow':>14}{'compiled':>14}")
+    for name, payload in PAYLOADS.items():
+        schema, compiled = schemas['PATCH' in name]
+        expected = marshmallow_validate(schema, payload)
+        if compiled.validate(payload) != expected:
+            raise SystemExit(
+                f"{name}: compiled validation differs from marshmallow: "
+                f"{compiled.validate(payload)} != {expected}"
+            )
+
+        load_time = timeit.timeit(
+            lambda: marshmallow_validate(schema, payload),
+            number=args.number
+        )
+        compiled_time = timeit.timeit(
+            lambda: compiled.validate(payload), number=args.number
+        )
+        print(
+            f"{name:<15}"
+            f"{load_time / args.number * 1e6:>11.2f} us"
+            f"{compiled_time / args.number * 1e6:>11.2f} us"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Flask CLI commands module"""
+import json
+import os
+import subprocess
+import sys
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+
+# project root, where the profiled interpreter imports the application
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# run under `python -X importtime`: times the application import, its
+# creation and the construction of every lazily built DAO and service
+STARTUP_PROFILE_SCRIPT = '''
+import json
+import time
+
+start = time.perf_counter()
+import app
+timings = {"import app": time.perf_counter() - start}
+
+from config import Config
+from helpers.implemented import BUILDERS
+
+start = time.perf_counter()
+application = app.create_app(Config())
+timings["create_app"] = time.perf_counter() - start
+
+with application.app_context():
+    for name, builder in BUILDERS.items():
+        start = time.perf_counter()
+        builder()
+        timings["build " + name] = time.perf_counter() - start
+
+print(json.dumps(timings))
+'''
+
+
+def register_commands(application: Flask) -> None:
+    """
+    Register CLI commands to the Flask application.
+    """
+    application.cli.add_command(calibrate_password_hashing)
+    application.cli.add_command(startup_profile)
+    application.cli.add_command(rebuild_movie_listing)
+    application.cli.add_command(run_jobs)
+    application.cli.add_command(check_integrity)
+
+
+@click.command('calibrate-password-hashing')
+@click.option(
+    '--algorithm',
+    type=click.Choice(['pbkdf2-sha256', 'scrypt']),
+    default='scrypt',
+    help='Password hashing algorithm to calibrate.'
+)
+@click.option(
+    '--target-ms',
+    type=float,
+    default=250,
+    help='Target hashing time of one password in milliseconds.'
+)
+def calibrate_password_hashing(algorithm, target_ms):
+    """
+    Find the password hashing cost matching a login latency target on
+    this machine and print the settings to apply.
+    """
+    from helpers.passwords import ScryptHasher, calibrate
+
+    hasher, elapsed = calibrate(algorithm, target_ms)
+    click.echo(f'{algorithm} {hasher.params}: {elapsed:.1f} ms per hash')
+    click.echo('Set these environment variables on the workers:')
+    click.echo(f'PASSWORD_HASH_ALGORITHM={algorithm}')
+    if algorithm == ScryptHasher.name:
+        click.echo(f'SCRYPT_N={hasher.n}')
+        click.echo(f'SCRYPT_R={hasher.r}')
+        click.echo(f'SCRYPT_P={hasher.p}')
+    else:
+        click.echo(f'PWD_HASH_ITERATIONS={hasher.iterations}')
+
+
+@click.command('startup-profile')
+@click.option(
+    '--limit',
+    type=int,
+    default=25,
+    help='Number of slowest imported modules to show.'
+)
+def startup_profile(limit):
+    """
+    Start the application in a fresh interpreter and report the import
+    time of the slowest modules and the initialization time of the app
+    and of every DAO and service.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_PROFILE_SCRIPT],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=False
+    )
+    if result.returncode:
+        raise click.ClickException(result.stderr)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative_us), int(self_us), module.strip()))
+    imports.sort(reverse=True)
+
+    click.echo(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative_us, self_us, module in imports[:limit]:
+        click.echo(
+            f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {module}"
+        )
+
+    click.echo(f"\n{'init ms':>14}  step")
+    for step, seconds in json.loads(result.stdout.splitlines()[-1]).items():
+        click.echo(f"{seconds * 1000:>14.1f}  {step}")
+
+
+@click.command('rebuild-movie-listing')
+@with_appcontext
+def rebuild_movie_listing():
+    """
+    Recompute the denormalized movie listing from the movie, genre and
+    director tables, e.g. after they were edited outside of the DAOs.
+    """
+    from dao.movie_listing import MovieListingDAO
+    from setup_db import db
+
+    MovieListingDAO(db.session).rebuild()
+    click.echo('Movie listing rebuilt')
+
+
+@click.command('run-jobs')
+@with_appcontext
+def run_jobs():
+    """
+    Run the queued background jobs in this process until interrupted,
+    e.g. on a host serving requests with JOB_WORKERS = 0.
+    """
+    from flask import current_app
+
+    click.echo('Running background jobs, press CTRL+C to stop')
+    current_app.extensions['job_runner'].run()
+
+
+@click.command('check-integrity')
+@click.option(
+    '--fix',
+    is_flag=True,
+    help='Release the orphan movies instead of only reporting them.'
+)
+@click.option(
+    '--action',
+    type=click.Choice(['set-null', 'cascade']),
+    default='set-null',
+    help='Clear the missing references, or delete the orphan movies.'
+)
+@with_appcontext
+def check_integrity(fix, action):
+    """
+    Report the movies referencing a missing genre or director, e.g. in a
+    movies.db written before the foreign keys were enforced, and fix them
+    in bulk with --fix.
+    """
+    from sqlalchemy import text
+
+    from dao.movie_listing import MovieListingDAO
+    from dao.movies import MovieDAO
+    from setup_db import db
+
+    movies_dao = MovieDAO(db.session)
+    orphans = movies_dao.count_orphans()
+    for parent, count in orphans.items():
+        click.echo(f'{count} movies reference a missing {parent}')
+    violations = db.session.execute(text('PRAGMA foreign_key_check')).all()
+    click.echo(f'{len(violations)} foreign key violations in total')
+
+    if fix and any(orphans.values()):
+        fixed = movies_dao.release_orphans(action)
+        removed = MovieListingDAO(db.session).prune()
+        for parent, count in fixed.items():
+            click.echo(f'{count} movies fixed ({action}) for {parent}')
+        click.echo(f'{removed} stale movie listing rows removed')
@@ -12,3 +12,86 @@ class Config:
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = SQLITE_DB_NAME
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # enforce the FOREIGN KEY clauses of the SQLite tables, see
+    # helpers/foreign_keys.py
+    SQLITE_FOREIGN_KEYS = True
+
+    # create the app in a pre-fork master process: see helpers/prefork.py
+    PREFORK = False
+    # write one set of log files per worker process
+    LOG_PER_WORKER = False
+    # 'text' log lines, or 'json' records with the request id, route,
+    # user role, timing and statement counts, see helpers/request_context.py
+    LOG_FORMAT = 'text'
+
+    # JSON output: non-ASCII text (most of the catalog) is written as
+    # UTF-8 rather than 6 byte \uXXXX escapes
+    RESTX_JSON = {'ensure_ascii': False}
+
+    # negotiated gzip/deflate (and brotli when installed) compression of
+    # responses of at least COMPRESS_MIN_SIZE bytes; compressed bodies are
+    # cached up to COMPRESS_CACHE_BYTES, see helpers/compression.py
+    COMPRESS_RESPONSES = True
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_CACHE_BYTES = 8 * 2 ** 20
+
+    # run the DAO writes of concurrent requests in shared transactions,
+    # committed every GROUP_COMMIT_WINDOW_MS or GROUP_COMMIT_MAX_BATCH
+    # writes, see helpers/group_commit.py
+    GROUP_COMMIT = False
+    GROUP_COMMIT_WINDOW_MS = 5
+    GROUP_COMMIT_MAX_BATCH = 64
+
+    # statements slower than SLOW_QUERY_MS are written with their query
+    # plan to logs/sql/slow_queries.log, see helpers/sql_monitor.py
+    SLOW_QUERY_MS = 100
+
+    # maximum number of statements per request, by 'METHOD rule' or
+    # default; requests over budget are logged ('warn') or fail ('raise',
+    # the default when TESTING), see helpers/statement_budget.py
+    STATEMENT_BUDGET = 10
+    STATEMENT_BUDGETS = {
+        'GET /movies/': 2,
+        'GET /movies/<int:mid>': 2,
+        'GET /genres/': 2,
+        'GET /genres/<int:gid>': 2,
+        'GET /directors/': 2,
+        'GET /directors/<int:did>': 2,
+        'GET /users/': 2,
+        'GET /users/<int:uid>': 2,
+        # the token or the page of the change log, then one query per
+        # table and chunk of 500 changes, see service/changes.py
+        'GET /changes/': 7,
+    }
+    STATEMENT_BUDGET_MODE = None
+
+    # background job worker threads per process (0: only `flask run-jobs`
+    # processes run jobs), their polling interval, the pause between two
+    # chunks of a job and the silence after which a job is requeued, see
+    # helpers/jobs.py
+    JOB_WORKERS = 1
+    JOB_POLL_INTERVAL_MS = 500
+    JOB_CHUNK_PAUSE_MS = 50
+    JOB_STALE_AFTER = 60
+
+
+@dataclass
+class PreforkConfig(Config):
+    """
+    Flask app configuration settings for pre-fork servers, e.g.
+    ``gunicorn --preload -w 8 'app:create_app("prefork")'``
+    """
+    DEBUG = False
+    PREFORK = True
+    LOG_PER_WORKER = True
+    RESTX_JSON = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+# configurations by name, for servers that can only pass literals to the
+# application factory
+CONFIGS = {
+    'default': Config,
+    'prefork': PreforkConfig,
+}
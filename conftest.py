@@ -0,0 +1,70 @@
+"""
+Pytest configuration
+
+Every test gets an application on a copy of instance/movies.db, in test
+mode, where requests over their statement budget fail, and without
+background job workers.
+"""
+import os
+import shutil
+
+import pytest
+
+from app import create_app
+from config import Config
+
+pytest_plugins = ['helpers.testing']
+
+DATABASE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'movies.db'
+)
+
+
+@pytest.fixture
+def create_test_app(tmp_path):
+    """
+    A factory of applications on a copy of the movies database, taking
+    configuration settings to override, e.g. ``GROUP_COMMIT=True``.
+    """
+    database_path = tmp_path / 'movies.db'
+    shutil.copy(DATABASE_PATH, database_path)
+
+    def create(**settings):
+        class TestConfig(Config):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{database_path}'
+            JOB_WORKERS = 0
+
+        for name, value in settings.items():
+            setattr(TestConfig, name, value)
+        return create_app(TestConfig())
+
+    return create
+
+
+@pytest.fixture
+def app(create_test_app):
+    """
+    The application, on a copy of the movies database.
+    """
+    return create_test_app()
+
+
+@pytest.fixture
+def client(app):
+    """
+    The test client of the application.
+    """
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers():
+    """
+    The headers of the requests of an admin, with an access token signed
+    directly, so that the tests do not spend the login attempts.
+    """
+    from helpers.implemented import token_issuer
+
+    token = token_issuer.issue('admin', 'admin')['access_token']
+    return {'Authorization': f'Bearer {token}'}
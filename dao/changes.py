@@ -0,0 +1,90 @@
+"""ChangeDAO module"""
+import time
+
+from sqlalchemy import func, insert, literal, select
+
+from dao.model.change import Change
+from log_handler import dao_logger
+
+
+class ChangeDAO:
+    """
+    Data access object for the change log written by the catalog DAOs.
+    """
+
+    def __init__(self, session):
+        """
+        Constructor method.
+
+        :param session: The session object to use for database interaction.
+        """
+        self.session = session
+        self.logger = dao_logger
+
+    def record(self, entity, entity_id, operation):
+        """
+        Add a change to the current transaction. The caller commits it
+        together with the change itself.
+
+        :param entity:    The changed table, e.g. 'movie'.
+        :param entity_id: The id of the changed row.
+        :param operation: 'insert', 'update' or 'delete'.
+
+        :return:          The Change object; its id is set on flush.
+        """
+        change = Change(
+            entity=entity, entity_id=entity_id, operation=operation
+        )
+        self.session.add(change)
+        return change
+
+    def record_many(self, entity, entity_ids, operation):
+        """
+        Add a change for every row selected by ``entity_ids`` to the current
+        transaction, with a single INSERT ... SELECT statement.
+
+        :param entity:     The changed table, e.g. 'movie'.
+        :param entity_ids: A SELECT of the ids of the changed rows.
+        :param operation:  'insert', 'update' or 'delete'.
+        """
+        self.session.execute(
+            insert(Change).from_select(
+                ['entity', 'entity_id', 'operation', 'changed_at'],
+                select(
+                    literal(entity), entity_ids.subquery().c[0],
+                    literal(operation), literal(int(time.time()))
+                )
+            )
+        )
+
+    def last_token(self):
+        """
+        Get the id of the latest change.
+
+        :return: The latest change id, or 0 if nothing changed yet.
+        """
+        return self.session.query(func.max(Change.id)).scalar() or 0
+
+    def get_since(self, since, limit):
+        """
+        Get the latest change of every row changed after ``since``.
+
+        :param since: The change id to start after.
+        :param limit: The maximum number of changes to return.
+
+        :return:      A list of Change objects ordered by id.
+        """
+        self.logger.info(
+            'get_since changes method called with parameters '
+            'since=%s, limit=%s', since, limit
+        )
+        latest = self.session.query(func.max(Change.id)).filter(
+            Change.id > since
+        ).group_by(Change.entity, Change.entity_id)
+        changes = self.session.query(Change).filter(
+            Change.id.in_(latest)
+        ).order_by(Change.id).limit(limit).all()
+        self.logger.info(
+            'get_since changes method returned %s changes', len(changes)
+        )
+        return changes
@@ -1,6 +1,13 @@
 """DirectorDAO module"""
 
+from flask_restx import abort
+from sqlalchemy.orm.exc import StaleDataError
+
+from dao.changes import ChangeDAO
 from dao.model.director import Director
+from dao.movie_listing import MovieListingDAO
+from dao.movies import ON_DELETE_ACTIONS, MovieDAO
+from helpers.group_commit import group_committed
 from log_handler import dao_logger
 
 
@@ -9,13 +16,23 @@ class DirectorDAO:
     Data access object for Director model.
     """
 
-    def __init__(self, session):
+    def __init__(self, session, on_delete='set-null'):
         """
         Constructor method.
 
-        :param session: - The session object to use for database interaction.
+        :param session:   - The session object to use for database
+                            interaction.
+        :param on_delete: - What happens to the movies of a deleted
+                            director: 'set-null' clears their director,
+                            'cascade' deletes them.
         """
+        if on_delete not in ON_DELETE_ACTIONS:
+            raise ValueError(f'Unknown ON DELETE action {on_delete}')
         self.session = session
+        self.on_delete = on_delete
+        self.changes = ChangeDAO(session)
+        self.listing = MovieListingDAO(session)
+        self.movies = MovieDAO(session)
         self.logger = dao_logger
 
     def get_all(self):
@@ -45,11 +62,54 @@ class DirectorDAO:
         director = self.session.query(Director).filter(
             Director.id == did
         ).first()
+        if director is None:
+            self.logger.error("No director found with id %d", did)
+            abort(404, f"No director found with id {did}")
         self.logger.info(
             f'get_one_director method execution result: {director.name}'
         )
         return director
 
+    def get_many(self, dids):
+        """
+        Get several directors from the database with a single query.
+
+        :param dids:    - A list of ids of the directors to retrieve.
+
+        :return:        - A list of Director objects. Ids that do not
+                          exist are simply absent from the result.
+        """
+        self.logger.info(
+            'get_many_directors method called with parameter %s', dids
+        )
+        directors = self.session.query(Director).filter(
+            Director.id.in_(dids)
+        ).all()
+        self.logger.info(
+            'get_many_directors method execution result: %s', directors
+        )
+        return directors
+
+    def get_expected(self, did, versions=None):
+        """
+        Get a single director from the database, checking its version.
+
+        :param did:      - The id of the director to retrieve.
+        :param versions: - An optional list of the versions the director
+                           is expected to be at; aborts with 412 if it is
+                           at none of them.
+
+        :return:         - A Director object.
+        """
+        director = self.get_one(did)
+        if versions is not None and director.version not in versions:
+            self.logger.error("Director with id %d version mismatch", did)
+            abort(
+                412, f"Director with id {did} is not at the expected version"
+            )
+        return director
+
+    @group_committed
     def create(self, director):
         """
         Create a new director in the database.
@@ -63,35 +123,80 @@ class DirectorDAO:
 
         director = Director(**director)
         self.session.add(director)
+        self.session.flush()
+        self.changes.record('director', director.id, 'insert')
         self.session.commit()
         self.logger.info(
             f'create method execution result: {director}'
         )
 
-    def delete(self, did):
+    @group_committed
+    def delete(self, did, versions=None):
         """
         Delete a director from the database.
 
-        :param did:     - The id of the director to delete.
+        :param did:      - The id of the director to delete.
+        :param versions: - An optional list of the versions the director
+                           is expected to be at; aborts with 412 if it is
+                           at none of them.
         """
-        director = self.get_one(did)
+        director = self.get_expected(did, versions)
+
+        # the movies first: the foreign keys reject a director deletion
+        # while movies still reference it
+        released = self.movies.release_references(
+            'director', did, self.on_delete
+        )
         self.session.delete(director)
-        self.session.commit()
+        self.changes.record('director', did, 'delete')
+        try:
+            self.session.commit()
+        except StaleDataError as err:
+            self.session.rollback()
+            self.logger.error(
+                "Director with id %d modified concurrently. Error: %s",
+                did, err
+            )
+            abort(
+                412, f"Director with id {did} has been modified concurrently"
+            )
 
-        self.logger.info(f"Director with id {did} has been deleted.")
+        self.logger.info(
+            f"Director with id {did} has been deleted, {released} movies "
+            f"released ({self.on_delete})."
+        )
 
-    def update(self, did, director_data):
+    @group_committed
+    def update(self, did, director_data, versions=None):
         """
         Update the details of a director in the database.
 
         :param did:           - The id of the director to update.
         :param director_data: - A dictionary containing the details to update.
+        :param versions:      - An optional list of the versions the
+                                director is expected to be at; aborts with
+                                412 if it is at none of them.
 
         :return:              - The number of rows updated.
         """
-        row_updated = self.session.query(Director).filter(
-            Director.id == did
-        ).update({"name": director_data.get("name")})
+        query = self.session.query(Director).filter(Director.id == did)
+        if versions is not None:
+            query = query.filter(Director.version.in_(versions))
+
+        row_updated = query.update({
+            "name": director_data.get("name"),
+            "version": Director.version + 1
+        })
+        if not row_updated and versions is not None:
+            self.session.rollback()
+            self.logger.error("Director with id %d version mismatch", did)
+            abort(
+                412, f"Director with id {did} is not at the expected version"
+            )
+
+        if row_updated:
+            self.changes.record('director', did, 'update')
+            self.listing.refresh_director(did)
 
         self.session.commit()
 
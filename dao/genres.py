@@ -1,6 +1,13 @@
 """GenreDAO module"""
 
+from flask_restx import abort
+from sqlalchemy.orm.exc import StaleDataError
+
+from dao.changes import ChangeDAO
 from dao.model.genre import Genre
+from dao.movie_listing import MovieListingDAO
+from dao.movies import ON_DELETE_ACTIONS, MovieDAO
+from helpers.group_commit import group_committed
 from log_handler import dao_logger
 
 
@@ -11,14 +18,23 @@ class GenreDAO:
 
     :param session: The SQLAlchemy session object to use for database
     interactions.
+    :param on_delete: What happens to the movies of a deleted genre.
     """
-    def __init__(self, session):
+    def __init__(self, session, on_delete='set-null'):
         """
         Constructor method.
 
         :param session: The session object to use for database interaction.
+        :param on_delete: What happens to the movies of a deleted genre:
+            'set-null' clears their genre, 'cascade' deletes them.
         """
+        if on_delete not in ON_DELETE_ACTIONS:
+            raise ValueError(f'Unknown ON DELETE action {on_delete}')
         self.session = session
+        self.on_delete = on_delete
+        self.changes = ChangeDAO(session)
+        self.listing = MovieListingDAO(session)
+        self.movies = MovieDAO(session)
         self.logger = dao_logger
 
     def get_all(self):
@@ -47,6 +63,21 @@ class GenreDAO:
         self.logger.info('get_one_genre method execution result: %s', genre)
         return genre
 
+    def get_many(self, gids):
+        """
+        Retrieve several genres from the database with a single query.
+
+        :param gids: A list of genre ids to retrieve.
+
+        :return: A list of Genre objects. Ids that do not exist are simply
+            absent from the result.
+        """
+        self.logger.info('get_many_genres method called with parameter %s', gids)
+        genres = self.session.query(Genre).filter(Genre.id.in_(gids)).all()
+        self.logger.info('get_many_genres method execution result: %s', genres)
+        return genres
+
+    @group_committed
     def create(self, genre):
         """
         Create a new genre in the database.
@@ -56,33 +87,73 @@ class GenreDAO:
         self.logger.info('post_genre method called with parameter %s', genre)
         genre = Genre(**genre)
         self.session.add(genre)
+        self.session.flush()
+        self.changes.record('genre', genre.id, 'insert')
         self.session.commit()
         self.logger.info('post_genre method execution result: %s', genre)
 
-    def delete(self, gid):
+    @group_committed
+    def delete(self, gid, versions=None):
         """
         Delete a genre from the database.
 
         :param gid: The id of the genre to delete.
+        :param versions: An optional list of the versions the genre is
+            expected to be at; aborts with 412 if it is at none of them.
         """
         genre = self.get_one(gid)
+        if versions is not None and genre.version not in versions:
+            self.logger.error("Genre with id %d version mismatch", gid)
+            abort(412, f"Genre with id {gid} is not at the expected version")
+
+        # the movies first: the foreign keys reject a genre deletion
+        # while movies still reference it
+        released = self.movies.release_references(
+            'genre', gid, self.on_delete
+        )
         self.session.delete(genre)
-        self.session.commit()
+        self.changes.record('genre', gid, 'delete')
+        try:
+            self.session.commit()
+        except StaleDataError as err:
+            self.session.rollback()
+            self.logger.error(
+                "Genre with id %d modified concurrently. Error: %s", gid, err
+            )
+            abort(412, f"Genre with id {gid} has been modified concurrently")
 
-        self.logger.info(f"Genre with id {gid} has been deleted.")
+        self.logger.info(
+            f"Genre with id {gid} has been deleted, {released} movies "
+            f"released ({self.on_delete})."
+        )
 
-    def update(self, gid, genre_data):
+    @group_committed
+    def update(self, gid, genre_data, versions=None):
         """
         Update the name of a genre in the database.
 
         :param gid: The id of the genre to update.
         :param genre_data: A dictionary containing the new name of the genre.
+        :param versions: An optional list of the versions the genre is
+            expected to be at; aborts with 412 if it is at none of them.
 
         :return: The number of rows updated in the database.
         """
-        row_updated = self.session.query(Genre).filter(
-            Genre.id == gid
-        ).update({"name": genre_data.get("name")})
+        query = self.session.query(Genre).filter(Genre.id == gid)
+        if versions is not None:
+            query = query.filter(Genre.version.in_(versions))
+
+        row_updated = query.update(
+            {"name": genre_data.get("name"), "version": Genre.version + 1}
+        )
+        if not row_updated and versions is not None:
+            self.session.rollback()
+            self.logger.error("Genre with id %d version mismatch", gid)
+            abort(412, f"Genre with id {gid} is not at the expected version")
+
+        if row_updated:
+            self.changes.record('genre', gid, 'update')
+            self.listing.refresh_genre(gid)
 
         self.session.commit()
 
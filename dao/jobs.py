@@ -0,0 +1,216 @@
+"""JobDAO module"""
+import time
+
+from flask_restx import abort
+from sqlalchemy import select, update
+from sqlalchemy.exc import NoResultFound
+
+from dao.model.job import JOB_CANCELLED, JOB_CANCELLING, JOB_PENDING, \
+    JOB_RUNNING, Job
+from log_handler import dao_logger
+
+
+class JobDAO:
+    """
+    Data access object for the persistent queue of background jobs. Every
+    method commits on its own: the job rows are never part of the
+    transactions of the jobs themselves.
+    """
+
+    def __init__(self, session):
+        """
+        Constructor method.
+
+        :param session: The session object to use for database interaction.
+        """
+        self.session = session
+        self.logger = dao_logger
+
+    def get_all(self, status=None, limit=100):
+        """
+        Retrieve the latest jobs, with the option to filter by status.
+
+        :param status: An optional job status, e.g. 'running'.
+        :param limit: The maximum number of jobs to return.
+
+        :return: A list of Job objects, the latest first.
+        """
+        self.logger.info(
+            'get_all_jobs method called with parameters status=%s, limit=%s',
+            status, limit
+        )
+        jobs = self.session.query(Job)
+        if status:
+            jobs = jobs.filter(Job.status == status)
+        jobs = jobs.order_by(Job.id.desc()).limit(limit).all()
+        self.logger.info('get_all_jobs method execution result: %s', jobs)
+        return jobs
+
+    def get_one(self, jid):
+        """
+        Retrieve a job by its ID.
+
+        :param jid: The ID of the job.
+
+        :return: A Job object.
+        """
+        self.logger.info('get_one_job method called with parameter %s', jid)
+        try:
+            job = self.session.query(Job).filter(Job.id == jid).one()
+        except NoResultFound as err:
+            self.logger.error("No job found with id %d. Error: %s", jid, err)
+            abort(404, f"No job found with id {jid}. Error: {err}")
+        self.logger.info('get_one_job method execution result: %s', job)
+        return job
+
+    def create(self, job_type, params):
+        """
+        Queue a new job.
+
+        :param job_type: The type of the job, e.g. 'delete-director'.
+        :param params: A JSON serializable dictionary of its parameters.
+
+        :return: The Job object.
+        """
+        self.logger.info(
+            'create_job method called with parameters type=%s, params=%s',
+            job_type, params
+        )
+        job = Job(type=job_type, params=params)
+        self.session.add(job)
+        self.session.commit()
+        self.logger.info('create_job method execution result: %s', job)
+        return job
+
+    def claim(self, worker):
+        """
+        Atomically take the oldest pending job for a worker.
+
+        :param worker: The name of the worker, e.g. 'host:pid:thread'.
+
+        :return: The claimed Job object, or None when no job is pending.
+        """
+        now = int(time.time())
+        oldest = select(Job.id).where(
+            Job.status == JOB_PENDING
+        ).order_by(Job.id).limit(1).scalar_subquery()
+        jid = self.session.execute(
+            update(Job).where(
+                Job.id == oldest, Job.status == JOB_PENDING
+            ).values(
+                status=JOB_RUNNING, worker=worker, started_at=now,
+                heartbeat_at=now
+            ).returning(Job.id).execution_options(synchronize_session=False)
+        ).scalar()
+        self.session.commit()
+        if jid is None:
+            return None
+        self.logger.info('Job %d claimed by worker %s', jid, worker)
+        return self.session.get(Job, jid, populate_existing=True)
+
+    def report(self, jid, progress, total=None):
+        """
+        Save the progress of a running job and its heartbeat.
+
+        :param jid: The ID of the job.
+        :param progress: The number of items processed so far.
+        :param total: The total number of items, when known.
+
+        :return: The status of the job, 'cancelling' once a cancellation
+            was requested.
+        """
+        values = {"progress": progress, "heartbeat_at": int(time.time())}
+        if total is not None:
+            values["total"] = total
+        status = self.session.execute(
+            update(Job).where(Job.id == jid).values(**values).returning(
+                Job.status
+            ).execution_options(synchronize_session=False)
+        ).scalar()
+        self.session.commit()
+        return status
+
+    def finish(self, jid, status, error=None):
+        """
+        Record the outcome of a job.
+
+        :param jid: The ID of the job.
+        :param status: 'succeeded', 'failed' or 'cancelled'.
+        :param error: The error message of a failed job.
+        """
+        self.logger.info(
+            'finish_job method called with parameters jid=%s, status=%s, '
+            'error=%s', jid, status, error
+        )
+        self.session.execute(
+            update(Job).where(Job.id == jid).values(
+                status=status, error=error, finished_at=int(time.time())
+            ).execution_options(synchronize_session=False)
+        )
+        self.session.commit()
+
+    def cancel(self, jid):
+        """
+        Cancel a pending job, or ask a running job to stop after its
+        current chunk.
+
+        :param jid: The ID of the job.
+
+        :return: The Job object, or None when the job already finished.
+        """
+        self.logger.info('cancel_job method called with parameter %s', jid)
+        job = self.get_one(jid)
+        if job.status == JOB_PENDING:
+            values = {"status": JOB_CANCELLED, "finished_at": int(time.time())}
+        elif job.status == JOB_RUNNING:
+            values = {"status": JOB_CANCELLING}
+        elif job.status == JOB_CANCELLING:
+            return job
+        else:
+            return None
+
+        cancelled = self.session.execute(
+            update(Job).where(
+                Job.id == jid, Job.status == job.status
+            ).values(**values).execution_options(synchronize_session=False)
+        ).rowcount
+        self.session.commit()
+        self.session.refresh(job)
+        if not cancelled:
+            # claimed or finished in the meantime
+            return self.cancel(jid)
+        self.logger.info('cancel_job method execution result: %s', job)
+        return job
+
+    def requeue_stale(self, stale_after):
+        """
+        Put back in the queue the running jobs whose worker stopped
+        reporting, e.g. after a crash or a restart; their handlers resume
+        from the items not processed yet.
+
+        :param stale_after: The heartbeat age, in seconds, after which a
+            worker is considered dead.
+
+        :return: The number of requeued jobs.
+        """
+        now = int(time.time())
+        requeued = self.session.execute(
+            update(Job).where(
+                Job.status == JOB_RUNNING,
+                Job.heartbeat_at < now - stale_after
+            ).values(status=JOB_PENDING, worker=None).execution_options(
+                synchronize_session=False
+            )
+        ).rowcount
+        self.session.execute(
+            update(Job).where(
+                Job.status == JOB_CANCELLING,
+                Job.heartbeat_at < now - stale_after
+            ).values(status=JOB_CANCELLED, finished_at=now).execution_options(
+                synchronize_session=False
+            )
+        )
+        self.session.commit()
+        if requeued:
+            self.logger.warning('%d stale jobs requeued', requeued)
+        return requeued
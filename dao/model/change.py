@@ -0,0 +1,26 @@
+"""Change log model module"""
+import time
+
+from setup_db import db
+
+
+class Change(db.Model):
+    """
+    Change log model: one row per insert, update or delete of a catalog
+    row. The monotonically increasing id is the sync token clients pass
+    back to /changes/.
+    """
+    __tablename__ = 'change_log'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String, nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String, nullable=False)
+    changed_at = db.Column(
+        db.Integer, nullable=False, default=lambda: int(time.time())
+    )
+
+    def __repr__(self):
+        return (
+            f'Change: {self.id} - {self.operation} '
+            f'{self.entity} {self.entity_id}'
+        )
@@ -14,9 +14,13 @@ class Director(db.Model):
     __tablename__ = 'director'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String)
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+
+    # UPDATE and DELETE statements of the ORM check and bump the version
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
-        return 'Director: %s - %s', self.id, self.name
+        return f'Director: {self.id} - {self.name}'
 
 
 class DirectorSchema(Schema):
@@ -24,4 +28,5 @@ class DirectorSchema(Schema):
     Director schema with id set to dump_only
     """
     id = fields.Int(dump_only=True)
-    name = fields.Str()
+    name = fields.Str(required=True)
+    version = fields.Int(dump_only=True)
@@ -12,6 +12,10 @@ class Genre(db.Model):
     __tablename__ = 'genre'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String)
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+
+    # UPDATE and DELETE statements of the ORM check and bump the version
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'Genre: {self.id} - {self.name}'
@@ -22,4 +26,5 @@ class GenreSchema(Schema):
     Genre schema
     """
     id = fields.Int()
-    name = fields.Str()
+    name = fields.Str(required=True)
+    version = fields.Int(dump_only=True)
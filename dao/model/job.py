@@ -0,0 +1,63 @@
+"""Background job model and schema module"""
+import time
+
+from marshmallow import Schema, fields
+
+from setup_db import db
+
+# job statuses; 'cancelling' jobs stop after their current chunk
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_CANCELLING = 'cancelling'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class Job(db.Model):
+    """
+    Background job model: one row per admin operation queued for the job
+    runner, with its progress. Timestamps are Unix times.
+    """
+    __tablename__ = 'job'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    type = db.Column(db.String, nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(
+        db.String, nullable=False, default=JOB_PENDING, index=True
+    )
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    error = db.Column(db.String)
+    worker = db.Column(db.String)
+    created_at = db.Column(
+        db.Integer, nullable=False, default=lambda: int(time.time())
+    )
+    started_at = db.Column(db.Integer)
+    heartbeat_at = db.Column(db.Integer)
+    finished_at = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f'Job: {self.id} - {self.type} - {self.status}'
+
+
+class JobSchema(Schema):
+    """
+    Job schema
+    """
+    id = fields.Int()
+    type = fields.Str()
+    params = fields.Dict()
+    status = fields.Str()
+    progress = fields.Int()
+    total = fields.Int()
+    error = fields.Str()
+    worker = fields.Str()
+    created_at = fields.Int()
+    started_at = fields.Int()
+    heartbeat_at = fields.Int()
+    finished_at = fields.Int()
+
+    class Meta:
+        ordered = True
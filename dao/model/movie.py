@@ -21,6 +21,10 @@ class Movie(db.Model):
     rating = db.Column(db.String)
     genre_id = db.Column(db.Integer, db.ForeignKey('genre.id'))
     director_id = db.Column(db.Integer, db.ForeignKey('director.id'))
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+
+    # UPDATE and DELETE statements of the ORM check and bump the version
+    __mapper_args__ = {'version_id_col': version}
 
     genre = relationship(Genre)
     director = relationship(Director)
@@ -34,13 +38,22 @@ class MovieSchema(Schema):
     Movie schema
     """
     id = fields.Int()
-    title = fields.Str()
+    title = fields.Str(required=True)
     description = fields.Str()
     trailer = fields.Str()
     year = fields.Int()
     rating = fields.Str()
     genre_id = fields.Int()
     director_id = fields.Int()
+    version = fields.Int(dump_only=True)
 
     class Meta:
         ordered = True
+
+
+class MovieBodySchema(MovieSchema):
+    """
+    Movie schema of the request bodies: the rating is stored as a number,
+    so numbers and numeric strings are accepted for it
+    """
+    rating = fields.Float()
@@ -0,0 +1,45 @@
+"""Movie listing model and schema module"""
+
+from marshmallow import fields
+
+from dao.model.movie import MovieSchema
+from setup_db import db
+
+
+class MovieListing(db.Model):
+    """
+    Movie listing model: a denormalized copy of every movie with the names
+    of its genre and director, maintained by the movie, genre and director
+    DAOs, so that movie lists are read from a single table.
+    """
+    __tablename__ = 'movie_listing'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String)
+    description = db.Column(db.String)
+    trailer = db.Column(db.Integer)
+    year = db.Column(db.Integer)
+    rating = db.Column(db.String)
+    genre_id = db.Column(db.Integer)
+    genre_name = db.Column(db.String)
+    director_id = db.Column(db.Integer)
+    director_name = db.Column(db.String)
+    version = db.Column(db.Integer, nullable=False)
+
+    # the filters of the movie list; their entries are ordered by id, so
+    # filtered lists are index range scans in id order
+    __table_args__ = (
+        db.Index('ix_movie_listing_genre_id', 'genre_id'),
+        db.Index('ix_movie_listing_director_id', 'director_id'),
+        db.Index('ix_movie_listing_year', 'year'),
+    )
+
+    def __repr__(self):
+        return f'MovieListing: {self.title} - {self.year} - {self.rating}'
+
+
+class MovieListingSchema(MovieSchema):
+    """
+    Movie listing schema: the movie with its genre and director names
+    """
+    genre_name = fields.Str()
+    director_name = fields.Str()
@@ -13,6 +13,17 @@ class User(db.Model):
     username = db.Column(db.String, unique=True)
     password = db.Column(db.String)
     role = db.Column(db.String, default='user')
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+
+    # UPDATE and DELETE statements of the ORM check and bump the version
+    __mapper_args__ = {'version_id_col': version}
+
+    # the user list is ordered by username; the unique index on username
+    # serves the unfiltered and prefix filtered pages, this one the pages
+    # filtered by role
+    __table_args__ = (
+        db.Index('ix_user_role_username', 'role', 'username'),
+    )
 
     def __repr__(self):
         return f'User: {self.username}'
@@ -25,6 +36,7 @@ class UserSchema(Schema):
     id = fields.Int(dump_only=True)
     username = fields.Str()
     role = fields.Str()
+    version = fields.Int(dump_only=True)
 
     class Meta:
         ordered = True
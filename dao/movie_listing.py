@@ -0,0 +1,229 @@
+"""MovieListingDAO module"""
+from sqlalchemy import delete, insert, select, update
+
+from dao.model.director import Director
+from dao.model.genre import Genre
+from dao.model.movie import Movie
+from dao.model.movie_listing import MovieListing
+from log_handler import dao_logger
+
+# the listing columns, in the order of the columns of ``_listing_select``
+LISTING_COLUMNS = [
+    'id', 'title', 'description', 'trailer', 'year', 'rating', 'genre_id',
+    'genre_name', 'director_id', 'director_name', 'version'
+]
+
+
+def _listing_select():
+    """
+    Build the SELECT computing the listing rows from the movie, genre and
+    director tables.
+    """
+    return select(
+        Movie.id, Movie.title, Movie.description, Movie.trailer, Movie.year,
+        Movie.rating, Movie.genre_id, Genre.name, Movie.director_id,
+        Director.name, Movie.version
+    ).outerjoin(
+        Genre, Genre.id == Movie.genre_id
+    ).outerjoin(
+        Director, Director.id == Movie.director_id
+    )
+
+
+class MovieListingDAO:
+    """
+    Data access object for the denormalized movie listing. The write
+    methods add their statement to the current transaction of the catalog
+    DAOs, which commit it together with the change itself.
+    """
+
+    def __init__(self, session):
+        """
+        Constructor method.
+
+        :param session: The session object to use for database interaction.
+        """
+        self.session = session
+        self.logger = dao_logger
+
+    def get_all(self, year=None, did=None, gid=None):
+        """
+        Retrieve the listing of all movies, with the option to filter by
+        year, director ID, or genre ID.
+
+        :param year: An optional integer representing the year the movie was
+            released.
+        :param did: An optional integer representing the ID of the movie's
+            director.
+        :param gid: An optional integer representing the ID of the movie's
+            genre.
+
+        :return: A list of MovieListing objects ordered by movie ID.
+        """
+        self.logger.info(
+            'get_all_listings method called with parameters '
+            'year=%s, did=%s, gid=%s',
+            year, did, gid
+        )
+        listings = self.session.query(MovieListing)
+
+        if year:
+            listings = listings.filter(MovieListing.year == year)
+
+        if did:
+            listings = listings.filter(MovieListing.director_id == did)
+
+        if gid:
+            listings = listings.filter(MovieListing.genre_id == gid)
+
+        listings = listings.order_by(MovieListing.id).all()
+        self.logger.info(
+            'get_all_listings method execution result: %d movies',
+            len(listings)
+        )
+        return listings
+
+    def refresh_movie(self, mid):
+        """
+        Insert or replace the listing row of a movie.
+
+        :param mid: The ID of the created or updated movie.
+        """
+        self.refresh_movies([mid])
+
+    def refresh_movies(self, mids):
+        """
+        Insert or replace the listing rows of several movies.
+
+        :param mids: A list of the IDs of the created or updated movies.
+        """
+        self.session.execute(
+            insert(MovieListing).prefix_with('OR REPLACE').from_select(
+                LISTING_COLUMNS, _listing_select().where(Movie.id.in_(mids))
+            )
+        )
+
+    def remove_movies(self, mids):
+        """
+        Remove the listing rows of several movies.
+
+        :param mids: A SELECT of the IDs of the deleted movies.
+        """
+        self.session.execute(
+            delete(MovieListing).where(
+                MovieListing.id.in_(mids)
+            ).execution_options(synchronize_session=False)
+        )
+
+    def clear_parent(self, column, mids):
+        """
+        Clear the genre or director of the listing rows of several movies
+        and bump their version, as done to the movies themselves.
+
+        :param column: 'genre_id' or 'director_id'.
+        :param mids: A SELECT of the IDs of the updated movies.
+        """
+        name = column.replace('_id', '_name')
+        self.session.execute(
+            update(MovieListing).where(MovieListing.id.in_(mids)).values({
+                column: None, name: None,
+                "version": MovieListing.version + 1
+            }).execution_options(synchronize_session=False)
+        )
+
+    def remove_movie(self, mid):
+        """
+        Remove the listing row of a movie.
+
+        :param mid: The ID of the deleted movie.
+        """
+        self.session.execute(
+            delete(MovieListing).where(
+                MovieListing.id == mid
+            ).execution_options(synchronize_session=False)
+        )
+
+    def refresh_genre(self, gid):
+        """
+        Copy the current name of a genre, or NULL once it is deleted, to
+        the listing rows of its movies.
+
+        :param gid: The ID of the updated or deleted genre.
+        """
+        name = select(Genre.name).where(Genre.id == gid).scalar_subquery()
+        self.session.execute(
+            update(MovieListing).where(
+                MovieListing.genre_id == gid
+            ).values(genre_name=name).execution_options(
+                synchronize_session=False
+            )
+        )
+
+    def refresh_director(self, did):
+        """
+        Copy the current name of a director, or NULL once it is deleted,
+        to the listing rows of their movies.
+
+        :param did: The ID of the updated or deleted director.
+        """
+        name = select(Director.name).where(
+            Director.id == did
+        ).scalar_subquery()
+        self.session.execute(
+            update(MovieListing).where(
+                MovieListing.director_id == did
+            ).values(director_name=name).execution_options(
+                synchronize_session=False
+            )
+        )
+
+    def rebuild(self):
+        """
+        Recompute the whole listing from the catalog tables and commit it.
+        """
+        self.logger.info('rebuild_listing method called')
+        self.session.execute(
+            delete(MovieListing).execution_options(synchronize_session=False)
+        )
+        self.session.execute(
+            insert(MovieListing).from_select(
+                LISTING_COLUMNS, _listing_select()
+            )
+        )
+        self.session.commit()
+        self.logger.info('rebuild_listing method execution result: done')
+
+    def prune(self):
+        """
+        Remove the listing rows of the movies which no longer exist and
+        commit it.
+
+        :return: The number of removed rows.
+        """
+        removed = self.session.execute(
+            delete(MovieListing).where(
+                MovieListing.id.not_in(select(Movie.id))
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        self.session.commit()
+        return removed
+
+    def rebuild_chunk(self, after, limit):
+        """
+        Recompute the listing rows of the next ``limit`` movies by ID and
+        commit them.
+
+        :param after: The movie ID to start after.
+        :param limit: The maximum number of movies.
+
+        :return: The IDs of the refreshed movies, in increasing order.
+        """
+        mids = self.session.scalars(
+            select(Movie.id).where(Movie.id > after).order_by(
+                Movie.id
+            ).limit(limit)
+        ).all()
+        if mids:
+            self.refresh_movies(mids)
+        self.session.commit()
+        return mids
@@ -1,11 +1,28 @@
 """MovieDAO module"""
 
 from flask_restx import abort
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.orm.exc import StaleDataError
 
+from dao.changes import ChangeDAO
+from dao.model.director import Director
+from dao.model.genre import Genre
 from dao.model.movie import Movie
+from dao.movie_listing import MovieListingDAO
+from helpers.group_commit import group_committed
 from log_handler import dao_logger
 
+# what happens to the movies of a deleted genre or director: their
+# reference is cleared ('set-null') or they are deleted too ('cascade')
+ON_DELETE_ACTIONS = ('set-null', 'cascade')
+
+# the movie columns referencing every parent table, with its model
+PARENT_COLUMNS = {
+    'genre': (Movie.genre_id, Genre),
+    'director': (Movie.director_id, Director),
+}
+
 
 class MovieDAO:
 
@@ -16,6 +33,8 @@ class MovieDAO:
         :param session: The session object to use for database interaction.
         """
         self.session = session
+        self.changes = ChangeDAO(session)
+        self.listing = MovieListingDAO(session)
         self.logger = dao_logger
 
     def get_all(self, year=None, did=None, gid=None):
@@ -54,6 +73,23 @@ class MovieDAO:
         )
         return all_movies
 
+    def get_listing(self, year=None, did=None, gid=None):
+        """
+        Retrieve the list cards of all movies, with their genre and
+        director names, from the denormalized listing table, with the
+        option to filter by year, director ID, or genre ID.
+
+        :param year: An optional integer representing the year the movie was
+            released.
+        :param did: An optional integer representing the ID of the movie's
+            director.
+        :param gid: An optional integer representing the ID of the movie's
+            genre.
+
+        :return: A list of MovieListing objects ordered by movie ID.
+        """
+        return self.listing.get_all(year, did, gid)
+
     def get_one(self, mid):
         """
         Retrieve a single movie from the database by its ID.
@@ -75,6 +111,40 @@ class MovieDAO:
         self.logger.info('get_one_movie method execution result: %s', movie)
         return movie
 
+    def get_many(self, mids):
+        """
+        Retrieve several movies from the database with a single query.
+
+        :param mids: A list of integers representing the IDs of the movies
+            to retrieve.
+
+        :return: A list of Movie objects in no particular order. IDs that
+            do not exist are simply absent from the result.
+        """
+        self.logger.info(
+            'get_many_movies method called with parameter %s', mids
+        )
+        movies = self.session.query(Movie).filter(Movie.id.in_(mids)).all()
+        self.logger.info(
+            'get_many_movies method execution result: %s', movies
+        )
+        return movies
+
+    def count(self, did=None):
+        """
+        Count the movies, with the option to filter by director ID.
+
+        :param did: An optional integer representing the ID of the movies'
+            director.
+
+        :return: The number of movies.
+        """
+        query = self.session.query(func.count(Movie.id))
+        if did:
+            query = query.filter(Movie.director_id == did)
+        return query.scalar()
+
+    @group_committed
     def create(self, movie):
         """
         Create a new movie in the database.
@@ -85,43 +155,267 @@ class MovieDAO:
         self.logger.info('post_movie method called with parameter %s', movie)
         movie = Movie(**movie)
         self.session.add(movie)
+        try:
+            self.session.flush()
+        except IntegrityError as err:
+            self._invalid_reference(err)
+        self.changes.record('movie', movie.id, 'insert')
+        self.listing.refresh_movie(movie.id)
         self.session.commit()
         self.logger.info('post_movie method execution result: %s', movie)
 
-    def update(self, mid, movie):
+    @group_committed
+    def update(self, mid, movie, versions=None):
         """
         Update an existing movie in the database.
 
         :param mid: An integer representing the ID of the movie to update.
         :param movie: A dictionary representing the updated movie data, with
             keys corresponding to column names in the Movie table.
+        :param versions: An optional list of the versions the movie is
+            expected to be at; aborts with 412 if it is at none of them.
 
         :return: The number of rows updated in the database.
         """
         self.logger.info(
-            'update_movie method called with parameters mid=%s, movie=%s', mid,
-            movie
+            'update_movie method called with parameters mid=%s, movie=%s, '
+            'versions=%s', mid, movie, versions
         )
-        result = self.session.query(Movie).filter(
-            Movie.id == mid
-        ).update(movie)
+        query = self.session.query(Movie).filter(Movie.id == mid)
+        if versions is not None:
+            query = query.filter(Movie.version.in_(versions))
+
+        try:
+            result = query.update({**movie, "version": Movie.version + 1})
+        except IntegrityError as err:
+            self._invalid_reference(err)
+        if not result and versions is not None:
+            self.session.rollback()
+            self._version_mismatch(mid)
+
+        if result:
+            self.changes.record('movie', mid, 'update')
+            self.listing.refresh_movie(mid)
 
         self.session.commit()
         self.logger.info('update_movie method execution result: %s', result)
         return result
 
-    def delete(self, mid):
+    @group_committed
+    def patch(self, mid, fields, versions=None):
+        """
+        Update only the given columns of an existing movie with a single
+        UPDATE statement.
+
+        :param mid: An integer representing the ID of the movie to update.
+        :param fields: A dictionary of the changed columns and their new
+            values.
+        :param versions: An optional list of the versions the movie is
+            expected to be at; aborts with 412 if it is at none of them.
+
+        :return: The new version of the movie.
+        """
+        self.logger.info(
+            'patch_movie method called with parameters mid=%s, fields=%s, '
+            'versions=%s', mid, fields, versions
+        )
+        statement = update(Movie).where(Movie.id == mid)
+        if versions is not None:
+            statement = statement.where(Movie.version.in_(versions))
+
+        try:
+            version = self.session.execute(
+                statement.values(
+                    **fields, version=Movie.version + 1
+                ).returning(Movie.version)
+            ).scalar()
+        except IntegrityError as err:
+            self._invalid_reference(err)
+
+        if version is None:
+            self.session.rollback()
+            if versions is not None:
+                self._version_mismatch(mid)
+            self.logger.error("No movie found with id %d", mid)
+            abort(404, f"No movie found with id {mid}")
+
+        self.changes.record('movie', mid, 'update')
+        self.listing.refresh_movie(mid)
+        self.session.commit()
+        self.logger.info('patch_movie method execution result: %s', version)
+        return version
+
+    @group_committed
+    def delete(self, mid, versions=None):
         """
         Delete a movie data from the database with the given id.
 
         :param mid: An integer representing the id of the movie to be deleted.
+        :param versions: An optional list of the versions the movie is
+            expected to be at; aborts with 412 if it is at none of them.
         """
-        self.logger.info('delete_movie method called with parameter %s', mid)
+        self.logger.info(
+            'delete_movie method called with parameters mid=%s, versions=%s',
+            mid, versions
+        )
         movie = self.get_one(mid)
+        if versions is not None and movie.version not in versions:
+            self.logger.error("Movie with id %d version mismatch", mid)
+            abort(412, f"Movie with id {mid} is not at the expected version")
+
         self.session.delete(movie)
-        self.session.commit()
+        self.changes.record('movie', mid, 'delete')
+        try:
+            self.listing.remove_movie(mid)
+            self.session.commit()
+        except StaleDataError as err:
+            self.session.rollback()
+            self.logger.error(
+                "Movie with id %d modified concurrently. Error: %s", mid, err
+            )
+            abort(412, f"Movie with id {mid} has been modified concurrently")
         self.logger.info(
             'delete_movie method execution result: movie data '
             'with id=%s has been deleted',
             mid
         )
+
+    def _version_mismatch(self, mid):
+        """
+        Abort a conditional write which updated no row: with 404 if the
+        movie does not exist, else with 412 as it is at another version.
+
+        :param mid: An integer representing the ID of the movie.
+        """
+        self.get_one(mid)
+        self.logger.error("Movie with id %d version mismatch", mid)
+        abort(412, f"Movie with id {mid} is not at the expected version")
+
+    def release_references(self, parent, parent_id, action, limit=None):
+        """
+        Apply the ON DELETE action of the movies referencing a genre or
+        director about to be deleted, with set-based statements added to
+        the current transaction: the caller commits them together with
+        the deletion of the parent.
+
+        :param parent: 'genre' or 'director'.
+        :param parent_id: An integer representing the ID of the parent.
+        :param action: 'set-null' or 'cascade'.
+        :param limit: An optional maximum number of movies to release.
+
+        :return: The number of movies updated or deleted.
+        """
+        column, _ = PARENT_COLUMNS[parent]
+        return self._release(column, column == parent_id, action, limit)
+
+    def count_orphans(self):
+        """
+        Count the movies referencing a genre or director which does not
+        exist.
+
+        :return: A dictionary of the number of orphans by parent.
+        """
+        return {
+            parent: self.session.query(func.count(Movie.id)).filter(
+                self._orphan_condition(column, model)
+            ).scalar()
+            for parent, (column, model) in PARENT_COLUMNS.items()
+        }
+
+    def release_orphans(self, action):
+        """
+        Apply an ON DELETE action to the movies referencing a genre or
+        director which does not exist, and commit it.
+
+        :param action: 'set-null' or 'cascade'.
+
+        :return: A dictionary of the number of fixed movies by parent.
+        """
+        self.logger.info(
+            'release_orphans method called with parameter %s', action
+        )
+        fixed = {
+            parent: self._release(
+                column, self._orphan_condition(column, model), action
+            )
+            for parent, (column, model) in PARENT_COLUMNS.items()
+        }
+        self.session.commit()
+        self.logger.info('release_orphans method execution result: %s', fixed)
+        return fixed
+
+    @group_committed
+    def release_director(self, did, action, limit):
+        """
+        Release at most ``limit`` movies of a director in one transaction,
+        so that deleting the director does not hold the write lock for
+        all of their movies at once.
+
+        :param did: An integer representing the ID of the director.
+        :param action: 'set-null' or 'cascade'.
+        :param limit: The maximum number of movies to release.
+
+        :return: The number of movies released; 0 once the director has
+            no movies left.
+        """
+        self.logger.info(
+            'release_director method called with parameters did=%s, '
+            'action=%s, limit=%s', did, action, limit
+        )
+        released = self.release_references('director', did, action, limit)
+        self.session.commit()
+        self.logger.info(
+            'release_director method execution result: %d movies', released
+        )
+        return released
+
+    def _invalid_reference(self, err):
+        """
+        Roll back a write rejected by the foreign keys and abort with 400.
+
+        :param err: The IntegrityError raised by the write.
+        """
+        self.session.rollback()
+        self.logger.error("Movie references a missing row. Error: %s", err)
+        abort(400, "genre_id and director_id must reference existing rows")
+
+    @staticmethod
+    def _orphan_condition(column, model):
+        """
+        Build the condition selecting the movies whose ``column``
+        references a missing row of ``model``.
+        """
+        return column.is_not(None) & column.not_in(select(model.id))
+
+    def _release(self, column, condition, action, limit=None):
+        """
+        Clear ``column`` of the movies matching ``condition``, or delete
+        them, with their change log and listing rows: one statement per
+        table whatever the number of movies.
+
+        :return: The number of movies updated or deleted.
+        """
+        if action not in ON_DELETE_ACTIONS:
+            raise ValueError(f'Unknown ON DELETE action {action}')
+
+        mids = select(Movie.id).where(condition).order_by(Movie.id)
+        if limit:
+            mids = mids.limit(limit)
+
+        # the listing and the change log first: they select the movies
+        # by the reference being removed
+        if action == 'cascade':
+            self.listing.remove_movies(mids)
+            self.changes.record_many('movie', mids, 'delete')
+            statement = delete(Movie)
+        else:
+            self.listing.clear_parent(column.key, mids)
+            self.changes.record_many('movie', mids, 'update')
+            statement = update(Movie).values({
+                column.key: None, "version": Movie.version + 1
+            })
+        return self.session.execute(
+            statement.where(Movie.id.in_(mids)).execution_options(
+                synchronize_session=False
+            )
+        ).rowcount
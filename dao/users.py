@@ -1,6 +1,11 @@
 """UserDAO module"""
+import sys
+
+from flask import abort
+from sqlalchemy.orm.exc import StaleDataError
 
 from dao.model.user import User
+from helpers.group_commit import group_committed
 from log_handler import dao_logger
 
 
@@ -15,14 +20,41 @@ class UserDAO:
         self.session = session
         self.logger = dao_logger
 
-    def get_all(self):
+    def get_all(self, role=None, prefix=None, after=None, limit=None):
         """
-        Retrieve all users in the User table.
+        Retrieve a page of users ordered by username, with the option to
+        filter by role and username prefix. Every page is an index range
+        scan, however deep it is.
+
+        :param role: An optional role, e.g. 'admin'.
+        :param prefix: An optional username prefix.
+        :param after: The last username of the previous page, if any.
+        :param limit: The maximum number of users, or None for all.
 
         :return: A list of User objects.
         """
-        self.logger.info('get_all users method called')
-        users = self.session.query(User).all()
+        self.logger.info(
+            'get_all users method called with parameters role=%s, '
+            'prefix=%s, after=%s, limit=%s', role, prefix, after, limit
+        )
+        users = self.session.query(User)
+
+        if role:
+            users = users.filter(User.role == role)
+
+        if prefix:
+            # a range rather than LIKE, which SQLite does not serve from
+            # an index by default
+            users = users.filter(User.username >= prefix)
+            if ord(prefix[-1]) < sys.maxunicode:
+                users = users.filter(
+                    User.username < prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                )
+
+        if after is not None:
+            users = users.filter(User.username > after)
+
+        users = users.order_by(User.username).limit(limit).all()
         self.logger.info('get_all users method execution result: %s', users)
         return users
 
@@ -64,6 +96,7 @@ class UserDAO:
         )
         return user
 
+    @group_committed
     def create(self, user_data):
         """
         Create a new user in the User table.
@@ -81,33 +114,85 @@ class UserDAO:
         self.logger.info('create user method execution result: %s', user)
         return user
 
-    def delete(self, uid):
+    @group_committed
+    def update_password(self, uid, password):
+        """
+        Replace the password hash of a user.
+
+        :param uid: The ID of the user to update.
+        :param password: The new password hash.
+        """
+        self.session.query(User).filter(
+            User.id == uid
+        ).update({"password": password, "version": User.version + 1})
+        self.session.commit()
+
+        self.logger.info(f"User with id {uid} password hash has been updated.")
+
+    @group_committed
+    def delete(self, uid, versions=None):
         """
         Delete a user from the User table by their ID.
 
         :param uid: The ID of the user to delete.
+        :param versions: An optional list of the versions the user is
+            expected to be at; aborts with 412 if it is at none of them.
         """
         user = self.get_one(uid)
+        self._check_version(user, versions)
         self.session.delete(user)
-        self.session.commit()
+        self._commit_versioned(uid)
 
         self.logger.info(f"User with id {uid} has been deleted.")
 
-    def update(self, uid, user_data):
+    @group_committed
+    def update(self, uid, user_data, versions=None):
         """
         Update an existing user in the User table.
 
         :param uid: The ID of the user to update.
         :param user_data: A dictionary containing the new user data.
+        :param versions: An optional list of the versions the user is
+            expected to be at; aborts with 412 if it is at none of them.
         """
         user = self.get_one(uid)
+        self._check_version(user, versions)
         user.username = user_data.get("username")
         user.password = user_data.get("password")
 
         self.session.add(user)
-        self.session.commit()
+        self._commit_versioned(uid)
 
         self.logger.info(
             f"User with id {user.id} has been updated with new "
             f"username and password."
         )
+
+    def _check_version(self, user, versions):
+        """
+        Abort with 412 if ``user`` is at none of the expected versions.
+
+        :param user: A User object.
+        :param versions: The expected versions, or None to skip the check.
+        """
+        if versions is not None and user.version not in versions:
+            self.logger.error(f"User with id {user.id} version mismatch")
+            abort(
+                412, f"User with id {user.id} is not at the expected version"
+            )
+
+    def _commit_versioned(self, uid):
+        """
+        Commit a change to a user, aborting with 412 if the row was
+        modified since it was read.
+
+        :param uid: The ID of the changed user.
+        """
+        try:
+            self.session.commit()
+        except StaleDataError as err:
+            self.session.rollback()
+            self.logger.error(
+                f"User with id {uid} modified concurrently. Error: {err}"
+            )
+            abort(412, f"User with id {uid} has been modified concurrently")
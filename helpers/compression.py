@@ -0,0 +1,147 @@
+"""HTTP response compression module"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _gzip(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _deflate(data, level):
+    return zlib.compress(data, level)
+
+
+def _brotli(data, level):
+    # brotli qualities go from 0 to 11, map the 1-9 level onto them
+    return brotli.compress(data, quality=min(11, level + 2))
+
+
+# supported content codings, in order of preference
+CODINGS = OrderedDict([('br', _brotli), ('gzip', _gzip), ('deflate', _deflate)])
+if brotli is None:
+    del CODINGS['br']
+
+
+class CompressedCache:
+    """
+    Bounded LRU cache of compressed bodies keyed by content coding and
+    a digest of the uncompressed body, so identical list responses are
+    compressed only once.
+
+    :param max_bytes: The total size of compressed bodies kept.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Constructor method.
+
+        :param max_bytes: The total size of compressed bodies kept.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_compress(self, coding, data, level):
+        """
+        Return the compressed ``data``, compressing it on a cache miss.
+
+        :param coding: The content coding, a key of ``CODINGS``.
+        :param data:   The uncompressed body.
+        :param level:  The compression level.
+
+        :return:       The compressed body.
+        """
+        key = (coding, level, hashlib.blake2b(data, digest_size=16).digest())
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = CODINGS[coding](data, level)
+        if len(compressed) > self.max_bytes:
+            return compressed
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return compressed
+
+    def stats(self):
+        """
+        Return the counters of the cache.
+
+        :return: A dictionary with hits, misses, entries and bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.size
+            }
+
+
+def register_compression(application: Flask) -> None:
+    """
+    Compress the responses of the application according to the
+    Accept-Encoding header of the request, when enabled with
+    ``COMPRESS_RESPONSES``.
+
+    Only successful responses of a ``COMPRESS_MIMETYPES`` type and at
+    least ``COMPRESS_MIN_SIZE`` bytes long are compressed.
+
+    :param application: The Flask application.
+    """
+    config = application.config
+    if not config.get('COMPRESS_RESPONSES'):
+        return
+
+    min_size = config.get('COMPRESS_MIN_SIZE', 1024)
+    level = config.get('COMPRESS_LEVEL', 6)
+    mimetypes = set(config.get('COMPRESS_MIMETYPES', ['application/json']))
+    cache = CompressedCache(config.get('COMPRESS_CACHE_BYTES', 8 * 2 ** 20))
+    application.extensions['compression'] = cache
+
+    @application.after_request
+    def compress_response(response):
+        if (
+                response.direct_passthrough
+                or response.is_streamed
+                or not 200 <= response.status_code < 300
+                or response.mimetype not in mimetypes
+                or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        coding = request.accept_encodings.best_match(CODINGS)
+        if coding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(cache.get_or_compress(coding, data, level))
+        response.headers['Content-Encoding'] = coding
+        return response
@@ -2,18 +2,117 @@
 import os
 from pathlib import Path
 
-# jwt secret and algorithm
+# jwt secret and algorithm; asymmetric algorithms (EdDSA, ES256...) read
+# PEM keys from the paths below and need the 'cryptography' package;
+# without a public key path, the public key is derived from the private key
 JWT_SECRET = '$CekpeTHo$'
 JWT_ALGORITHM = 'HS256'
+JWT_PRIVATE_KEY_PATH = None
+JWT_PUBLIC_KEY_PATH = None
 
-# hashing parameters
+# access and refresh token lifetimes in seconds
+ACCESS_TOKEN_LIFETIME = 30 * 60
+REFRESH_TOKEN_LIFETIME = 130 * 24 * 60 * 60
+# refresh tokens are approved from their claims for this many seconds
+# after their user was last checked in the database, then the user is
+# looked up again; this bounds how long a revocation made by another
+# process goes unnoticed
+REFRESH_RECHECK_AFTER = 5 * 60
+
+# scopes granted to every role, see helpers/permissions.py; a role also
+# gets the scopes of the role it inherits from
+ROLE_SCOPES = {
+    'user': {
+        'scopes': [
+            'movies:read', 'genres:read', 'directors:read', 'changes:read'
+        ]
+    },
+    'editor': {
+        'inherits': 'user',
+        'scopes': ['movies:write', 'genres:write', 'directors:write']
+    },
+    'admin': {'scopes': ['*']},
+}
+
+# hashing parameters; the global salt only verifies legacy hashes, new
+# hashes get a random salt per user. The algorithm ('pbkdf2-sha256' or
+# 'scrypt') and costs can be tuned with `flask calibrate-password-hashing`
+# and set through the environment
 CRYPTOGRAPHIC_HASH_FUNCTION = 'sha256'
 PWD_HASH_SALT = b'top_secret_salt_and_pepper'
-PWD_HASH_ITERATIONS = 100_000
+LEGACY_PWD_HASH_ITERATIONS = 100_000
+PWD_SALT_BYTES = 16
+PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+PWD_HASH_ITERATIONS = int(os.environ.get('PWD_HASH_ITERATIONS', 100_000))
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
 
 # logging folders
 THIS_FOLDER = Path(__file__).parent.resolve()
 LOG_DIR = os.path.join(THIS_FOLDER, "../logs")
 
+# log rotation: a log file is rotated once it reaches LOG_MAX_BYTES or is
+# LOG_ROTATION_INTERVAL seconds old; rotated files are gzipped in the
+# background and at most LOG_BACKUP_COUNT of them, none older than
+# LOG_RETENTION_DAYS, are kept
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 2 ** 20))
+LOG_ROTATION_INTERVAL = int(
+    os.environ.get('LOG_ROTATION_INTERVAL', 24 * 60 * 60)
+)
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 14))
+LOG_RETENTION_DAYS = int(os.environ.get('LOG_RETENTION_DAYS', 30))
+LOG_COMPRESS = os.environ.get('LOG_COMPRESS', '1') == '1'
+
+# maximum number of ids accepted by a single multi-get request
+MAX_BATCH_IDS = 100
+
+# login rate limiting: bucket capacity and refill rate (tokens per second)
+# per username and per client IP; storage is 'memory' (per worker) or
+# 'sqlite' (shared by every worker on the host)
+LOGIN_RATE_LIMIT_STORAGE = 'memory'
+LOGIN_RATE_LIMIT_DB_PATH = os.path.join(THIS_FOLDER, "../instance/rate_limits.db")
+LOGIN_USERNAME_CAPACITY = 5
+LOGIN_USERNAME_REFILL_RATE = 5 / 60
+LOGIN_IP_CAPACITY = 20
+LOGIN_IP_REFILL_RATE = 20 / 60
+
+# maximum number of changed rows returned by one /changes/ request
+MAX_CHANGES_PAGE_SIZE = 1000
+
+# similar movies index: location of the memory-mapped TF-IDF matrix, score
+# weights, year difference at which the year proximity drops to 1/e,
+# vocabulary size, fraction of incrementally updated rows triggering a
+# full rebuild and number of seconds between two reads of the change log
+SIMILARITY_INDEX_DIR = os.path.join(THIS_FOLDER, "../instance/similarity")
+SIMILARITY_WEIGHTS = {
+    'description': 1.0, 'genre': 0.5, 'director': 0.3, 'year': 0.2
+}
+SIMILARITY_YEAR_SCALE = 10
+SIMILARITY_MAX_FEATURES = 4096
+SIMILARITY_REBUILD_RATIO = 0.1
+SIMILARITY_REFRESH_INTERVAL = 1.0
+# maximum number of movies returned by /movies/<mid>/similar
+MAX_SIMILAR_MOVIES = 50
+
+# what happens to the movies of a deleted genre or director: 'set-null'
+# clears their reference, 'cascade' deletes them
+GENRE_ON_DELETE = os.environ.get('GENRE_ON_DELETE', 'set-null')
+DIRECTOR_ON_DELETE = os.environ.get('DIRECTOR_ON_DELETE', 'set-null')
+
+# maximum number of users returned by one /users/ request
+MAX_USERS_PAGE_SIZE = 100
+
+# users looked up by username, on every login and refresh, are cached up
+# to USER_CACHE_SIZE entries, each for at most USER_CACHE_TTL seconds:
+# the bound on how long another worker process may see a changed user
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+
+# number of rows processed per transaction by the background jobs
+JOB_CHUNK_SIZE = 500
+# maximum number of jobs returned by /jobs/
+MAX_JOBS_PAGE_SIZE = 100
+
 # SQLite db engine and location
 SQLITE_DB_NAME = 'sqlite:///movies.db'
@@ -0,0 +1,38 @@
+"""
+Foreign keys module
+
+SQLite ignores the FOREIGN KEY clauses of the tables unless every
+connection enables them: without it, deleting a genre or a director left
+movies pointing at a missing row.
+"""
+from flask import Flask
+from sqlalchemy import event
+
+from setup_db import db
+
+
+def enable_foreign_keys(dbapi_connection, connection_record):
+    """
+    A connect listener enabling the foreign key constraints of a new
+    SQLite connection.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys = ON')
+    cursor.close()
+
+
+def register_foreign_keys(application: Flask) -> None:
+    """
+    Enforce the foreign keys on every connection of the SQLite engines of
+    the application when ``SQLITE_FOREIGN_KEYS`` is set. Must run before
+    the first connection is opened.
+
+    :param application: The Flask application.
+    """
+    if not application.config.get('SQLITE_FOREIGN_KEYS', True):
+        return
+
+    with application.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', enable_foreign_keys)
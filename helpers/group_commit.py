@@ -0,0 +1,245 @@
+"""
+Group commit module
+
+Every DAO write commits on its own, so every write request pays for a
+full SQLite transaction commit and its fsync. In group commit mode the
+writes of concurrent requests are run by a single committer thread inside
+one shared transaction: each write gets its own SAVEPOINT, so a failing
+write only rolls back itself, and the requests are answered once the
+commit covering their write succeeded.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial, wraps
+
+from flask import Flask, current_app
+from sqlalchemy.orm import Session
+
+from helpers.request_context import request_context
+from setup_db import db
+
+
+class GroupCommitter:
+    """
+    Batches the writes submitted within ``window`` seconds of each other
+    into a single transaction.
+
+    :param application: The Flask application whose database is written.
+    :param window:      How long the first write of a batch waits for
+        others, in seconds; this is the latency added to every write.
+    :param max_batch:   The maximum number of writes in one transaction.
+    """
+
+    def __init__(self, application, window, max_batch):
+        """
+        Constructor method.
+
+        :param application: The Flask application whose database is
+            written.
+        :param window:      How long the first write of a batch waits for
+            others, in seconds.
+        :param max_batch:   The maximum number of writes in one
+            transaction.
+        """
+        self.application = application
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self.failed_commits = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, write):
+        """
+        Run ``write`` on the committer thread and wait for the commit of
+        its batch.
+
+        :param write: A callable doing the write through ``db.session``
+            and committing it; it runs in the request context of the
+            caller.
+
+        :return:      The return value of ``write``.
+
+        :raises Exception: The exception raised by ``write``, or by the
+            commit of its batch.
+        """
+        future = Future()
+        self._start()
+        self._queue.put((write, future, request_context.get()))
+        return future.result()
+
+    def in_committer(self):
+        """
+        Check whether the current thread is the committer thread.
+        """
+        return threading.current_thread() is self._thread
+
+    def stats(self):
+        """
+        Return the counters of the committer.
+
+        :return: A dictionary with the number of batches and writes, the
+            mean, last and maximum batch sizes and the failed commits.
+        """
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "mean_batch_size": (
+                    round(self.writes / self.batches, 2)
+                    if self.batches else 0
+                ),
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "failed_commits": self.failed_commits,
+                "window_ms": self.window * 1000
+            }
+
+    def _start(self):
+        """
+        Start the committer thread, or restart it in a forked worker.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='group-commit', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        """
+        Committer thread loop: collect a batch and commit it.
+        """
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """
+        Run the writes of ``batch`` in one transaction, commit it and
+        resolve the futures of the writes.
+
+        :param batch: A list of (write, future, request context) tuples.
+        """
+        try:
+            with self.application.app_context(), \
+                    db.engine.connect() as connection:
+                outcomes = self._run_batch(connection, batch)
+        except Exception as err:
+            with self._lock:
+                self.failed_commits += 1
+            for _, future, _ in batch:
+                future.set_exception(err)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.writes += len(batch)
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+
+        for (_, future, _), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _run_batch(connection, batch):
+        """
+        Run every write of ``batch`` in a SAVEPOINT of the transaction of
+        ``connection``, then commit the transaction.
+
+        :param connection: An SQLAlchemy Connection.
+        :param batch:      A list of (write, future, request context)
+            tuples.
+
+        :return:           A list of (result, exception) tuples, in the
+            order of ``batch``.
+        """
+        driver_connection = connection.connection.driver_connection
+        isolation_level = driver_connection.isolation_level
+        if connection.dialect.driver == 'pysqlite':
+            # pysqlite begins transactions lazily, on the first DML
+            # statement, which would make the first SAVEPOINT start the
+            # transaction and its RELEASE commit it: begin explicitly
+            driver_connection.isolation_level = None
+            connection.exec_driver_sql('BEGIN')
+
+        try:
+            outcomes = []
+            for write, _, context in batch:
+                # the DAOs commit and roll back only their SAVEPOINT
+                session = Session(
+                    bind=connection,
+                    join_transaction_mode='create_savepoint',
+                    expire_on_commit=False
+                )
+                db.session.registry.set(session)
+                token = request_context.set(context)
+                try:
+                    outcomes.append((write(), None))
+                except Exception as err:
+                    session.rollback()
+                    outcomes.append((None, err))
+                finally:
+                    request_context.reset(token)
+                    db.session.remove()
+            connection.commit()
+        finally:
+            if connection.dialect.driver == 'pysqlite':
+                driver_connection.isolation_level = isolation_level
+        return outcomes
+
+
+def group_committed(method):
+    """
+    A decorator for DAO write methods, running them on the group
+    committer of the application when group commit is enabled.
+
+    :param method: - the DAO method to be decorated
+    :return:       - the decorated method
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        committer = current_app.extensions.get('group_commit')
+        if committer is None or committer.in_committer():
+            return method(self, *args, **kwargs)
+        return committer.submit(partial(method, self, *args, **kwargs))
+
+    return wrapper
+
+
+def register_group_commit(application: Flask) -> None:
+    """
+    Enable group commit of the DAO writes of the application when
+    ``GROUP_COMMIT`` is set, batching the writes arriving within
+    ``GROUP_COMMIT_WINDOW_MS`` of each other, up to
+    ``GROUP_COMMIT_MAX_BATCH`` writes per transaction.
+
+    :param application: The Flask application.
+    """
+    config = application.config
+    if not config.get('GROUP_COMMIT'):
+        return
+
+    application.extensions['group_commit'] = GroupCommitter(
+        application,
+        config.get('GROUP_COMMIT_WINDOW_MS', 5) / 1000,
+        config.get('GROUP_COMMIT_MAX_BATCH', 64)
+    )
@@ -1,26 +1,385 @@
-"""Implementation module"""
-
-from dao.directors import DirectorDAO
-from dao.genres import GenreDAO
-from dao.movies import MovieDAO
-from dao.users import UserDAO
-from service.auth import AuthService
-from service.directors import DirectorService
-from service.genres import GenreService
-from service.movies import MovieService
-from service.users import UserService
+"""
+Implementation module
+
+DAOs and services are built lazily: every name below is a proxy that
+constructs its object (and imports its module) on first use, so importing
+the views does not pay for the whole service graph. Every object is built
+once per process, even when the first requests need it concurrently.
+"""
+import threading
+from functools import wraps
+
+from werkzeug.local import LocalProxy
+
+from helpers.constants import ACCESS_TOKEN_LIFETIME, DIRECTOR_ON_DELETE, \
+    GENRE_ON_DELETE, JOB_CHUNK_SIZE, JWT_ALGORITHM, JWT_PRIVATE_KEY_PATH, \
+    JWT_PUBLIC_KEY_PATH, JWT_SECRET, LOGIN_IP_CAPACITY, LOGIN_IP_REFILL_RATE, \
+    LOGIN_RATE_LIMIT_DB_PATH, LOGIN_RATE_LIMIT_STORAGE, \
+    LOGIN_USERNAME_CAPACITY, LOGIN_USERNAME_REFILL_RATE, \
+    REFRESH_RECHECK_AFTER, REFRESH_TOKEN_LIFETIME, SIMILARITY_INDEX_DIR, \
+    SIMILARITY_MAX_FEATURES, SIMILARITY_REBUILD_RATIO, \
+    SIMILARITY_REFRESH_INTERVAL, SIMILARITY_WEIGHTS, SIMILARITY_YEAR_SCALE, \
+    USER_CACHE_SIZE, USER_CACHE_TTL
 from setup_db import db
 
-directors_dao = DirectorDAO(db.session)
-directors_service = DirectorService(directors_dao)
+# builders call each other, hence a reentrant lock
+_build_lock = threading.RLock()
+
+
+def built_once(builder):
+    """
+    A decorator making a builder build its object once: concurrent first
+    calls wait for the object under a lock instead of building their own
+    copy, so that every service shares the same dependencies.
+
+    :param builder: A function building an object.
+
+    :return: The memoized builder.
+    """
+    built = []
+
+    @wraps(builder)
+    def wrapper():
+        if not built:
+            with _build_lock:
+                if not built:
+                    built.append(builder())
+        return built[0]
+
+    return wrapper
+
+
+@built_once
+def build_directors_dao():
+    """
+    Build the DirectorDAO, releasing movies per DIRECTOR_ON_DELETE.
+
+    :return: The DirectorDAO object.
+    """
+    from dao.directors import DirectorDAO
+    return DirectorDAO(db.session, DIRECTOR_ON_DELETE)
+
+
+@built_once
+def build_directors_service():
+    """
+    Build the DirectorService.
+
+    :return: The DirectorService object.
+    """
+    from service.directors import DirectorService
+    return DirectorService(build_directors_dao())
+
+
+@built_once
+def build_genres_dao():
+    """
+    Build the GenreDAO, releasing movies per GENRE_ON_DELETE.
+
+    :return: The GenreDAO object.
+    """
+    from dao.genres import GenreDAO
+    return GenreDAO(db.session, GENRE_ON_DELETE)
+
+
+@built_once
+def build_genres_service():
+    """
+    Build the GenreService.
+
+    :return: The GenreService object.
+    """
+    from service.genres import GenreService
+    return GenreService(build_genres_dao())
+
+
+@built_once
+def build_movies_dao():
+    """
+    Build the MovieDAO.
+
+    :return: The MovieDAO object.
+    """
+    from dao.movies import MovieDAO
+    return MovieDAO(db.session)
+
+
+@built_once
+def build_movies_service():
+    """
+    Build the MovieService.
+
+    :return: The MovieService object.
+    """
+    from service.movies import MovieService
+    return MovieService(build_movies_dao())
+
+
+@built_once
+def build_changes_dao():
+    """
+    Build the ChangeDAO.
+
+    :return: The ChangeDAO object.
+    """
+    from dao.changes import ChangeDAO
+    return ChangeDAO(db.session)
+
+
+@built_once
+def build_changes_service():
+    """
+    Build the ChangeService, reading the changed rows with the DAO
+        of every table.
+
+    :return: The ChangeService object.
+    """
+    from service.changes import ChangeService
+    return ChangeService(build_changes_dao(), {
+        'movie': build_movies_dao(),
+        'genre': build_genres_dao(),
+        'director': build_directors_dao(),
+    })
+
+
+@built_once
+def build_similarity_index():
+    """
+    Build the SimilarityIndex stored in SIMILARITY_INDEX_DIR.
+
+    :return: The SimilarityIndex object.
+    """
+    from helpers.similarity import SimilarityIndex
+    return SimilarityIndex(
+        SIMILARITY_INDEX_DIR, SIMILARITY_WEIGHTS, SIMILARITY_YEAR_SCALE,
+        SIMILARITY_MAX_FEATURES, SIMILARITY_REBUILD_RATIO
+    )
+
+
+@built_once
+def build_similarity_service():
+    """
+    Build the SimilarityService.
+
+    :return: The SimilarityService object.
+    """
+    from service.similarity import SimilarityService
+    return SimilarityService(
+        build_movies_dao(), build_changes_dao(), build_similarity_index(),
+        SIMILARITY_REFRESH_INTERVAL
+    )
+
+
+@built_once
+def build_listing_dao():
+    """
+    Build the MovieListingDAO.
+
+    :return: The MovieListingDAO object.
+    """
+    from dao.movie_listing import MovieListingDAO
+    return MovieListingDAO(db.session)
+
+
+@built_once
+def build_jobs_dao():
+    """
+    Build the JobDAO.
+
+    :return: The JobDAO object.
+    """
+    from dao.jobs import JobDAO
+    return JobDAO(db.session)
+
+
+@built_once
+def build_jobs_service():
+    """
+    Build the JobService running the background jobs.
+
+    :return: The JobService object.
+    """
+    from service.jobs import JobService
+    return JobService(
+        build_jobs_dao(), build_movies_dao(), build_directors_dao(),
+        build_listing_dao(), build_similarity_service(), JOB_CHUNK_SIZE
+    )
+
+
+@built_once
+def build_revocation_list():
+    """
+    Build the RevocationList shared by the user and auth services.
+
+    :return: The RevocationList object.
+    """
+    from helpers.revocation import RevocationList
+    return RevocationList(REFRESH_RECHECK_AFTER)
+
+
+@built_once
+def build_user_dao():
+    """
+    Build the UserDAO.
+
+    :return: The UserDAO object.
+    """
+    from dao.users import UserDAO
+    return UserDAO(db.session)
+
+
+@built_once
+def build_password_hasher():
+    """
+    Build the PasswordHasher of the configured algorithm.
+
+    :return: The PasswordHasher object.
+    """
+    from helpers.passwords import PasswordHasher, create_hasher
+    return PasswordHasher(create_hasher())
+
+
+@built_once
+def build_user_service():
+    """
+    Build the UserService with its username cache.
+
+    :return: The UserService object.
+    """
+    from service.users import UserService
+    from helpers.ttl_cache import TTLCache
+    return UserService(
+        build_user_dao(), build_password_hasher(), build_revocation_list(),
+        TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+    )
+
+
+@built_once
+def build_rate_limit_storage():
+    """
+    Build the bucket storage selected by
+        LOGIN_RATE_LIMIT_STORAGE.
+
+    :return: The MemoryBucketStorage or SQLiteBucketStorage object.
+    """
+    from helpers.rate_limit import MemoryBucketStorage, SQLiteBucketStorage
+    if LOGIN_RATE_LIMIT_STORAGE == 'sqlite':
+        return SQLiteBucketStorage(LOGIN_RATE_LIMIT_DB_PATH)
+    return MemoryBucketStorage()
+
+
+@built_once
+def build_login_throttle():
+    """
+    Build the LoginThrottle limiting logins per username and IP.
+
+    :return: The LoginThrottle object.
+    """
+    from helpers.rate_limit import LoginThrottle, TokenBucketLimiter
+    return LoginThrottle(
+        TokenBucketLimiter(
+            build_rate_limit_storage(), LOGIN_USERNAME_CAPACITY,
+            LOGIN_USERNAME_REFILL_RATE, prefix='username:'
+        ),
+        TokenBucketLimiter(
+            build_rate_limit_storage(), LOGIN_IP_CAPACITY,
+            LOGIN_IP_REFILL_RATE, prefix='ip:'
+        )
+    )
+
+
+@built_once
+def build_token_issuer():
+    """
+    Build the TokenIssuer of the configured algorithm and keys.
+
+    :return: The TokenIssuer object.
+    """
+    from helpers.tokens import TokenIssuer, load_key
+    if JWT_ALGORITHM.startswith('HS'):
+        return TokenIssuer(
+            JWT_ALGORITHM, JWT_SECRET,
+            access_lifetime=ACCESS_TOKEN_LIFETIME,
+            refresh_lifetime=REFRESH_TOKEN_LIFETIME
+        )
+    return TokenIssuer(
+        JWT_ALGORITHM,
+        load_key(JWT_PRIVATE_KEY_PATH) if JWT_PRIVATE_KEY_PATH else None,
+        # derived from the private key when unset
+        load_key(JWT_PUBLIC_KEY_PATH) if JWT_PUBLIC_KEY_PATH else None,
+        access_lifetime=ACCESS_TOKEN_LIFETIME,
+        refresh_lifetime=REFRESH_TOKEN_LIFETIME
+    )
+
+
+@built_once
+def build_auth_service():
+    """
+    Build the AuthService.
+
+    :return: The AuthService object.
+    """
+    from service.auth import AuthService
+    return AuthService(
+        build_user_service(), build_token_issuer(),
+        build_login_throttle(), build_revocation_list(),
+        REFRESH_RECHECK_AFTER
+    )
+
+
+# every builder by the name of the object it builds
+BUILDERS = {
+    'directors_dao': build_directors_dao,
+    'directors_service': build_directors_service,
+    'genres_dao': build_genres_dao,
+    'genres_service': build_genres_service,
+    'movies_dao': build_movies_dao,
+    'movies_service': build_movies_service,
+    'changes_dao': build_changes_dao,
+    'changes_service': build_changes_service,
+    'similarity_index': build_similarity_index,
+    'similarity_service': build_similarity_service,
+    'listing_dao': build_listing_dao,
+    'jobs_dao': build_jobs_dao,
+    'jobs_service': build_jobs_service,
+    'revocation_list': build_revocation_list,
+    'user_dao': build_user_dao,
+    'password_hasher': build_password_hasher,
+    'user_service': build_user_service,
+    'rate_limit_storage': build_rate_limit_storage,
+    'login_throttle': build_login_throttle,
+    'token_issuer': build_token_issuer,
+    'auth_service': build_auth_service,
+}
+
+directors_dao = LocalProxy(build_directors_dao)
+directors_service = LocalProxy(build_directors_service)
+
+genres_dao = LocalProxy(build_genres_dao)
+genres_service = LocalProxy(build_genres_service)
+
+movies_dao = LocalProxy(build_movies_dao)
+movies_service = LocalProxy(build_movies_service)
+
+changes_dao = LocalProxy(build_changes_dao)
+changes_service = LocalProxy(build_changes_service)
+
+similarity_index = LocalProxy(build_similarity_index)
+similarity_service = LocalProxy(build_similarity_service)
+
+listing_dao = LocalProxy(build_listing_dao)
+jobs_dao = LocalProxy(build_jobs_dao)
+jobs_service = LocalProxy(build_jobs_service)
+
+revocation_list = LocalProxy(build_revocation_list)
 
-genres_dao = GenreDAO(db.session)
-genres_service = GenreService(genres_dao)
+user_dao = LocalProxy(build_user_dao)
+password_hasher = LocalProxy(build_password_hasher)
+user_service = LocalProxy(build_user_service)
 
-movies_dao = MovieDAO(db.session)
-movies_service = MovieService(movies_dao)
+rate_limit_storage = LocalProxy(build_rate_limit_storage)
+login_throttle = LocalProxy(build_login_throttle)
 
-user_dao = UserDAO(db.session)
-user_service = UserService(user_dao)
+token_issuer = LocalProxy(build_token_issuer)
 
-auth_service = AuthService(user_service)
+auth_service = LocalProxy(build_auth_service)
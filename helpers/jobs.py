@@ -0,0 +1,225 @@
+"""
+Background job runner module
+
+Expensive admin operations, like deleting a director with thousands of
+movies, are queued as rows of the job table and run by worker threads
+outside of the requests. The job handlers commit their work in chunks and
+report their progress between two chunks, when the runner pauses for
+``JOB_CHUNK_PAUSE_MS`` so that the requests waiting for the SQLite write
+lock get it, and stops the jobs whose cancellation was requested.
+
+The queue is shared by every process using the database: jobs are claimed
+atomically, and the jobs of a worker that stopped reporting for
+``JOB_STALE_AFTER`` seconds are requeued.
+"""
+import os
+import socket
+import threading
+import time
+
+from flask import Flask
+
+from dao.model.job import JOB_CANCELLED, JOB_CANCELLING, JOB_FAILED, \
+    JOB_SUCCEEDED
+from log_handler import services_logger
+from setup_db import db
+
+
+def _error_message(err):
+    """
+    The message of the error that failed a job: the message given to
+    ``flask_restx.abort``, which keeps it in the data of the error, or the
+    description of other HTTP errors.
+    """
+    data = getattr(err, 'data', None)
+    if isinstance(data, dict) and data.get('message'):
+        return str(data['message'])
+    return getattr(err, 'description', None) or str(err) \
+        or type(err).__name__
+
+
+class JobCancelled(Exception):
+    """
+    Raised by JobContext.report when the cancellation of the job was
+    requested.
+    """
+
+
+class JobContext:
+    """
+    Progress reporting of a running job.
+
+    :param jobs_dao: The JobDAO saving the progress.
+    :param jid: The ID of the job.
+    :param pause: The pause after every report, in seconds.
+    """
+
+    def __init__(self, jobs_dao, jid, pause):
+        """
+        Constructor method.
+
+        :param jobs_dao: The JobDAO saving the progress.
+        :param jid: The ID of the job.
+        :param pause: The pause after every report, in seconds.
+        """
+        self.jobs_dao = jobs_dao
+        self.jid = jid
+        self.pause = pause
+
+    def report(self, progress, total=None):
+        """
+        Save the progress of the job between two chunks, then yield the
+        database to the other connections for a moment.
+
+        :param progress: The number of items processed so far.
+        :param total: The total number of items, when known.
+
+        :raises JobCancelled: When the cancellation of the job was
+            requested.
+        """
+        if self.jobs_dao.report(self.jid, progress, total) == JOB_CANCELLING:
+            raise JobCancelled()
+        if self.pause:
+            time.sleep(self.pause)
+
+
+class JobRunner:
+    """
+    Worker threads running the queued jobs. The threads are started on
+    the first request of the process, so pre-fork servers start them in
+    every worker rather than in the master.
+
+    :param application: The Flask application whose jobs are run.
+    :param workers: The number of worker threads.
+    :param poll_interval: How often idle workers look for new jobs, in
+        seconds.
+    :param pause: The pause between two chunks of a job, in seconds.
+    :param stale_after: The heartbeat age, in seconds, after which the job
+        of a worker is requeued.
+    """
+
+    def __init__(self, application, workers, poll_interval, pause,
+                 stale_after):
+        """
+        Constructor method.
+
+        :param application: The Flask application whose jobs are run.
+        :param workers: The number of worker threads.
+        :param poll_interval: How often idle workers look for new jobs, in
+            seconds.
+        :param pause: The pause between two chunks of a job, in seconds.
+        :param stale_after: The heartbeat age, in seconds, after which the
+            job of a worker is requeued.
+        """
+        self.application = application
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.pause = pause
+        self.stale_after = stale_after
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+    def start(self):
+        """
+        Start the worker threads, or restart them in a forked process.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(
+                    target=self.run, name=f'job-worker-{number}', daemon=True
+                )
+                for number in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def wake(self):
+        """
+        Make the idle workers look for new jobs now.
+        """
+        self._wakeup.set()
+
+    def run(self, stop=None):
+        """
+        Worker loop: claim the oldest pending job and run it.
+
+        :param stop: An optional threading.Event ending the loop.
+        """
+        from helpers.implemented import jobs_dao, jobs_service
+
+        worker = (
+            f'{socket.gethostname()}:{os.getpid()}:'
+            f'{threading.current_thread().name}'
+        )
+        with self.application.app_context():
+            job = None
+            while stop is None or not stop.is_set():
+                try:
+                    if job is None:
+                        jobs_dao.requeue_stale(self.stale_after)
+                    job = jobs_dao.claim(worker)
+                    if job is not None:
+                        self._execute(jobs_service, jobs_dao, job)
+                except Exception as err:
+                    # e.g. the database is locked: retry on the next poll;
+                    # a job left running is requeued once stale
+                    db.session.rollback()
+                    services_logger.exception(
+                        'Job worker %s failed: %s', worker, err
+                    )
+                    job = None
+                finally:
+                    db.session.remove()
+                if job is None:
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+
+    def _execute(self, jobs_service, jobs_dao, job):
+        """
+        Run a claimed job and record its outcome.
+        """
+        context = JobContext(jobs_dao, job.id, self.pause)
+        try:
+            jobs_service.run(job, context)
+        except JobCancelled:
+            db.session.rollback()
+            jobs_dao.finish(job.id, JOB_CANCELLED)
+        except Exception as err:
+            db.session.rollback()
+            services_logger.exception('Job %d failed', job.id)
+            jobs_dao.finish(job.id, JOB_FAILED, _error_message(err))
+        else:
+            jobs_dao.finish(job.id, JOB_SUCCEEDED)
+
+
+def register_job_runner(application: Flask) -> None:
+    """
+    Run the background jobs of the application in ``JOB_WORKERS`` threads
+    of every process serving requests; with 0 workers, the jobs are only
+    run by ``flask run-jobs`` processes. Workers look for new jobs every
+    ``JOB_POLL_INTERVAL_MS``, pause ``JOB_CHUNK_PAUSE_MS`` between two
+    chunks and requeue the jobs of workers silent for ``JOB_STALE_AFTER``
+    seconds.
+
+    :param application: The Flask application.
+    """
+    config = application.config
+    runner = JobRunner(
+        application,
+        config.get('JOB_WORKERS', 1),
+        config.get('JOB_POLL_INTERVAL_MS', 500) / 1000,
+        config.get('JOB_CHUNK_PAUSE_MS', 50) / 1000,
+        config.get('JOB_STALE_AFTER', 60)
+    )
+    application.extensions['job_runner'] = runner
+    if not runner.workers:
+        return
+
+    @application.before_request
+    def start_job_runner():
+        runner.start()
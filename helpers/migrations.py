@@ -0,0 +1,66 @@
+"""
+Database migrations module
+
+movies.db predates some of the tables and columns used by the application;
+they are created on startup when missing, and the derived tables filled.
+"""
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from setup_db import db
+
+# columns added to the models after their table was created, by table name
+ADDED_COLUMNS = {
+    'movie': {'version': 'INTEGER NOT NULL DEFAULT 1'},
+    'genre': {'version': 'INTEGER NOT NULL DEFAULT 1'},
+    'director': {'version': 'INTEGER NOT NULL DEFAULT 1'},
+    'user': {'version': 'INTEGER NOT NULL DEFAULT 1'},
+}
+
+
+def upgrade_database(application: Flask) -> None:
+    """
+    Bring the database of the application up to date with the models.
+
+    :param application: The Flask application.
+    """
+    # import every model so that its table is known to create_all
+    from dao.model import change, director, genre, job, movie, \
+        movie_listing, user  # noqa: F401
+    from dao.movie_listing import MovieListingDAO
+
+    with application.app_context():
+        existing = set(inspect(db.engine).get_table_names())
+        db.create_all()
+        add_missing_columns()
+        add_missing_indexes()
+        if 'movie_listing' not in existing:
+            # fill the denormalized listing of the existing movies
+            MovieListingDAO(db.session).rebuild()
+
+
+def add_missing_columns() -> None:
+    """
+    Add the columns of ``ADDED_COLUMNS`` missing from the existing tables.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {
+                column['name'] for column in inspector.get_columns(table)
+            }
+            for name, definition in columns.items():
+                if name not in existing:
+                    connection.execute(text(
+                        f'ALTER TABLE "{table}" ADD COLUMN {name} {definition}'
+                    ))
+
+
+def add_missing_indexes() -> None:
+    """
+    Create the indexes of the models missing from the existing tables.
+    """
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
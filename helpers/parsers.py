@@ -0,0 +1,57 @@
+"""Request parameters parsers module"""
+from flask import abort, request
+
+from helpers.constants import MAX_BATCH_IDS
+
+
+def parse_ids(raw_ids, limit=MAX_BATCH_IDS):
+    """
+    Parse a comma separated list of ids from a query string value.
+
+    Duplicates are dropped while the order of the first occurrence of
+    every id is kept, so the response can follow the request order.
+
+    :param raw_ids: A string like "1,2,3".
+    :param limit:   The maximum number of ids allowed in one request.
+
+    :return:        A list of unique integer ids in request order.
+    """
+    ids = []
+    seen = set()
+    for raw_id in raw_ids.split(','):
+        raw_id = raw_id.strip()
+        if not raw_id:
+            continue
+        if not raw_id.isdecimal():
+            abort(400, "ids must be a comma separated list of digital values")
+        if int(raw_id) not in seen:
+            seen.add(int(raw_id))
+            ids.append(int(raw_id))
+
+    if not ids:
+        abort(400, "ids must contain at least one id")
+
+    if len(ids) > limit:
+        abort(400, f"ids must contain at most {limit} values")
+
+    return ids
+
+
+def parse_if_match():
+    """
+    Parse the If-Match header of the current request into row versions,
+    as sent back from the ETag header of a previous response.
+
+    Only strong entity tags are compared, so weak tags never match.
+
+    :return: None when the header is missing or "*", otherwise the list
+        of the versions the client expects the resource to be at.
+    """
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+
+    versions = [int(tag) for tag in if_match.as_set() if tag.isdecimal()]
+    if not versions:
+        abort(412, "If-Match does not match the current version")
+    return versions
@@ -0,0 +1,242 @@
+"""Password hashing module"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+from helpers.constants import CRYPTOGRAPHIC_HASH_FUNCTION, \
+    LEGACY_PWD_HASH_ITERATIONS, PASSWORD_HASH_ALGORITHM, \
+    PWD_HASH_ITERATIONS, PWD_HASH_SALT, PWD_SALT_BYTES, SCRYPT_N, \
+    SCRYPT_P, SCRYPT_R
+
+
+class PBKDF2Hasher:
+    """
+    PBKDF2-HMAC-SHA256 key derivation.
+
+    :param iterations: The number of iterations.
+    """
+    name = 'pbkdf2-sha256'
+
+    def __init__(self, iterations):
+        """
+        Constructor method.
+
+        :param iterations: The number of iterations.
+        """
+        self.iterations = iterations
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Build a hasher from the parameters segment of a stored hash,
+        e.g. "i=100000".
+        """
+        values = dict(param.split('=') for param in params.split(','))
+        return cls(int(values['i']))
+
+    @property
+    def params(self):
+        """
+        The parameters segment of the hashes made by this hasher.
+        """
+        return f'i={self.iterations}'
+
+    def derive(self, password, salt):
+        """
+        Derive the hash of ``password`` with ``salt``.
+        """
+        return hashlib.pbkdf2_hmac(
+            CRYPTOGRAPHIC_HASH_FUNCTION, password, salt, self.iterations
+        )
+
+
+class ScryptHasher:
+    """
+    scrypt key derivation, a memory-hard function using about
+    128 * n * r bytes of memory per hash.
+
+    :param n: The CPU/memory cost, a power of 2.
+    :param r: The block size.
+    :param p: The parallelization factor.
+    """
+    name = 'scrypt'
+
+    def __init__(self, n, r, p):
+        """
+        Constructor method.
+
+        :param n: The CPU/memory cost, a power of 2.
+        :param r: The block size.
+        :param p: The parallelization factor.
+        """
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Build a hasher from the parameters segment of a stored hash,
+        e.g. "n=16384,r=8,p=1".
+        """
+        values = dict(param.split('=') for param in params.split(','))
+        return cls(int(values['n']), int(values['r']), int(values['p']))
+
+    @property
+    def params(self):
+        """
+        The parameters segment of the hashes made by this hasher.
+        """
+        return f'n={self.n},r={self.r},p={self.p}'
+
+    def derive(self, password, salt):
+        """
+        Derive the hash of ``password`` with ``salt``.
+        """
+        return hashlib.scrypt(
+            password, salt=salt, n=self.n, r=self.r, p=self.p,
+            maxmem=256 * self.n * self.r, dklen=32
+        )
+
+
+HASHERS = {hasher.name: hasher for hasher in (PBKDF2Hasher, ScryptHasher)}
+
+
+def _b64encode(data):
+    """
+    Encode bytes to unpadded base64 text.
+    """
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(data):
+    """
+    Decode unpadded base64 text.
+    """
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+class PasswordHasher:
+    """
+    Hashes passwords in the versioned format
+    ``$<algorithm>$<params>$<salt>$<hash>`` with a random salt per user.
+
+    Hashes in the legacy format (base64 PBKDF2 digest with the global
+    ``PWD_HASH_SALT``) are still verified and always need a rehash.
+
+    :param hasher: The hasher used for new hashes.
+    """
+
+    def __init__(self, hasher):
+        """
+        Constructor method.
+
+        :param hasher: The hasher used for new hashes.
+        """
+        self.hasher = hasher
+
+    def hash(self, password):
+        """
+        Hash a password with the current hasher and a new random salt.
+
+        :param password: The plain text password.
+
+        :return:         The encoded hash.
+        """
+        salt = os.urandom(PWD_SALT_BYTES)
+        digest = self.hasher.derive(password.encode('utf-8'), salt)
+        return (
+            f'${self.hasher.name}${self.hasher.params}'
+            f'${_b64encode(salt)}${_b64encode(digest)}'
+        )
+
+    def verify(self, encoded, password):
+        """
+        Check a password against a stored hash.
+
+        :param encoded:  The stored hash, versioned or legacy.
+        :param password: The plain text password.
+
+        :return:         True if the password matches, False if it does
+            not or the stored hash is malformed.
+        """
+        if isinstance(encoded, bytes):
+            encoded = encoded.decode()
+
+        try:
+            if not encoded.startswith('$'):
+                return hmac.compare_digest(
+                    base64.b64decode(encoded),
+                    PBKDF2Hasher(LEGACY_PWD_HASH_ITERATIONS).derive(
+                        password.encode('utf-8'), PWD_HASH_SALT
+                    )
+                )
+
+            _, name, params, salt, digest = encoded.split('$')
+            hasher = HASHERS[name].from_params(params)
+            return hmac.compare_digest(
+                _b64decode(digest),
+                hasher.derive(password.encode('utf-8'), _b64decode(salt))
+            )
+        except (KeyError, ValueError):
+            return False
+
+    def needs_rehash(self, encoded):
+        """
+        Check whether a stored hash was made with another algorithm or
+        other parameters than the current hasher, in either direction.
+
+        :param encoded: The stored hash.
+
+        :return:        True if the hash should be replaced.
+        """
+        if isinstance(encoded, bytes):
+            encoded = encoded.decode()
+        return not encoded.startswith(
+            f'${self.hasher.name}${self.hasher.params}$'
+        )
+
+
+def create_hasher(algorithm=PASSWORD_HASH_ALGORITHM):
+    """
+    Build the hasher configured in helpers/constants.py.
+
+    :param algorithm: The name of the algorithm.
+
+    :return:          A PBKDF2Hasher or ScryptHasher object.
+    """
+    if algorithm == ScryptHasher.name:
+        return ScryptHasher(SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return PBKDF2Hasher(PWD_HASH_ITERATIONS)
+
+
+def calibrate(algorithm, target_ms):
+    """
+    Find the cost parameters of ``algorithm`` whose hashing time on this
+    machine is closest to ``target_ms`` without exceeding it much.
+
+    :param algorithm: 'pbkdf2-sha256' or 'scrypt'.
+    :param target_ms: The target hashing time in milliseconds.
+
+    :return:          A tuple of the calibrated hasher and its measured
+        hashing time in milliseconds.
+    """
+    def measure(hasher):
+        start = time.perf_counter()
+        hasher.derive(b'calibration password', os.urandom(PWD_SALT_BYTES))
+        return (time.perf_counter() - start) * 1000
+
+    if algorithm == ScryptHasher.name:
+        hasher = ScryptHasher(2 ** 10, SCRYPT_R, SCRYPT_P)
+        elapsed = measure(hasher)
+        while elapsed * 2 <= target_ms * 1.2:
+            hasher = ScryptHasher(hasher.n * 2, hasher.r, hasher.p)
+            elapsed = measure(hasher)
+        return hasher, elapsed
+
+    sample = PBKDF2Hasher(50_000)
+    iterations = int(sample.iterations * target_ms / measure(sample))
+    hasher = PBKDF2Hasher(max(iterations // 1000 * 1000, 1000))
+    return hasher, measure(hasher)
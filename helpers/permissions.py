@@ -0,0 +1,146 @@
+"""
+Permissions module
+
+The access token of a request is decoded once, into an AuthContext stored
+on ``flask.g``, whatever the number of checks run for the request.
+
+Permissions are scopes named '<namespace>:<action>', e.g. 'movies:write',
+granted to the roles by ``ROLE_SCOPES``; '*' grants every scope and
+'<namespace>:*' every scope of a namespace. The namespaces check 'read'
+for safe methods and 'write' for the others, see ``namespace_scopes``.
+"""
+from functools import cache, wraps
+
+from flask import abort, g, request
+
+from helpers.constants import ROLE_SCOPES
+from helpers.implemented import token_issuer
+from helpers.request_context import request_context
+from log_handler import views_logger
+
+# methods checked against the 'read' scope of a namespace
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+@cache
+def role_scopes(role):
+    """
+    Resolve the scopes of a role, including those of the roles it
+    inherits from.
+
+    :param role: The name of the role, e.g. 'editor'.
+
+    :return: A frozenset of scopes; empty for an unknown role.
+    """
+    scopes = set()
+    seen = set()
+    while role in ROLE_SCOPES and role not in seen:
+        seen.add(role)
+        scopes.update(ROLE_SCOPES[role].get('scopes', ()))
+        role = ROLE_SCOPES[role].get('inherits')
+    return frozenset(scopes)
+
+
+class AuthContext:
+    """
+    The authenticated user of the current request.
+
+    :param claims: The claims of the access token.
+    """
+    __slots__ = ('claims', 'username', 'role', 'scopes')
+
+    def __init__(self, claims):
+        """
+        Constructor method.
+
+        :param claims: The claims of the access token.
+        """
+        self.claims = claims
+        self.username = claims.get('username')
+        self.role = claims.get('role', 'user')
+        self.scopes = role_scopes(self.role)
+
+    def has(self, scope):
+        """
+        Check whether the user is granted a scope.
+
+        :param scope: A '<namespace>:<action>' scope.
+        """
+        namespace = scope.partition(':')[0]
+        return (
+            scope in self.scopes or '*' in self.scopes
+            or f'{namespace}:*' in self.scopes
+        )
+
+
+def get_auth_context():
+    """
+    Get the AuthContext of the current request, decoding its access token
+    on first use, or abort with 401 Unauthorized when the token is missing
+    or invalid.
+
+    :return: The AuthContext.
+    """
+    auth = g.get('auth')
+    if auth is not None:
+        return auth
+
+    # PyJWT (and cryptography with it) is imported on the first
+    # authenticated request rather than at application startup
+    from jwt import PyJWTError
+
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        abort(401)
+
+    try:
+        claims = token_issuer.decode(token.strip())
+    except PyJWTError as err:
+        views_logger.info('Invalid access token: %s', err)
+        abort(401)
+
+    g.auth = auth = AuthContext(claims)
+    context = request_context.get()
+    if context is not None:
+        context.role = auth.role
+    return auth
+
+
+def require_scope(scope):
+    """
+    Abort with 401 Unauthorized without a valid access token, or with 403
+    Forbidden when its user is not granted ``scope``.
+
+    :param scope: A '<namespace>:<action>' scope.
+
+    :return: The AuthContext.
+    """
+    auth = get_auth_context()
+    if not auth.has(scope):
+        views_logger.warning(
+            'Role %s of user %s lacks scope %s', auth.role, auth.username,
+            scope
+        )
+        abort(403)
+    return auth
+
+
+def namespace_scopes(namespace):
+    """
+    A decorator for every resource of a namespace, passed to its
+    ``decorators``: safe methods require the '<namespace>:read' scope, the
+    others '<namespace>:write'.
+
+    :param namespace: - the name of the namespace, e.g. 'movies'
+    :return:          - the decorator
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            action = 'read' if request.method in SAFE_METHODS else 'write'
+            require_scope(f'{namespace}:{action}')
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,108 @@
+"""
+Pre-fork workers support module
+
+With a pre-fork server (gunicorn --preload, uWSGI without lazy-apps) the
+application is created once in the master process and every worker is a
+fork of it. Workers must not share the master's SQLite connections or log
+file descriptors, while the read-only objects built before the fork
+(modules, mappers, services) should stay shared copy-on-write.
+"""
+import gc
+import logging
+import os
+import weakref
+
+from sqlalchemy.orm import configure_mappers
+
+from helpers.implemented import BUILDERS
+from setup_db import db
+
+# applications created in pre-fork mode, reset in every forked worker
+_prefork_apps = weakref.WeakSet()
+
+
+def prepare_for_fork(application):
+    """
+    Prepare an application created in the master process to be forked.
+
+    Every DAO and service is built, the ORM mappers are configured and
+    the similar movies index, whose memory-mapped matrix the workers
+    share, is built once, in the master, then the master's connections
+    are closed and the surviving objects are moved out of the garbage
+    collector's reach (``gc.freeze``) so that collections in the workers
+    do not write to, and therefore copy, the shared memory pages.
+
+    :param application: The Flask application.
+    """
+    with application.app_context():
+        configure_mappers()
+        for builder in BUILDERS.values():
+            builder()
+        BUILDERS['similarity_service']().rebuild()
+        for engine in db.engines.values():
+            engine.dispose()
+
+    _close_log_files()
+
+    if not _prefork_apps:
+        os.register_at_fork(after_in_child=_reset_prefork_apps)
+    _prefork_apps.add(application)
+
+    gc.freeze()
+
+
+def reset_after_fork(application):
+    """
+    Reset the per-process state of an application in a forked worker:
+    connections inherited from the master are dropped without closing
+    them (they belong to the master) and log files are reopened, suffixed
+    with the worker pid when ``LOG_PER_WORKER`` is set.
+
+    :param application: The Flask application.
+    """
+    with application.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    _close_log_files(
+        pid=os.getpid() if application.config.get('LOG_PER_WORKER') else None
+    )
+
+
+def _reset_prefork_apps():
+    """
+    ``os.register_at_fork`` hook resetting every pre-fork application.
+    """
+    for application in list(_prefork_apps):
+        reset_after_fork(application)
+
+
+def _close_log_files(pid=None):
+    """
+    Close the file handlers of every logger. They are created with
+    ``delay=True`` and reopen their file on the next record.
+
+    :param pid: An optional worker pid inserted in the log file names,
+        e.g. services.log becomes services.1234.log.
+    """
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+    ]
+    for logger in loggers:
+        for handler in logger.handlers:
+            if not isinstance(handler, logging.FileHandler):
+                continue
+            handler.acquire()
+            try:
+                if handler.stream is not None:
+                    handler.stream.close()
+                    handler.stream = None
+                original = handler.__dict__.setdefault(
+                    'original_filename', handler.baseFilename
+                )
+                if pid is not None:
+                    root, ext = os.path.splitext(original)
+                    handler.baseFilename = f'{root}.{pid}{ext}'
+            finally:
+                handler.release()
@@ -0,0 +1,295 @@
+"""Token bucket rate limiting module"""
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.exceptions import TooManyRequests
+
+
+class MemoryBucketStorage:
+    """
+    In-process bucket storage. Limits are enforced per worker process.
+
+    Every bucket keeps the time at which it is full again, so buckets of
+    limiters with different capacities and refill rates may share the
+    storage. The buckets are kept by time of last use: the refilled ones
+    are dropped from the least recently used end as new ones are taken,
+    since a missing bucket is equivalent to a full one. Beyond
+    ``max_keys`` buckets the least recently used are dropped even if not
+    refilled, which bounds the memory at the cost of forgetting their
+    spent tokens.
+
+    :param max_keys: The maximum number of buckets kept.
+    """
+
+    def __init__(self, max_keys=100_000):
+        """
+        Constructor method.
+
+        :param max_keys: The maximum number of buckets kept.
+        """
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key: (tokens, updated, full_at), least recently used first
+        self._buckets = OrderedDict()
+
+    def _tokens(self, key, capacity, refill_rate, now):
+        """
+        The tokens of the bucket stored under ``key`` at ``now``. Must be
+        called with the lock held.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return capacity
+        tokens, updated, _ = bucket
+        return min(capacity, tokens + (now - updated) * refill_rate)
+
+    def _store(self, key, tokens, capacity, refill_rate, now):
+        """
+        Store the tokens of a bucket as its most recent use, then prune.
+        Must be called with the lock held.
+        """
+        self._buckets[key] = (
+            tokens, now, now + (capacity - tokens) / refill_rate
+        )
+        self._buckets.move_to_end(key)
+        self._prune(now)
+
+    def take(self, key, capacity, refill_rate, now):
+        """
+        Take one token from the bucket stored under ``key``.
+
+        :param key:         The bucket key.
+        :param capacity:    The maximum number of tokens in the bucket.
+        :param refill_rate: The number of tokens added per second.
+        :param now:         The current time in seconds.
+
+        :return:            0 if a token was taken, otherwise the number of
+            seconds until the next token is available.
+        """
+        with self._lock:
+            tokens = self._tokens(key, capacity, refill_rate, now)
+            retry_after = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_rate
+            self._store(key, tokens, capacity, refill_rate, now)
+            return retry_after
+
+    def refund(self, key, capacity, refill_rate, now):
+        """
+        Give back a token taken from the bucket stored under ``key``.
+
+        :param key:         The bucket key.
+        :param capacity:    The maximum number of tokens in the bucket.
+        :param refill_rate: The number of tokens added per second.
+        :param now:         The current time in seconds.
+        """
+        with self._lock:
+            if key in self._buckets:
+                tokens = self._tokens(key, capacity, refill_rate, now)
+                self._store(
+                    key, min(capacity, tokens + 1), capacity, refill_rate,
+                    now
+                )
+
+    def _prune(self, now):
+        """
+        Drop the least recently used buckets while they have refilled
+        completely or the storage holds more than ``max_keys`` buckets;
+        every bucket is dropped once at most, so the cost is amortized
+        over the takes. Must be called with the lock held.
+        """
+        buckets = self._buckets
+        while buckets:
+            key = next(iter(buckets))
+            if buckets[key][2] > now and len(buckets) <= self.max_keys:
+                break
+            buckets.popitem(last=False)
+
+
+class SQLiteBucketStorage:
+    """
+    Bucket storage in a local SQLite file, a stand-in for a shared store
+    that lets every worker process on the host enforce the same limits.
+
+    :param path: The path of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor method.
+
+        :param path: The path of the SQLite database file.
+        """
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """
+        Return the connection of the current thread, creating it and the
+        bucket table on first use.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL, updated REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, refill_rate, now):
+        """
+        Take one token from the bucket stored under ``key``.
+
+        :param key:         The bucket key.
+        :param capacity:    The maximum number of tokens in the bucket.
+        :param refill_rate: The number of tokens added per second.
+        :param now:         The current time in seconds.
+
+        :return:            0 if a token was taken, otherwise the number of
+            seconds until the next token is available.
+        """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, updated FROM bucket WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            retry_after = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / refill_rate
+            connection.execute(
+                'INSERT OR REPLACE INTO bucket VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        return retry_after
+
+    def refund(self, key, capacity, refill_rate, now):
+        """
+        Give back a token taken from the bucket stored under ``key``.
+
+        :param key:         The bucket key.
+        :param capacity:    The maximum number of tokens in the bucket.
+        :param refill_rate: The number of tokens added per second.
+        :param now:         The current time in seconds.
+        """
+        self._connection().execute(
+            'UPDATE bucket SET tokens = MIN(?, tokens + (? - updated) * ? '
+            '+ 1), updated = ? WHERE key = ?',
+            (capacity, now, refill_rate, now, key)
+        )
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket limiter: every key may spend ``capacity`` requests at
+    once and regains ``refill_rate`` requests per second.
+
+    :param storage:     A bucket storage object.
+    :param capacity:    The maximum number of tokens in a bucket.
+    :param refill_rate: The number of tokens added per second.
+    :param prefix:      A prefix added to every key in the storage.
+    """
+
+    def __init__(self, storage, capacity, refill_rate, prefix=''):
+        """
+        Constructor method.
+
+        :param storage:     A bucket storage object.
+        :param capacity:    The maximum number of tokens in a bucket.
+        :param refill_rate: The number of tokens added per second.
+        :param prefix:      A prefix added to every key in the storage.
+        """
+        self.storage = storage
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.prefix = prefix
+
+    def hit(self, key):
+        """
+        Register one request for ``key``.
+
+        :param key: The key to limit, e.g. a username or an IP address.
+
+        :return:    0 if the request is allowed, otherwise the number of
+            seconds to wait before retrying.
+        """
+        return self.storage.take(
+            self.prefix + key, self.capacity, self.refill_rate, time.time()
+        )
+
+    def refund(self, key):
+        """
+        Cancel a request registered for ``key`` and allowed.
+
+        :param key: The key to limit, e.g. a username or an IP address.
+        """
+        self.storage.refund(
+            self.prefix + key, self.capacity, self.refill_rate, time.time()
+        )
+
+
+class LoginThrottle:
+    """
+    Throttles login attempts per username and per client IP address.
+
+    The username limit is what stops password guessing spread over many
+    addresses, at a cost: anyone may spend the attempts of a username,
+    so a victim can be kept out of their account by failed logins sent
+    at the refill rate. The capacity and refill rate trade the speed of
+    guessing against the length of such a lockout.
+
+    :param username_limiter: A TokenBucketLimiter keyed by username.
+    :param ip_limiter:       A TokenBucketLimiter keyed by IP address.
+    """
+
+    def __init__(self, username_limiter, ip_limiter):
+        """
+        Constructor method.
+
+        :param username_limiter: A TokenBucketLimiter keyed by username.
+        :param ip_limiter:       A TokenBucketLimiter keyed by IP address.
+        """
+        self.username_limiter = username_limiter
+        self.ip_limiter = ip_limiter
+
+    def check(self, username, client_ip):
+        """
+        Register a login attempt and reject it when either limit is
+        exceeded. A rejected attempt spends no token of the other limit:
+        the IP limit is only hit once the username limit allowed the
+        attempt, and the username token is refunded when the IP limit
+        rejects it.
+
+        :param username:  The username the client tries to log in with.
+        :param client_ip: The IP address of the client, if known.
+
+        :raises TooManyRequests: 429 error with a Retry-After header.
+        """
+        retry_after = self.username_limiter.hit(username)
+        if client_ip and not retry_after:
+            retry_after = self.ip_limiter.hit(client_ip)
+            if retry_after:
+                self.username_limiter.refund(username)
+
+        if retry_after:
+            raise TooManyRequests(
+                "Too many login attempts, try again later",
+                retry_after=math.ceil(retry_after)
+            )
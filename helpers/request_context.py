@@ -0,0 +1,139 @@
+"""
+Request context module
+
+Every request gets an id, taken from its X-Request-ID header or
+generated, which is returned in the response and added to the structured
+log records written while the request is handled, together with its
+route, the role of the user, and the time and database statements spent
+in every layer.
+"""
+import contextvars
+import re
+import time
+import uuid
+
+from flask import Flask, g, request
+
+from log_handler import set_log_format, views_logger
+
+# the context of the request handled by the current thread or task
+request_context = contextvars.ContextVar('request_context', default=None)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_PATTERN = re.compile(r'[\w.:-]{1,128}')
+
+# application layers by top-level package, for the statement counters
+LAYERS = {'views': 'views', 'service': 'services', 'dao': 'dao'}
+
+
+class RequestContext:
+    """
+    The per-request data added to the log records.
+
+    :param request_id: The id of the request.
+    :param method:     The HTTP method.
+    :param route:      The URL rule matched by the request, if any.
+    """
+    __slots__ = (
+        'request_id', 'method', 'route', 'role', 'start', 'statements',
+        'db_time'
+    )
+
+    def __init__(self, request_id, method, route):
+        """
+        Constructor method.
+
+        :param request_id: The id of the request.
+        :param method:     The HTTP method.
+        :param route:      The URL rule matched by the request, if any.
+        """
+        self.request_id = request_id
+        self.method = method
+        self.route = route
+        self.role = None
+        self.start = time.perf_counter()
+        self.statements = dict.fromkeys(LAYERS.values(), 0)
+        self.db_time = dict.fromkeys(LAYERS.values(), 0.0)
+
+    def elapsed_ms(self):
+        """
+        The time elapsed since the start of the request, in milliseconds.
+        """
+        return (time.perf_counter() - self.start) * 1000
+
+    def record_statement(self, layer, duration):
+        """
+        Count a database statement executed for the request.
+
+        :param layer:    The layer which executed it: 'views',
+            'services' or 'dao'.
+        :param duration: Its execution time in seconds.
+        """
+        self.statements[layer] = self.statements.get(layer, 0) + 1
+        self.db_time[layer] = self.db_time.get(layer, 0.0) + duration
+
+    def layers(self):
+        """
+        The database statements and time of every layer.
+
+        :return: A dictionary of {"statements", "db_ms"} by layer.
+        """
+        return {
+            layer: {
+                "statements": count,
+                "db_ms": round(self.db_time[layer] * 1000, 3)
+            }
+            for layer, count in self.statements.items()
+        }
+
+
+def register_request_context(application: Flask) -> None:
+    """
+    Track the context of every request of the application and log a
+    summary record when it completes. ``LOG_FORMAT`` selects free text
+    ('text') or JSON ('json') log records for the whole process.
+
+    :param application: The Flask application.
+    """
+    set_log_format(
+        application.config.get('LOG_FORMAT', 'text'), request_context
+    )
+
+    @application.before_request
+    def start_request_context():
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        context = RequestContext(
+            request_id,
+            request.method,
+            request.url_rule.rule if request.url_rule else None
+        )
+        g.request_context_token = request_context.set(context)
+
+    @application.after_request
+    def log_request_context(response):
+        context = request_context.get()
+        if context is None:
+            return response
+
+        response.headers[REQUEST_ID_HEADER] = context.request_id
+        duration = context.elapsed_ms()
+        layers = context.layers()
+        views_logger.info(
+            'Request completed: %s %s %s in %.2f ms, %d statements',
+            context.method, context.route, response.status_code, duration,
+            sum(context.statements.values()),
+            extra={
+                "status": response.status_code,
+                "duration_ms": round(duration, 3),
+                "layers": layers
+            }
+        )
+        return response
+
+    @application.teardown_request
+    def end_request_context(_):
+        token = g.pop('request_context_token', None)
+        if token is not None:
+            request_context.reset(token)
@@ -0,0 +1,80 @@
+"""Token revocation list module"""
+import threading
+import time
+
+
+class RevocationList:
+    """
+    Compact in-memory list of users whose tokens were revoked. Only the
+    time of the last revocation is kept per username, so a token is
+    checked by comparing the time its user was last authenticated, its
+    ``auth_time`` claim, to that entry. Refreshing a token keeps its
+    ``auth_time``, so a revoked token cannot escape the list by being
+    refreshed.
+
+    Token times have a one second resolution, so tokens authenticated in
+    the same second as a revocation are revoked as well.
+
+    The list is per process: it revokes tokens at once in the process
+    that made the change, while the other processes notice it when they
+    check the user in the database again, ``max_age`` seconds after its
+    ``auth_time`` at the latest. Entries older than ``max_age`` are
+    pruned, as every token authenticated before them is checked in the
+    database anyway.
+
+    :param max_age:  The age in seconds after which the user of a token
+        is checked in the database again.
+    :param max_size: The number of entries kept before expired ones are
+        pruned.
+    """
+
+    def __init__(self, max_age, max_size=10_000):
+        """
+        Constructor method.
+
+        :param max_age:  The age in seconds after which the user of a
+            token is checked in the database again.
+        :param max_size: The number of entries kept before expired ones
+            are pruned.
+        """
+        self.max_age = max_age
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._revoked = {}
+
+    def revoke(self, username):
+        """
+        Revoke every token authenticated for ``username`` until now.
+
+        :param username: The username whose tokens are revoked.
+        """
+        with self._lock:
+            self._revoked[username] = time.time()
+            self._prune()
+
+    def is_revoked(self, username, auth_time):
+        """
+        Check whether a token was revoked.
+
+        :param username:  The username claim of the token.
+        :param auth_time: The auth_time claim of the token.
+
+        :return:          True if the token was authenticated before its
+            user was revoked.
+        """
+        revoked_at = self._revoked.get(username)
+        return revoked_at is not None and auth_time <= revoked_at
+
+    def _prune(self):
+        """
+        Drop the entries older than ``max_age`` once the list is full.
+        Must be called with the lock held.
+        """
+        if len(self._revoked) <= self.max_size:
+            return
+        oldest = time.time() - self.max_age
+        self._revoked = {
+            username: revoked_at
+            for username, revoked_at in self._revoked.items()
+            if revoked_at > oldest
+        }
@@ -0,0 +1,322 @@
+"""
+Similar movies index module
+
+Movies are compared on the TF-IDF vectors of their descriptions (cosine
+similarity), their genre, their director and the proximity of their
+release years. The TF-IDF matrix is saved to disk and memory-mapped
+copy-on-write: processes sharing the file share its pages, the rows
+updated incrementally stay private to the process and the rows inserted
+are buffered apart until the next full build.
+"""
+import os
+import re
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'\w{3,}')
+
+
+def tokenize(text):
+    """
+    Split a description into lowercase words of at least 3 letters.
+
+    :param text: The description, or None.
+
+    :return:     A list of words.
+    """
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+class IndexState:
+    """
+    The rows of a built index. Every build creates a new state and swaps
+    it in at once, so a lookup holding the previous state is unaffected.
+
+    The TF-IDF rows of the build are memory-mapped (``matrix``); rows of
+    the movies inserted afterwards are buffered in ``extra``, and the per
+    movie arrays keep spare capacity, both doubling when full, so that an
+    incremental update never copies the matrix. A new row is written
+    before ``size`` is increased: lookups read ``size`` first and only
+    look at the rows below it.
+
+    :param vocabulary: The column of every word.
+    :param idf:        The IDF weight of every column.
+    :param matrix:     The TF-IDF matrix of the movies.
+    :param movies:     The list of the Movie objects of the rows.
+    """
+
+    def __init__(self, vocabulary, idf, matrix, movies):
+        """
+        Constructor method.
+
+        :param vocabulary: The column of every word.
+        :param idf:        The IDF weight of every column.
+        :param matrix:     The TF-IDF matrix of the movies.
+        :param movies:     The list of the Movie objects of the rows.
+        """
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self.extra = np.zeros((0, len(vocabulary)), dtype=np.float32)
+        self.size = len(movies)
+        self.ids = np.array([movie.id for movie in movies], dtype=np.int64)
+        self.genre_ids = np.array(
+            [_key(movie.genre_id) for movie in movies], dtype=np.int64
+        )
+        self.director_ids = np.array(
+            [_key(movie.director_id) for movie in movies], dtype=np.int64
+        )
+        self.years = np.array(
+            [_year(movie.year) for movie in movies], dtype=np.float32
+        )
+        self.valid = np.ones(len(movies), dtype=bool)
+        self.positions = {movie.id: row for row, movie in enumerate(movies)}
+
+    def row(self, row):
+        """
+        The TF-IDF vector of a row, memory-mapped or buffered.
+        """
+        base = len(self.matrix)
+        return self.matrix[row] if row < base else self.extra[row - base]
+
+    def append(self, mid, vector):
+        """
+        Append a row to the buffers, growing them when full. The row is
+        only visible to lookups once ``size`` is increased.
+
+        :return: The position of the row.
+        """
+        row = self.size
+        if row == len(self.ids):
+            capacity = max(2 * row, 16)
+            self.extra = _grow(self.extra, capacity - len(self.matrix))
+            for name in ('ids', 'genre_ids', 'director_ids', 'years'):
+                setattr(self, name, _grow(getattr(self, name), capacity))
+            self.valid = _grow(self.valid, capacity)
+        self.extra[row - len(self.matrix)] = vector
+        self.ids[row] = mid
+        self.positions[mid] = row
+        return row
+
+
+class SimilarityIndex:
+    """
+    Precomputed similarity index of the movies.
+
+    Lookups read the current IndexState without locking. Updates are
+    meant to be serialized by the caller; a lookup running during the
+    update of an existing row may score that row with old and new values
+    mixed.
+
+    :param directory:     The directory of the memory-mapped matrix file.
+    :param weights:       The weight of every part of the score, a
+        dictionary with 'description', 'genre', 'director' and 'year'.
+    :param year_scale:    The year difference at which the year
+        proximity drops to 1/e.
+    :param max_features:  The maximum vocabulary size, the most frequent
+        words are kept.
+    :param rebuild_ratio: The fraction of rows updated incrementally
+        after which the index needs a full build.
+    """
+
+    def __init__(
+            self, directory, weights, year_scale, max_features, rebuild_ratio
+    ):
+        """
+        Constructor method.
+
+        :param directory:     The directory of the memory-mapped matrix
+            file.
+        :param weights:       The weight of every part of the score.
+        :param year_scale:    The year difference at which the year
+            proximity drops to 1/e.
+        :param max_features:  The maximum vocabulary size.
+        :param rebuild_ratio: The fraction of rows updated incrementally
+            after which the index needs a full build.
+        """
+        self.path = os.path.join(directory, 'tfidf.npy')
+        self.weights = weights
+        self.year_scale = year_scale
+        self.max_features = max_features
+        self.rebuild_ratio = rebuild_ratio
+        # change token the index is up to date with, None before a build
+        self.token = None
+        self.updates = 0
+        self.state = IndexState(
+            {}, np.zeros(0, np.float32), np.zeros((0, 0), np.float32), []
+        )
+
+    def build(self, movies, token):
+        """
+        Build the whole index: vocabulary, IDF weights and matrix.
+
+        :param movies: The list of all Movie objects.
+        :param token:  The change token the movies are up to date with.
+        """
+        documents = [tokenize(movie.description) for movie in movies]
+        frequencies = Counter(
+            word for document in documents for word in set(document)
+        )
+        words = [
+            word for word, _ in frequencies.most_common(self.max_features)
+        ]
+        vocabulary = {word: column for column, word in enumerate(words)}
+        idf = (np.log(
+            (1 + len(documents))
+            / (1 + np.array([frequencies[w] for w in words], np.float32))
+        ) + 1).astype(np.float32)
+
+        matrix = np.zeros((len(documents), len(words)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            matrix[row] = _vectorize(vocabulary, idf, document)
+
+        self.state = IndexState(vocabulary, idf, self._map(matrix), movies)
+        self.token = token
+        self.updates = 0
+
+    def update(self, movie):
+        """
+        Insert or replace the row of a movie, using the vocabulary and
+        IDF weights of the last full build.
+
+        :param movie: A Movie object.
+        """
+        state = self.state
+        vector = _vectorize(
+            state.vocabulary, state.idf, tokenize(movie.description)
+        )
+        row = state.positions.get(movie.id)
+        if row is None:
+            row = state.append(movie.id, vector)
+        else:
+            # a memory-mapped row is copied on write, page by page
+            state.row(row)[:] = vector
+
+        state.genre_ids[row] = _key(movie.genre_id)
+        state.director_ids[row] = _key(movie.director_id)
+        state.years[row] = _year(movie.year)
+        state.valid[row] = True
+        state.size = max(state.size, row + 1)
+        self.updates += 1
+
+    def remove(self, mid):
+        """
+        Remove a movie from the index.
+
+        :param mid: The ID of the movie.
+        """
+        row = self.state.positions.get(mid)
+        if row is not None:
+            self.state.valid[row] = False
+            self.updates += 1
+
+    def needs_rebuild(self):
+        """
+        Check whether enough rows were updated since the last full build
+        for the vocabulary and the IDF weights to be outdated.
+        """
+        return self.updates > self.rebuild_ratio * max(self.state.size, 10)
+
+    def similar(self, mid, limit):
+        """
+        Find the movies most similar to a movie.
+
+        :param mid:   The ID of the movie.
+        :param limit: The maximum number of movies to return.
+
+        :return:      A list of (movie ID, score) tuples by decreasing
+            score, or None if the movie is not in the index.
+        """
+        state = self.state
+        size = state.size
+        row = state.positions.get(mid)
+        if row is None or row >= size or not state.valid[row]:
+            return None
+
+        weights = self.weights
+        vector = state.row(row)
+        base = len(state.matrix)
+        scores = weights['description'] * np.concatenate((
+            state.matrix @ vector, state.extra[:size - base] @ vector
+        ))
+        genre_ids = state.genre_ids[:size]
+        if genre_ids[row] >= 0:
+            scores += weights['genre'] * (genre_ids == genre_ids[row])
+        director_ids = state.director_ids[:size]
+        if director_ids[row] >= 0:
+            scores += weights['director'] * (
+                director_ids == director_ids[row]
+            )
+        years = state.years[:size]
+        if not np.isnan(years[row]):
+            scores += weights['year'] * np.nan_to_num(np.exp(
+                -np.abs(years - years[row]) / self.year_scale
+            ))
+        valid = state.valid[:size]
+        scores[~valid] = -np.inf
+        scores[row] = -np.inf
+
+        limit = min(limit, int(valid.sum()) - 1)
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(state.ids[i]), float(scores[i])) for i in top]
+
+    def _map(self, matrix):
+        """
+        Save the matrix and memory-map it copy-on-write. The file is
+        mapped before it replaces the previous one, atomically: a mapping
+        survives the rename, so neither this process nor the processes
+        still mapping the previous file can map the matrix of another
+        build.
+        """
+        if not matrix.size:
+            return matrix
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(suffix='.npy', dir=directory)
+        with os.fdopen(descriptor, 'wb') as matrix_file:
+            np.save(matrix_file, matrix)
+        mapped = np.load(temporary, mmap_mode='c')
+        os.replace(temporary, self.path)
+        return mapped
+
+
+def _vectorize(vocabulary, idf, document):
+    """
+    Compute the L2 normalized TF-IDF vector of a tokenized document.
+    """
+    vector = np.zeros(len(vocabulary), dtype=np.float32)
+    for word, count in Counter(document).items():
+        column = vocabulary.get(word)
+        if column is not None:
+            vector[column] = (1 + np.log(count)) * idf[column]
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _grow(array, capacity):
+    """
+    A copy of an array with room for ``capacity`` rows.
+    """
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _key(value):
+    """
+    Genre and director IDs of the index, -1 for a missing one.
+    """
+    return -1 if value is None else value
+
+
+def _year(value):
+    """
+    Years of the index, NaN for a missing one.
+    """
+    return np.nan if value is None else value
@@ -0,0 +1,90 @@
+"""Single-flight (request coalescing) module"""
+import threading
+
+# every SingleFlight group by name, used to report metrics
+single_flight_groups = {}
+
+
+class _Call:
+    """
+    An in-flight computation shared by every caller with the same key.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs a function at most once at a time per key. Callers that arrive
+    while a computation for the same key is in flight wait for it and
+    receive its result (or its exception) instead of running it again.
+
+    :param name: The name of the group, used as the metrics key.
+    """
+
+    def __init__(self, name):
+        """
+        Constructor method.
+
+        :param name: The name of the group, used as the metrics key.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+        single_flight_groups[name] = self
+
+    def do(self, key, func):
+        """
+        Run ``func`` for ``key`` or join the computation already running
+        for it.
+
+        :param key:  A hashable key identifying identical reads.
+        :param func: A callable without arguments computing the result.
+
+        :return:     The result of ``func``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """
+        Return the counters of this group.
+
+        :return: A dictionary with the number of executed computations,
+            coalesced requests and computations currently in flight.
+        """
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,291 @@
+"""
+SQL statements monitoring module
+
+Every statement executed by the engines of the application is timed:
+
+- it is counted in the context of the current request, attributed to the
+  innermost application layer (views, services or DAOs) on the call stack;
+- it is aggregated by fingerprint, the statement with its literals and
+  IN lists normalized, into count, total, maximum and p95 durations;
+- when it is slower than ``SLOW_QUERY_MS``, it is written to the slow
+  query log with its parameters, the calling DAO method and its query
+  plan.
+"""
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from flask import Flask
+from sqlalchemy import event
+
+from helpers.request_context import LAYERS, request_context
+from log_handler import slow_queries_logger
+from setup_db import db
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(
+    r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE
+)
+_SPACES = re.compile(r'\s+')
+
+# statements whose query plan can be explained
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def fingerprint(statement):
+    """
+    Normalize a statement so that its executions with other literals or
+    IN list lengths share the same fingerprint.
+
+    :param statement: The SQL statement.
+
+    :return:          The normalized statement.
+    """
+    statement = _LITERALS.sub('?', statement)
+    statement = _IN_LISTS.sub('IN (?, ...)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+def current_layer():
+    """
+    Find the innermost application layer on the call stack.
+
+    :return: 'views', 'services' or 'dao', or None when the statement is
+        not executed from application code.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        package = frame.f_globals.get('__name__', '').partition('.')[0]
+        layer = LAYERS.get(package)
+        if layer is not None:
+            return layer
+        frame = frame.f_back
+    return None
+
+
+def calling_dao_method():
+    """
+    Find the innermost DAO method on the call stack, skipping the models
+    whose lazy loads are triggered by the DAOs.
+
+    :return: Its qualified name, e.g. 'dao.movies.MovieDAO.get_all', or
+        None.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('dao.') and not module.startswith('dao.model'):
+            return f'{module}.{frame.f_code.co_qualname}'
+        frame = frame.f_back
+    return None
+
+
+class StatementStats:
+    """
+    Aggregated durations of the statements sharing a fingerprint.
+
+    :param caller:  The DAO method which first executed it.
+    :param samples: The number of recent durations kept for the p95.
+    """
+    __slots__ = ('count', 'total', 'max', 'slow', 'caller', 'plan', 'recent')
+
+    def __init__(self, caller, samples):
+        """
+        Constructor method.
+
+        :param caller:  The DAO method which first executed it.
+        :param samples: The number of recent durations kept for the p95.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.caller = caller
+        self.plan = None
+        self.recent = deque(maxlen=samples)
+
+    def add(self, duration):
+        """
+        Add the duration of an execution, in seconds.
+        """
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.recent.append(duration)
+
+    def as_dict(self):
+        """
+        The stats in milliseconds, as a JSON serializable dictionary.
+        """
+        recent = sorted(self.recent)
+        p95 = recent[min(int(len(recent) * 0.95), len(recent) - 1)]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "slow": self.slow,
+            "caller": self.caller,
+            "plan": self.plan
+        }
+
+
+class SQLMonitor:
+    """
+    Engine event listeners timing, aggregating and logging statements.
+
+    :param slow_threshold:   The duration in seconds above which a
+        statement is logged as slow.
+    :param max_fingerprints: The maximum number of fingerprints tracked;
+        statements with a new fingerprint are not aggregated beyond it.
+    :param samples:          The number of recent durations kept per
+        fingerprint for the p95.
+    """
+
+    def __init__(self, slow_threshold, max_fingerprints=1000, samples=512):
+        """
+        Constructor method.
+
+        :param slow_threshold:   The duration in seconds above which a
+            statement is logged as slow.
+        :param max_fingerprints: The maximum number of fingerprints
+            tracked.
+        :param samples:          The number of recent durations kept per
+            fingerprint for the p95.
+        """
+        self.slow_threshold = slow_threshold
+        self.max_fingerprints = max_fingerprints
+        self.samples = samples
+        self._stats = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        """
+        Listen to the statements of ``engine``.
+
+        :param engine: An SQLAlchemy Engine.
+        """
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def stats(self, order='total_ms', limit=None):
+        """
+        Return the aggregated stats of the statements.
+
+        :param order: The stat to sort by, decreasing.
+        :param limit: The maximum number of fingerprints returned.
+
+        :return:      A list of stats dictionaries with their fingerprint.
+        """
+        with self._lock:
+            stats = [
+                {"fingerprint": key, **value.as_dict()}
+                for key, value in self._stats.items()
+            ]
+        stats.sort(key=lambda entry: entry[order], reverse=True)
+        return stats[:limit]
+
+    def reset(self):
+        """
+        Forget the aggregated stats.
+        """
+        with self._lock:
+            self._stats.clear()
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context,
+                        executemany):
+        conn.info.setdefault('statement_start', []).append(
+            time.perf_counter()
+        )
+
+    def _after_execute(self, conn, cursor, statement, parameters, context,
+                       executemany):
+        duration = time.perf_counter() - conn.info['statement_start'].pop()
+
+        current = request_context.get()
+        if current is not None:
+            current.record_statement(current_layer() or 'other', duration)
+
+        key = self._fingerprints.get(statement)
+        if key is None:
+            if len(self._fingerprints) >= self.max_fingerprints * 4:
+                self._fingerprints.clear()
+            key = self._fingerprints[statement] = fingerprint(statement)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    return
+                stats = self._stats[key] = StatementStats(
+                    calling_dao_method(), self.samples
+                )
+            stats.add(duration)
+            if duration < self.slow_threshold:
+                return
+            stats.slow += 1
+            plan = stats.plan
+
+        if executemany and parameters:
+            parameters = parameters[0]
+        if plan is None:
+            plan = stats.plan = self._explain(cursor, statement, parameters)
+        slow_queries_logger.warning(
+            'Slow query: %.2f ms in %s: %s; parameters: %.500r; plan: %s',
+            duration * 1000, calling_dao_method(), statement, parameters,
+            plan,
+            extra={
+                "duration_ms": round(duration * 1000, 3),
+                "sql": statement,
+                "fingerprint": key,
+                "parameters": repr(parameters)[:500],
+                "caller": calling_dao_method(),
+                "plan": plan
+            }
+        )
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # a failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('statement_start'):
+            connection.info['statement_start'].pop()
+
+    @staticmethod
+    def _explain(cursor, statement, parameters):
+        """
+        Get the SQLite query plan of a statement, on the connection which
+        executed it.
+
+        :return: A list of the plan lines, or None.
+        """
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            explain = cursor.connection.execute(
+                f'EXPLAIN QUERY PLAN {statement}', parameters or ()
+            )
+            return [row[-1] for row in explain.fetchall()]
+        except Exception:
+            # not SQLite, or a statement that cannot be explained
+            return None
+
+
+def register_sql_monitor(application: Flask) -> None:
+    """
+    Install the statement listeners on the engines of the application.
+    Statements slower than ``SLOW_QUERY_MS`` milliseconds are logged.
+
+    :param application: The Flask application.
+    """
+    monitor = SQLMonitor(application.config.get('SLOW_QUERY_MS', 100) / 1000)
+    application.extensions['sql_monitor'] = monitor
+    with application.app_context():
+        for engine in db.engines.values():
+            monitor.install(engine)
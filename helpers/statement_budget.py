@@ -0,0 +1,149 @@
+"""
+Statement budget module
+
+A view issuing one statement per returned row, e.g. when a serializer
+lazily loads ``Movie.genre``, stays fast on a small catalog and collapses
+on a large one. Every endpoint gets a budget of database statements per
+request: exceeding it is logged as a warning or, in test mode, fails the
+request with a StatementBudgetExceeded error.
+"""
+from contextlib import contextmanager
+
+from flask import Flask
+from sqlalchemy import event
+
+from helpers.request_context import request_context
+from log_handler import views_logger
+from setup_db import db
+
+
+class StatementBudgetExceeded(Exception):
+    """
+    Raised when a request issues more statements than the budget of its
+    endpoint, or than expected by ``StatementCounter.assert_at_most``.
+    """
+
+
+class StatementCounter:
+    """
+    Collects the statements executed on the engines it listens to.
+    """
+
+    def __init__(self):
+        """
+        Constructor method.
+        """
+        self.statements = []
+
+    @property
+    def count(self):
+        """
+        The number of statements executed.
+        """
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context,
+               executemany):
+        """
+        An after_cursor_execute listener recording the statement.
+        """
+        self.statements.append(statement)
+
+    def assert_at_most(self, budget):
+        """
+        Check that at most ``budget`` statements were executed.
+
+        :param budget: The maximum number of statements.
+
+        :raises StatementBudgetExceeded: With the executed statements.
+        """
+        if self.count > budget:
+            raise StatementBudgetExceeded(
+                f'{self.count} statements executed, expected at most '
+                f'{budget}:\n' + '\n'.join(self.statements)
+            )
+
+
+@contextmanager
+def count_statements(application):
+    """
+    Count the statements executed on the engines of the application in
+    the block, by any thread, including the group committer.
+
+    :param application: The Flask application.
+
+    :return: A StatementCounter.
+    """
+    counter = StatementCounter()
+    with application.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', counter.record)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', counter.record)
+
+
+def get_statement_budget(config, method, route):
+    """
+    Find the statement budget of an endpoint.
+
+    :param config: The configuration of the application.
+    :param method: The HTTP method of the request.
+    :param route:  The URL rule matched by the request.
+
+    :return: The maximum number of statements, or None for no budget.
+    """
+    return config.get('STATEMENT_BUDGETS', {}).get(
+        f'{method} {route}', config.get('STATEMENT_BUDGET')
+    )
+
+
+def register_statement_budget(application: Flask) -> None:
+    """
+    Check the statements issued by every request against the budget of
+    its endpoint: ``STATEMENT_BUDGETS`` by 'METHOD rule', e.g.
+    'GET /movies/', falling back to ``STATEMENT_BUDGET``.
+    ``STATEMENT_BUDGET_MODE`` is 'warn' to log the requests over budget or
+    'raise' to fail them; it defaults to 'raise' in test mode. Streamed
+    responses are checked when they are closed.
+
+    :param application: The Flask application.
+    """
+    config = application.config
+    mode = config.get('STATEMENT_BUDGET_MODE') or (
+        'raise' if config.get('TESTING') else 'warn'
+    )
+
+    def check(context):
+        budget = get_statement_budget(config, context.method, context.route)
+        statements = sum(context.statements.values())
+        if budget is None or statements <= budget:
+            return
+
+        message = (
+            f'{context.method} {context.route} issued {statements} '
+            f'statements, over its budget of {budget}'
+        )
+        views_logger.warning(
+            'Statement budget exceeded: %s', message,
+            extra={"statements": statements, "budget": budget}
+        )
+        if mode == 'raise':
+            raise StatementBudgetExceeded(message)
+
+    @application.after_request
+    def check_statement_budget(response):
+        context = request_context.get()
+        if context is None or context.route is None:
+            return response
+
+        if response.is_streamed:
+            # a streamed body issues its statements after this hook,
+            # until the response is closed
+            response.call_on_close(lambda: check(context))
+        else:
+            check(context)
+        return response
@@ -0,0 +1,38 @@
+"""
+Pytest plugin module
+
+The conftest.py of the project loads it and defines the ``app`` and
+``client`` fixtures it relies on; tests/ bounds the statements of every
+view with it::
+
+    def test_get_movies(client, admin_headers, assert_statements):
+        with assert_statements(endpoint='GET /movies/'):
+            client.get('/movies/', headers=admin_headers)
+
+The body of a streamed response is generated, and its statements
+executed, as it is read: read and close it inside the block.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from helpers.statement_budget import count_statements, get_statement_budget
+
+
+@pytest.fixture
+def assert_statements(app):
+    """
+    Return a context manager failing the test when the block executes
+    more than ``budget`` statements. Without ``budget``, the budget
+    configured for ``endpoint``, e.g. 'GET /movies/', is checked.
+    """
+    @contextmanager
+    def check(budget=None, endpoint=None):
+        if budget is None:
+            method, _, route = endpoint.partition(' ')
+            budget = get_statement_budget(app.config, method, route)
+        with count_statements(app) as counter:
+            yield counter
+        counter.assert_at_most(budget)
+
+    return check
@@ -0,0 +1,214 @@
+"""JWT issuing and verification module"""
+import base64
+import binascii
+import json
+import time
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+# claims are serialized without whitespace, like PyJWT does
+_dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def _b64encode(data):
+    """
+    Encode bytes to unpadded URL-safe base64, as used by JWS segments.
+    """
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    """
+    Decode an unpadded URL-safe base64 JWS segment.
+    """
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def load_key(path):
+    """
+    Read a PEM encoded key from a file.
+
+    :param path: The path of the key file.
+
+    :return:     The key as bytes.
+    """
+    with open(path, 'rb') as key_file:
+        return key_file.read()
+
+
+class TokenIssuer:
+    """
+    Signs and verifies the access and refresh tokens of the application.
+
+    The algorithm object, the prepared keys and the header segment are
+    built once, so signing a token only serializes its claims and signs
+    them. With an asymmetric algorithm (EdDSA, ES256...) processes that
+    only verify tokens need the public key alone.
+
+    :param algorithm:        The JWS algorithm name, e.g. 'HS256'.
+    :param signing_key:      The secret or the PEM private key, or None
+        for a verification-only issuer.
+    :param verifying_key:    The PEM public key; defaults to the signing
+        key for HMAC algorithms.
+    :param access_lifetime:  The access token lifetime in seconds.
+    :param refresh_lifetime: The refresh token lifetime in seconds.
+    """
+
+    def __init__(
+            self,
+            algorithm,
+            signing_key,
+            verifying_key=None,
+            access_lifetime=30 * 60,
+            refresh_lifetime=130 * 24 * 60 * 60
+    ):
+        """
+        Constructor method.
+
+        :param algorithm:        The JWS algorithm name, e.g. 'HS256'.
+        :param signing_key:      The secret or the PEM private key, or
+            None for a verification-only issuer.
+        :param verifying_key:    The PEM public key; defaults to the
+            signing key for HMAC algorithms.
+        :param access_lifetime:  The access token lifetime in seconds.
+        :param refresh_lifetime: The refresh token lifetime in seconds.
+        """
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError(
+                f"Unsupported JWT algorithm {algorithm}; asymmetric "
+                f"algorithms require the 'cryptography' package"
+            )
+
+        self.algorithm = algorithm
+        self.access_lifetime = access_lifetime
+        self.refresh_lifetime = refresh_lifetime
+        self._algorithm = algorithms[algorithm]
+        self._signing_key = None
+        if signing_key is not None:
+            self._signing_key = self._algorithm.prepare_key(signing_key)
+
+        if verifying_key is not None:
+            self._verifying_key = self._algorithm.prepare_key(verifying_key)
+        elif hasattr(self._signing_key, 'public_key'):
+            self._verifying_key = self._signing_key.public_key()
+        elif self._signing_key is not None:
+            self._verifying_key = self._signing_key
+        else:
+            raise ValueError("A signing or a verifying key is required")
+        self._header_segment = _b64encode(
+            _dumps({"alg": algorithm, "typ": "JWT"}).encode()
+        )
+
+    def sign(self, claims):
+        """
+        Sign a token carrying ``claims``.
+
+        :param claims: A dictionary of JSON serializable claims.
+
+        :return:       The encoded token.
+        """
+        if self._signing_key is None:
+            raise ValueError("This token issuer has no signing key")
+
+        signing_input = (
+            self._header_segment + b'.' + _b64encode(_dumps(claims).encode())
+        )
+        signature = self._algorithm.sign(signing_input, self._signing_key)
+        return (signing_input + b'.' + _b64encode(signature)).decode()
+
+    def issue(self, username, role, now=None, **claims):
+        """
+        Issue a pair of access and refresh tokens.
+
+        :param username: The username of the user.
+        :param role:     The role of the user.
+        :param now:      The issue time; defaults to the current time.
+        :param claims:   Additional claims of both tokens, e.g.
+            ``auth_time``.
+
+        :return:         A dictionary containing access_token and
+            refresh_token.
+        """
+        if now is None:
+            now = int(time.time())
+
+        claims = {
+            **claims,
+            "username": username,
+            "role": role,
+            "iat": now,
+            "expires": now + self.access_lifetime
+        }
+        access_token = self.sign(claims)
+        claims["expires"] = now + self.refresh_lifetime
+        refresh_token = self.sign(claims)
+
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token
+        }
+
+    def issue_many(self, accounts):
+        """
+        Issue token pairs for several accounts at once, e.g. for service
+        accounts, sharing a single issue time.
+
+        :param accounts: An iterable of (username, role) tuples.
+
+        :return:         A list of token pair dictionaries, in the order
+            of ``accounts``.
+        """
+        now = int(time.time())
+        return [self.issue(username, role, now) for username, role in accounts]
+
+    def decode(self, token):
+        """
+        Verify a token and return its claims.
+
+        Tokens with the header this issuer produces are verified directly
+        with the prepared key; anything else goes through ``jwt.decode``.
+
+        :param token: The encoded token.
+
+        :return:      The claims dictionary.
+
+        :raises jwt.PyJWTError: If the token is malformed, its signature
+            is invalid or it has expired.
+        """
+        if isinstance(token, str):
+            token = token.encode()
+        elif not isinstance(token, bytes):
+            raise jwt.DecodeError("Invalid token type")
+
+        header_segment, _, rest = token.partition(b'.')
+        if header_segment != self._header_segment:
+            claims = jwt.decode(
+                token, self._verifying_key, algorithms=[self.algorithm]
+            )
+        else:
+            payload_segment, _, signature_segment = rest.partition(b'.')
+            try:
+                signature = _b64decode(signature_segment)
+                verified = self._algorithm.verify(
+                    header_segment + b'.' + payload_segment,
+                    self._verifying_key,
+                    signature
+                )
+                claims = json.loads(_b64decode(payload_segment))
+            except (binascii.Error, ValueError) as err:
+                raise jwt.DecodeError("Invalid token") from err
+
+            if not verified:
+                raise jwt.InvalidSignatureError(
+                    "Signature verification failed"
+                )
+
+        if not isinstance(claims, dict):
+            raise jwt.DecodeError("Invalid token payload")
+
+        if claims.get("expires", float('inf')) < time.time():
+            raise jwt.ExpiredSignatureError("Token has expired")
+
+        return claims
@@ -0,0 +1,83 @@
+"""TTL cache module"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    A thread-safe least recently used cache whose entries also expire
+    ``ttl`` seconds after they were stored.
+
+    :param max_entries: The maximum number of entries kept.
+    :param ttl:         The lifetime of an entry in seconds.
+    """
+
+    def __init__(self, max_entries, ttl):
+        """
+        Constructor method.
+
+        :param max_entries: The maximum number of entries kept.
+        :param ttl:         The lifetime of an entry in seconds.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the value cached for ``key``.
+
+        :param key: The key of the entry.
+
+        :return:    The value, or None when it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """
+        Cache ``value`` for ``key``, evicting the least recently used
+        entries beyond ``max_entries``.
+
+        :param key:   The key of the entry.
+        :param value: The value, not None.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        """
+        Remove the entry of ``key``, if any.
+
+        :param key: The key of the entry.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        Return the counters of the cache.
+
+        :return: A dictionary with hits, misses and entries.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries)
+            }
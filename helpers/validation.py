@@ -0,0 +1,254 @@
+"""
+Request validation module
+
+The request bodies and query strings are checked against the marshmallow
+schemas before the views hand them to the services. ``Schema.load``
+walks the generic field machinery on every call; a CompiledSchema
+resolves it once, when the view modules are imported at startup, into a
+flat table of converters by key, so validating a request is a dict
+lookup and a type check per field.
+
+The compiled schemas keep the behaviour and the error messages of the
+fields, including their ``error_messages``, ``validate``, ``allow_none``,
+``required`` and ``load_default`` options; field types without a fast
+converter fall back to ``Field.deserialize``.
+"""
+import math
+
+from flask import abort, request
+from marshmallow import EXCLUDE, INCLUDE, ValidationError, fields
+from marshmallow.utils import missing
+
+from log_handler import views_logger
+
+
+def _to_int(value):
+    """
+    Convert an integer, an integral float or a digit string, as
+    ``fields.Int`` does, or raise ValueError.
+    """
+    if type(value) is int:
+        return value
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(value)
+        return int(value)
+    if isinstance(value, str):
+        return int(value)
+    raise ValueError(value)
+
+
+def _to_float(value):
+    """
+    Convert a number or a numeric string, as ``fields.Float`` does, or
+    raise ValueError.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(value)
+    return float(value)
+
+
+def _finite_float(special):
+    """
+    Build a converter of numbers and numeric strings which rejects nan
+    and infinity with the ``special`` message, as ``fields.Float`` does
+    unless ``allow_nan`` is set.
+    """
+    def convert(value):
+        value = _to_float(value)
+        if not math.isfinite(value):
+            raise ValidationError(special)
+        return value
+
+    return convert
+
+
+def _to_str(value):
+    """
+    Accept a string, as ``fields.Str`` does, or raise ValueError.
+    """
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+def _to_strict_int(value):
+    """
+    Accept an integer only, as ``fields.Int(strict=True)`` does, or
+    raise ValueError.
+    """
+    if type(value) is not int:
+        raise ValueError(value)
+    return value
+
+
+# fast converters and OpenAPI types by field class; subclasses are
+# matched through their MRO
+CONVERTERS = {
+    fields.Integer: (_to_int, 'integer'),
+    fields.Float: (_to_float, 'number'),
+    fields.String: (_to_str, 'string'),
+}
+
+
+def _converter(field):
+    """
+    Find the fast converter and the OpenAPI type of a field, or fall back
+    to its ``deserialize`` method.
+    """
+    if isinstance(field, fields.Integer) and field.strict:
+        return _to_strict_int, 'integer'
+    if isinstance(field, fields.Float) and not field.allow_nan:
+        return _finite_float(field.error_messages['special']), 'number'
+    for cls in type(field).__mro__:
+        if cls in CONVERTERS:
+            return CONVERTERS[cls]
+    return field.deserialize, None
+
+
+class CompiledSchema:
+    """
+    A marshmallow schema compiled into a table of field converters.
+
+    :param schema: The marshmallow Schema instance to compile.
+    :param partial: Whether no field is required, as for a PATCH body.
+    :param all_required: Whether every field is required, as for a PUT
+        body.
+    :param read_only: Keys rejected as read-only, e.g. ('id',).
+    """
+
+    def __init__(self, schema, partial=False, all_required=False,
+                 read_only=()):
+        """
+        Constructor method.
+
+        :param schema: The marshmallow Schema instance to compile.
+        :param partial: Whether no field is required, as for a PATCH body.
+        :param all_required: Whether every field is required, as for a
+            PUT body.
+        :param read_only: Keys rejected as read-only, e.g. ('id',).
+        """
+        self.name = type(schema).__name__
+        self.unknown = schema.unknown
+        self.unknown_message = schema.error_messages.get(
+            'unknown', 'Unknown field.'
+        )
+        self.type_message = schema.error_messages.get(
+            'type', 'Invalid input type.'
+        )
+        self.read_only = frozenset(read_only)
+        self.fields = {}
+        self.defaults = {}
+        self.required = required = []
+        properties = {}
+
+        for name, field in schema.load_fields.items():
+            key = field.data_key or name
+            if key in self.read_only:
+                continue
+            convert, openapi_type = _converter(field)
+            self.fields[key] = (
+                name, convert, tuple(field.validators), field.allow_none,
+                field.error_messages.get('invalid', 'Invalid value.'),
+                field.error_messages['null']
+            )
+            if field.load_default is not missing:
+                self.defaults[name] = field.load_default
+            if not partial and (all_required or field.required):
+                required.append((key, field.error_messages['required']))
+            properties[key] = {'type': openapi_type} if openapi_type else {}
+
+        self.json_schema = {
+            'type': 'object',
+            'properties': properties,
+            'additionalProperties': self.unknown == INCLUDE,
+        }
+        if required:
+            self.json_schema['required'] = [key for key, _ in required]
+
+    def validate(self, payload):
+        """
+        Validate and convert a payload.
+
+        :param payload: The decoded JSON body or the query arguments.
+
+        :return: A (data, errors) tuple: the converted values by field
+            name and the error messages by key, empty when valid.
+        """
+        if not isinstance(payload, dict):
+            return {}, {'_schema': [self.type_message]}
+
+        data = dict(self.defaults)
+        errors = {}
+        for key, value in payload.items():
+            spec = self.fields.get(key)
+            if spec is None:
+                if key in self.read_only:
+                    errors[key] = ['Read-only field.']
+                elif self.unknown == INCLUDE:
+                    data[key] = value
+                elif self.unknown != EXCLUDE:
+                    errors[key] = [self.unknown_message]
+                continue
+
+            name, convert, validators, allow_none, invalid, null = spec
+            if value is None:
+                if allow_none:
+                    data[name] = None
+                else:
+                    errors[key] = [null]
+                continue
+            try:
+                value = convert(value)
+                for validator in validators:
+                    # like marshmallow, a validator fails by raising a
+                    # ValidationError or returning False
+                    if validator(value) is False:
+                        raise ValueError(value)
+            except ValidationError as err:
+                errors[key] = err.messages
+            except (TypeError, ValueError):
+                errors[key] = [invalid]
+            else:
+                data[name] = value
+
+        for key, message in self.required:
+            if key not in payload:
+                errors[key] = [message]
+        return data, errors
+
+    def load(self, payload):
+        """
+        Validate a payload of the current request, or abort with 400 Bad
+        Request and the error messages by key.
+
+        :param payload: The decoded JSON body or the query arguments.
+
+        :return: The converted values by field name.
+        """
+        data, errors = self.validate(payload)
+        if errors:
+            views_logger.warning(
+                'Invalid %s payload: %s', self.name, errors
+            )
+            abort(400, errors)
+        return data
+
+    def load_json(self):
+        """
+        Validate the JSON body of the current request.
+
+        :return: The converted values by field name.
+        """
+        return self.load(request.get_json(silent=True))
+
+    def load_args(self):
+        """
+        Validate the query arguments of the current request; only the
+        first value of a repeated argument is checked.
+
+        :return: The converted values by field name.
+        """
+        return self.load(request.args.to_dict())
@@ -1,13 +1,204 @@
-"""Log handler module"""
+"""
+Log handler module
 
+Log files are opened lazily, on the first record written to them, so
+importing the application does not touch the file system.
+
+Records are written as free text lines or, in the structured mode, as one
+JSON object per line carrying the context of the current request.
+
+Log files are rotated by size and age; rotated files are compressed by a
+background thread and pruned according to the retention limits.
+"""
+
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
+import time
+
+from helpers.constants import LOG_BACKUP_COUNT, LOG_COMPRESS, LOG_DIR, \
+    LOG_MAX_BYTES, LOG_RETENTION_DAYS, LOG_ROTATION_INTERVAL
+
+
+class _Archiver:
+    """
+    Background thread compressing the rotated log files and removing the
+    archives beyond the retention limits, so that the thread writing a
+    record never waits for it. The thread is restarted in forked
+    processes.
+    """
+
+    def __init__(self):
+        """
+        Constructor method.
+        """
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, task):
+        """
+        Run ``task`` on the archiver thread.
+
+        :param task: A callable without arguments.
+        """
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.SimpleQueue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,),
+                    name='log-archiver', daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            self._queue.put(task)
+
+    @staticmethod
+    def _run(tasks):
+        while True:
+            task = tasks.get()
+            try:
+                task()
+            except OSError:
+                # the handler writing the records must not fail for this
+                pass
+
+
+_archiver = _Archiver()
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """
+    A file handler rotating its file once it reaches ``max_bytes`` or is
+    ``interval`` seconds old. The rotated file is renamed with its
+    rotation time, e.g. views.log.20240101-120000, then gzipped in the
+    background; the oldest archives are removed beyond ``backup_count``
+    archives or ``retention`` seconds.
+
+    When several processes write the same file, only one of them must
+    rotate it: use per-worker log files (``LOG_PER_WORKER``).
+
+    :param filename:     The path of the log file.
+    :param max_bytes:    The maximum size of the file, 0 for no limit.
+    :param interval:     The maximum age of the file in seconds, 0 for no
+        limit.
+    :param backup_count: The number of archives kept.
+    :param retention:    The maximum age of the archives in seconds, 0 for
+        no limit.
+    :param compress:     Whether to gzip the rotated files.
+    """
+
+    def __init__(
+            self,
+            filename,
+            max_bytes=LOG_MAX_BYTES,
+            interval=LOG_ROTATION_INTERVAL,
+            backup_count=LOG_BACKUP_COUNT,
+            retention=LOG_RETENTION_DAYS * 24 * 60 * 60,
+            compress=LOG_COMPRESS
+    ):
+        """
+        Constructor method.
+
+        :param filename:     The path of the log file.
+        :param max_bytes:    The maximum size of the file, 0 for no limit.
+        :param interval:     The maximum age of the file in seconds, 0 for
+            no limit.
+        :param backup_count: The number of archives kept.
+        :param retention:    The maximum age of the archives in seconds,
+            0 for no limit.
+        :param compress:     Whether to gzip the rotated files.
+        """
+        super().__init__(filename, 'a', encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.retention = retention
+        self.compress = compress
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record):
+        """
+        Check whether the file must be rotated before writing ``record``.
+        The size is checked before the record is written, so a file may
+        exceed ``max_bytes`` by one record.
+        """
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        """
+        Rename the current file and hand it over to the archiver thread.
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self.rollover_at = time.time() + self.interval
+
+        try:
+            if not os.path.getsize(self.baseFilename):
+                return
+            archive = stamped = time.strftime(
+                f'{self.baseFilename}.%Y%m%d-%H%M%S', time.localtime()
+            )
+            suffix = 0
+            while os.path.exists(archive) or os.path.exists(archive + '.gz'):
+                suffix += 1
+                archive = f'{stamped}_{suffix}'
+            os.rename(self.baseFilename, archive)
+        except FileNotFoundError:
+            return
+
+        _archiver.submit(lambda: self._archive(archive))
+
+    def _archive(self, archive):
+        """
+        Compress a rotated file and prune the archives; runs on the
+        archiver thread.
+
+        :param archive: The path of the rotated file.
+        """
+        if self.compress:
+            with open(archive, 'rb') as source, \
+                    gzip.open(archive + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(archive)
+        self._prune()
+
+    def _prune(self):
+        """
+        Remove the archives beyond the retention limits.
+        """
+        directory, name = os.path.split(self.baseFilename)
+        archives = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(directory)
+            if entry.name.startswith(name + '.') and entry.is_file()
+        )
+        expired = archives[:max(len(archives) - self.backup_count, 0)]
+        if self.retention:
+            oldest = time.time() - self.retention
+            expired += [
+                archive for archive in archives[len(expired):]
+                if archive[0] < oldest
+            ]
+        for _, path in expired:
+            os.remove(path)
 
-from helpers.constants import LOG_DIR
 
 logging.basicConfig(
-    filename=os.path.join(LOG_DIR, 'main.log'),
-    filemode='a',
+    handlers=[RotatingLogHandler(os.path.join(LOG_DIR, 'main.log'))],
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     level=logging.DEBUG
 )
@@ -16,6 +207,66 @@ formatter = logging.Formatter(
     "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
+# attributes of every LogRecord; the others were passed in ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord('', 0, '', 0, '', (), None))
+) | {'message', 'asctime'}
+
+_dumps = json.JSONEncoder(
+    ensure_ascii=False, separators=(',', ':'), default=str
+).encode
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single line JSON objects with the timestamp, level,
+    logger and message, the ``extra`` fields of the record and, during a
+    request, its id, method, route, user role and elapsed time.
+
+    :param context_var: An optional ContextVar holding the RequestContext
+        of the current request.
+    """
+
+    def __init__(self, context_var=None):
+        """
+        Constructor method.
+
+        :param context_var: An optional ContextVar holding the
+            RequestContext of the current request.
+        """
+        super().__init__()
+        self.context_var = context_var
+
+    def format(self, record):
+        """
+        Format a record as a JSON object.
+
+        :param record: The LogRecord.
+
+        :return: The JSON text, without a trailing newline.
+        """
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        context = self.context_var.get() if self.context_var else None
+        if context is not None:
+            entry["request_id"] = context.request_id
+            entry["method"] = context.method
+            entry["route"] = context.route
+            entry["role"] = context.role
+            entry["elapsed_ms"] = round(context.elapsed_ms(), 3)
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return _dumps(entry)
+
 
 def create_logger(name, filename):
     """
@@ -30,7 +281,7 @@ def create_logger(name, filename):
     """
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    file_handler = logging.FileHandler(os.path.join(LOG_DIR, filename))
+    file_handler = RotatingLogHandler(os.path.join(LOG_DIR, filename))
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -45,3 +296,28 @@ dao_logger = create_logger('dao', 'dao/dao.log')
 
 # create logger for places module
 views_logger = create_logger('views', 'views/views.log')
+
+# create logger for the statements slower than SLOW_QUERY_MS
+slow_queries_logger = create_logger('slow_queries', 'sql/slow_queries.log')
+
+
+def set_log_format(log_format, context_var=None):
+    """
+    Switch the format of every log file of the process.
+
+    :param log_format: 'text' for free text lines, 'json' for JSON
+        records.
+    :param context_var: The ContextVar of the current request context,
+        added to the JSON records.
+    """
+    if log_format == 'json':
+        record_formatter = JsonFormatter(context_var)
+    else:
+        record_formatter = formatter
+
+    for logger in (
+            logging.getLogger(), services_logger, dao_logger, views_logger,
+            slow_queries_logger
+    ):
+        for handler in logger.handlers:
+            handler.setFormatter(record_formatter)
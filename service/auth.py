@@ -1,10 +1,12 @@
-import calendar
-import datetime
+import time
 
 import jwt
 from flask import abort
+from werkzeug.exceptions import HTTPException
 
-from helpers.constants import JWT_ALGORITHM, JWT_SECRET
+from helpers.rate_limit import LoginThrottle
+from helpers.revocation import RevocationList
+from helpers.tokens import TokenIssuer
 from log_handler import services_logger
 from service.users import UserService
 
@@ -15,26 +17,63 @@ class AuthService:
 
     :param user_service: A UserService object.
     """
-    def __init__(self, user_service: UserService):
+    def __init__(
+            self,
+            user_service: UserService,
+            token_issuer: TokenIssuer,
+            login_throttle: LoginThrottle = None,
+            revocation_list: RevocationList = None,
+            recheck_after: int = 0
+    ):
         """
         Constructor method.
 
         :param user_service: UserService object to get user data from database.
+        :param token_issuer: TokenIssuer object signing and verifying tokens.
+        :param login_throttle: optional LoginThrottle object limiting the
+            login attempts per username and per client IP.
+        :param revocation_list: optional RevocationList object; when given,
+            refresh tokens are approved from their claims without a
+            database lookup for ``recheck_after`` seconds after their user
+            was last checked.
+        :param recheck_after: int value, the age in seconds of the
+            ``auth_time`` claim after which the user of a refresh token is
+            looked up again.
         """
         self.user_service = user_service
+        self.token_issuer = token_issuer
+        self.login_throttle = login_throttle
+        self.revocation_list = revocation_list
+        self.recheck_after = recheck_after
         self.logger = services_logger
 
-    def generate_token(self, username, password, is_refresh=False):
+    def generate_token(
+            self, username, password, is_refresh=False, client_ip=None
+    ):
         """
         Generates access and refresh token for the provided user credentials.
 
+        Login attempts are throttled before the user lookup and the
+        password hashing, so rejected attempts cost almost nothing.
+
         :param username: string value, username of the user.
         :param password: string value, password of the user.
         :param is_refresh: bool value, whether this token is a refresh
             token or not. Default is False.
+        :param client_ip: string value, IP address of the client used for
+            login throttling.
 
         :return: dictionary containing access_token and refresh_token.
         """
+        if not is_refresh and self.login_throttle is not None:
+            try:
+                self.login_throttle.check(username, client_ip)
+            except HTTPException:
+                self.logger.warning(
+                    "Login throttled for user %s from %s", username, client_ip
+                )
+                raise
+
         user = self.user_service.get_by_username(username)
 
         if user is None:
@@ -43,57 +82,100 @@ class AuthService:
 
         if not is_refresh:
             if not self.user_service.compare_passwords(
-                    user.password, password
+                    user.password, password, user.id
             ):
                 self.logger.info("Invalid password")
                 abort(400)
+            # a rehashed password bumped the version of the user
+            user = self.user_service.get_by_username(username) or user
 
-        data = {
-            "username": user.username,
-            "role": user.role
-        }
-
-        # access_token
-        min30 = datetime.datetime.utcnow() + datetime.timedelta(minutes=30)
-        data["expires"] = calendar.timegm(min30.timetuple())
-        access_token = jwt.encode(
-            data,
-            JWT_SECRET,
-            algorithm=JWT_ALGORITHM
+        return self.issue_tokens(
+            user.username, user.role,
+            auth_time=int(time.time()), version=user.version
         )
 
-        # refresh_token
-        days130 = datetime.datetime.utcnow() + datetime.timedelta(days=130)
-        data["expires"] = calendar.timegm(days130.timetuple())
-        refresh_token = jwt.encode(
-            data,
-            JWT_SECRET,
-            algorithm=JWT_ALGORITHM
-        )
+    def issue_tokens(self, username, role, **claims):
+        """
+        Signs a new pair of access and refresh tokens.
+
+        :param username: string value, username of the user.
+        :param role: string value, role of the user.
+        :param claims: the ``auth_time`` of the user, when it was last
+            checked in the database, and its ``version`` then.
 
+        :return: dictionary containing access_token and refresh_token.
+        """
+        tokens = self.token_issuer.issue(username, role, **claims)
         self.logger.info("Generated tokens for user {}".format(username))
 
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token
-        }
+        return tokens
 
     def approve_refresh_token(self, refresh_token):
         """
         Decodes and approves the provided refresh token.
 
+        Tokens whose user was checked in the database less than
+        ``recheck_after`` seconds ago, per their ``auth_time`` claim, are
+        approved from their claims, checked against the revocation list,
+        without a database round trip; the new tokens keep that
+        ``auth_time``. Other tokens are approved only if their user still
+        exists at the version of the claims, and get the current role and
+        a new ``auth_time``.
+
         :param refresh_token: string value, refresh token provided by the client.
 
         :return: dictionary containing approved access_token and refresh_token.
         """
-        data = jwt.decode(
-            jwt=refresh_token,
-            key=JWT_SECRET,
-            algorithms=[JWT_ALGORITHM]
-        )
+        try:
+            data = self.token_issuer.decode(refresh_token)
+        except jwt.PyJWTError as err:
+            self.logger.info("Invalid refresh token: {}".format(err))
+            abort(401)
+
         username = data.get("username")
-        tokens = self.generate_token(username, None, is_refresh=True)
+        auth_time = data.get("auth_time")
+
+        if self.revocation_list is not None and auth_time is not None:
+            if self.revocation_list.is_revoked(username, auth_time):
+                self.logger.info(
+                    "Revoked refresh token for user {}".format(username)
+                )
+                abort(401)
+
+        if (self.revocation_list is None or auth_time is None
+                or auth_time < time.time() - self.recheck_after):
+            tokens = self._recheck_user(username, data.get("version"))
+        else:
+            tokens = self.issue_tokens(
+                username, data.get("role"),
+                auth_time=auth_time, version=data.get("version")
+            )
 
         self.logger.info("Approved refresh token for user {}".format(username))
 
         return tokens
+
+    def _recheck_user(self, username, version):
+        """
+        Approves a refresh token after looking its user up: the user must
+        exist and, for tokens carrying a version, must not have changed
+        since, as a change revokes the tokens of the user.
+
+        :param username: string value, username claim of the token.
+        :param version: int value, version claim of the token, if any.
+
+        :return: dictionary containing approved access_token and refresh_token.
+        """
+        user = self.user_service.get_by_username(username)
+        if user is None or version is not None and user.version != version:
+            self.logger.info(
+                "Refresh token of a deleted or changed user {}".format(
+                    username
+                )
+            )
+            abort(401)
+
+        return self.issue_tokens(
+            user.username, user.role,
+            auth_time=int(time.time()), version=user.version
+        )
@@ -0,0 +1,86 @@
+"""Change feed service module"""
+from dao.changes import ChangeDAO
+from log_handler import services_logger
+
+# number of changed rows resolved per query
+RESOLVE_CHUNK_SIZE = 500
+
+
+class ChangeService:
+    """
+    ChangeService class builds the incremental catalog sync feed from the
+    change log and the current catalog rows.
+
+    :param changes_dao: A ChangeDAO object to use for database interaction.
+    :param entity_daos: A dictionary of the DAO of every tracked entity,
+        e.g. {'movie': MovieDAO(...)}.
+    """
+
+    def __init__(self, changes_dao: ChangeDAO, entity_daos):
+        """
+        Constructor method.
+
+        :param changes_dao: A ChangeDAO object to use for database
+            interaction.
+        :param entity_daos: A dictionary of the DAO of every tracked
+            entity, e.g. {'movie': MovieDAO(...)}.
+        """
+        self.changes_dao = changes_dao
+        self.entity_daos = entity_daos
+        self.logger = services_logger
+
+    def get_changes(self, since, limit):
+        """
+        Get the rows inserted, updated or deleted after the ``since`` token.
+        Without a token, a snapshot of the whole catalog is returned.
+
+        :param since: The token returned by the previous sync, or None.
+        :param limit: The maximum number of changed rows to return; the
+            snapshot is not limited.
+
+        :return: A tuple of the token to pass to the next sync and an
+            iterator of (token, entity, entity_id, operation, row) tuples,
+            where row is None for deleted rows.
+        """
+        self.logger.info(f"Retrieving changes since {since}")
+        if since is None:
+            token = self.changes_dao.last_token()
+            return token, self._snapshot(token)
+
+        changes = self.changes_dao.get_since(since, limit)
+        next_token = changes[-1].id if changes else since
+        return next_token, self._resolve(changes)
+
+    def _snapshot(self, token):
+        """
+        Yield every current catalog row as an insert.
+        """
+        for entity, dao in self.entity_daos.items():
+            for row in dao.get_all():
+                yield token, entity, row.id, 'insert', row
+
+    def _resolve(self, changes):
+        """
+        Yield the changes with the current rows, fetched with one query
+        per entity and chunk. A row that no longer exists is a deletion.
+        """
+        for start in range(0, len(changes), RESOLVE_CHUNK_SIZE):
+            chunk = changes[start:start + RESOLVE_CHUNK_SIZE]
+            rows = {}
+            for entity, dao in self.entity_daos.items():
+                ids = [
+                    change.entity_id for change in chunk
+                    if change.entity == entity
+                ]
+                if ids:
+                    rows[entity] = {row.id: row for row in dao.get_many(ids)}
+
+            for change in chunk:
+                row = rows.get(change.entity, {}).get(change.entity_id)
+                if row is None:
+                    operation = 'delete'
+                elif change.operation == 'delete':
+                    operation = 'insert'
+                else:
+                    operation = change.operation
+                yield change.id, change.entity, change.entity_id, operation, row
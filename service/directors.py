@@ -1,6 +1,7 @@
 """Director service module"""
 
 from dao.directors import DirectorDAO
+from helpers.single_flight import SingleFlight
 from log_handler import services_logger
 
 
@@ -19,15 +20,25 @@ class DirectorService:
         """
         self.directors_dao = directors_dao
         self.logger = services_logger
+        self.single_flight = SingleFlight('directors')
 
-    def get_all(self):
+    def get_all(self, serializer=None):
         """
-        Retrieve all directors.
+        Retrieve all directors. Concurrent calls share one query.
 
-        :return: A list of Director objects.
+        :param serializer: An optional callable, e.g. a schema ``dump``
+            method, applied to the directors inside the shared computation.
+
+        :return: A list of Director objects, serialized when
+            ``serializer`` is given.
         """
         self.logger.info('Retrieving all directors')
-        return self.directors_dao.get_all()
+
+        def load():
+            directors = self.directors_dao.get_all()
+            return serializer(directors) if serializer else directors
+
+        return self.single_flight.do(("get_all", serializer), load)
 
     def get_one(self, did):
         """
@@ -40,6 +51,38 @@ class DirectorService:
         self.logger.info(f'Retrieving director with ID {did}')
         return self.directors_dao.get_one(did)
 
+    def get_expected(self, did, versions=None):
+        """
+        Retrieve a director with the given ID, checking that it is at one
+        of the expected versions.
+
+        :param did: ID of the director to retrieve.
+        :param versions: An optional list of the versions the director is
+            expected to be at; aborts with 412 if it is at none of them.
+
+        :return: A Director object.
+        """
+        self.logger.info(f'Retrieving director with ID {did}')
+        return self.directors_dao.get_expected(did, versions)
+
+    def get_many(self, dids):
+        """
+        Retrieve several directors by their IDs in one query.
+
+        :param dids: A list of director IDs.
+
+        :return: A tuple of the found Director objects, in the order of
+            ``dids``, and the list of IDs that were not found.
+        """
+        self.logger.info(f'Retrieving directors with IDs {dids}')
+        found = {
+            director.id: director
+            for director in self.directors_dao.get_many(dids)
+        }
+        directors = [found[did] for did in dids if did in found]
+        missing = [did for did in dids if did not in found]
+        return directors, missing
+
     def create(self, director):
         """
         Add a new director.
@@ -51,25 +94,29 @@ class DirectorService:
         self.logger.info('Adding new director')
         return self.directors_dao.create(director)
 
-    def update(self, did, director_data):
+    def update(self, did, director_data, versions=None):
         """
         Update an existing director.
 
         :param did: ID of the director to update.
         :param director_data: A dictionary of data to update.
+        :param versions: An optional list of the versions the director is
+            expected to be at.
 
         :return: The number of rows updated.
         """
         self.logger.info(f"Updating director with ID {did}")
-        result = self.directors_dao.update(did, director_data)
+        result = self.directors_dao.update(did, director_data, versions)
         self.logger.info(f"Updated {result} rows")
         return result
 
-    def delete(self, did):
+    def delete(self, did, versions=None):
         """
         Delete a director.
 
         :param did: ID of the director to delete.
+        :param versions: An optional list of the versions the director is
+            expected to be at.
         """
         self.logger.info(f"Deleting director with ID {did}")
-        self.directors_dao.delete(did)
+        self.directors_dao.delete(did, versions)
@@ -2,6 +2,7 @@
 
 from dao.genres import GenreDAO
 from dao.model.genre import Genre
+from helpers.single_flight import SingleFlight
 from log_handler import services_logger
 
 
@@ -20,15 +21,25 @@ class GenreService:
         """
         self.genres_dao = genres_dao
         self.logger = services_logger
+        self.single_flight = SingleFlight('genres')
 
-    def get_all(self):
+    def get_all(self, serializer=None):
         """
-        Retrieves all genres.
+        Retrieves all genres. Concurrent calls share one query.
 
-        :return: A list of all genres.
+        :param serializer: An optional callable, e.g. a schema ``dump``
+            method, applied to the genres inside the shared computation.
+
+        :return: A list of all genres, serialized when ``serializer`` is
+            given.
         """
         self.logger.info('Retrieving all genres')
-        return self.genres_dao.get_all()
+
+        def load():
+            genres = self.genres_dao.get_all()
+            return serializer(genres) if serializer else genres
+
+        return self.single_flight.do(("get_all", serializer), load)
 
     def get_one(self, gid):
         """
@@ -41,6 +52,21 @@ class GenreService:
         self.logger.info(f'Retrieving genre with ID {gid}')
         return self.genres_dao.get_one(gid)
 
+    def get_many(self, gids):
+        """
+        Retrieves several genres by their IDs in one query.
+
+        :param gids: A list of genre IDs.
+
+        :return: A tuple of the found genres, in the order of ``gids``,
+            and the list of IDs that were not found.
+        """
+        self.logger.info(f'Retrieving genres with IDs {gids}')
+        found = {genre.id: genre for genre in self.genres_dao.get_many(gids)}
+        genres = [found[gid] for gid in gids if gid in found]
+        missing = [gid for gid in gids if gid not in found]
+        return genres, missing
+
     def create(self, genre):
         """
         Adds a new genre.
@@ -52,25 +78,29 @@ class GenreService:
         self.logger.info('Adding new genre')
         return self.genres_dao.create(genre)
 
-    def update(self, gid, genre_data):
+    def update(self, gid, genre_data, versions=None):
         """
         Updates a genre.
 
         :param gid: The ID of the genre to update.
         :param genre_data: The updated genre data.
+        :param versions: An optional list of the versions the genre is
+            expected to be at.
 
         :return: The number of rows affected.
         """
         self.logger.info(f"Updating genre with ID {gid}")
-        result = self.genres_dao.update(gid, genre_data)
+        result = self.genres_dao.update(gid, genre_data, versions)
         self.logger.info(f"Updated {result} rows")
         return result
 
-    def delete(self, gid):
+    def delete(self, gid, versions=None):
         """
         Deletes a genre.
 
         :param gid: The ID of the genre to delete.
+        :param versions: An optional list of the versions the genre is
+            expected to be at.
         """
         self.logger.info(f"Deleting genre with ID {gid}")
-        self.genres_dao.delete(gid)
+        self.genres_dao.delete(gid, versions)
@@ -0,0 +1,183 @@
+"""Background job service module"""
+from flask import abort
+
+from dao.directors import DirectorDAO
+from dao.jobs import JobDAO
+from dao.movie_listing import MovieListingDAO
+from dao.movies import MovieDAO
+from log_handler import services_logger
+
+
+class JobService:
+    """
+    JobService class queues the expensive admin operations as background
+    jobs and runs them, for the job runner, in chunks of ``chunk_size``
+    items committed separately, so that readers and other writers get the
+    database between two chunks.
+
+    :param jobs_dao: A JobDAO object to use for database interaction.
+    :param movies_dao: A MovieDAO object to use for database interaction.
+    :param directors_dao: A DirectorDAO object to use for database
+        interaction.
+    :param listing_dao: A MovieListingDAO object to use for database
+        interaction.
+    :param similarity_service: The SimilarityService whose index is
+        rebuilt.
+    :param chunk_size: The number of items processed per transaction.
+    """
+
+    def __init__(
+            self,
+            jobs_dao: JobDAO,
+            movies_dao: MovieDAO,
+            directors_dao: DirectorDAO,
+            listing_dao: MovieListingDAO,
+            similarity_service,
+            chunk_size
+    ):
+        """
+        Constructor method.
+
+        :param jobs_dao: A JobDAO object to use for database interaction.
+        :param movies_dao: A MovieDAO object to use for database
+            interaction.
+        :param directors_dao: A DirectorDAO object to use for database
+            interaction.
+        :param listing_dao: A MovieListingDAO object to use for database
+            interaction.
+        :param similarity_service: The SimilarityService whose index is
+            rebuilt.
+        :param chunk_size: The number of items processed per transaction.
+        """
+        self.jobs_dao = jobs_dao
+        self.movies_dao = movies_dao
+        self.directors_dao = directors_dao
+        self.listing_dao = listing_dao
+        self.similarity_service = similarity_service
+        self.chunk_size = chunk_size
+        self.logger = services_logger
+        # handlers by job type, with their required integer parameters
+        self.handlers = {
+            'delete-director': (self._delete_director, ('director_id',)),
+            'rebuild-movie-listing': (self._rebuild_movie_listing, ()),
+            'rebuild-similarity-index': (self._rebuild_similarity_index, ()),
+        }
+
+    def get_all(self, status=None, limit=100):
+        """
+        Retrieve the latest jobs.
+
+        :param status: An optional job status to filter by.
+        :param limit: The maximum number of jobs to return.
+
+        :return: A list of Job instances, the latest first.
+        """
+        self.logger.info(f"Retrieving jobs with status {status}")
+        return self.jobs_dao.get_all(status, limit)
+
+    def get_one(self, jid):
+        """
+        Retrieve a job by its ID.
+
+        :param jid: The ID of the job.
+
+        :return: A Job instance.
+        """
+        self.logger.info(f"Retrieving job with ID {jid}")
+        return self.jobs_dao.get_one(jid)
+
+    def submit(self, job_type, params=None):
+        """
+        Queue a job after checking its type and parameters.
+
+        :param job_type: The type of the job, one of ``self.handlers``.
+        :param params: A dictionary of its parameters.
+
+        :return: The queued Job instance.
+        """
+        params = params or {}
+        if job_type not in self.handlers:
+            self.logger.error(f"Unknown job type {job_type}")
+            abort(400, f"Job type must be one of {', '.join(self.handlers)}")
+        _, required = self.handlers[job_type]
+        for name in required:
+            if not isinstance(params.get(name), int):
+                self.logger.error(f"Invalid job parameter {name}")
+                abort(400, f"Job parameter {name} must be an integer")
+
+        self.logger.info(f"Queueing job {job_type} with params {params}")
+        return self.jobs_dao.create(job_type, params)
+
+    def cancel(self, jid):
+        """
+        Cancel a pending or running job.
+
+        :param jid: The ID of the job.
+
+        :return: The Job instance.
+        """
+        self.logger.info(f"Cancelling job with ID {jid}")
+        job = self.jobs_dao.cancel(jid)
+        if job is None:
+            abort(409, f"Job with id {jid} has already finished")
+        return job
+
+    def run(self, job, context):
+        """
+        Run a claimed job; called by the job runner.
+
+        :param job: The Job instance.
+        :param context: The JobContext of the runner, reporting the
+            progress between the chunks.
+        """
+        handler, _ = self.handlers[job.type]
+        self.logger.info(f"Running job {job.id}: {job.type} {job.params}")
+        handler(job.params, context)
+        self.logger.info(f"Job {job.id} done")
+
+    def _delete_director(self, params, context):
+        """
+        Release the movies of a director chunk by chunk, according to the
+        ON DELETE action of the directors, then delete the director. Only
+        the director version given at submission, if any, is deleted: it
+        is checked before the first chunk and again by the deletion.
+        """
+        did = params['director_id']
+        self.directors_dao.get_expected(did, params.get('versions'))
+        action = self.directors_dao.on_delete
+        total = self.movies_dao.count(did)
+        done = 0
+        context.report(done, total)
+        while True:
+            released = self.movies_dao.release_director(
+                did, action, self.chunk_size
+            )
+            if not released:
+                break
+            done += released
+            context.report(done, max(total, done))
+        self.directors_dao.delete(did, params.get('versions'))
+
+    def _rebuild_movie_listing(self, params, context):
+        """
+        Recompute the movie listing chunk by chunk.
+        """
+        total = self.movies_dao.count()
+        self.listing_dao.prune()
+        done = after = 0
+        context.report(done, total)
+        while True:
+            mids = self.listing_dao.rebuild_chunk(after, self.chunk_size)
+            if not mids:
+                break
+            done += len(mids)
+            after = mids[-1]
+            context.report(done, max(total, done))
+
+    def _rebuild_similarity_index(self, params, context):
+        """
+        Rebuild the similar movies index; it only reads the database.
+        """
+        context.report(0, 1)
+        self.similarity_service.rebuild()
+        context.report(1, 1)
@@ -3,6 +3,7 @@ from flask import abort
 
 from dao.model.movie import Movie
 from dao.movies import MovieDAO
+from helpers.single_flight import SingleFlight
 from log_handler import services_logger
 
 
@@ -21,21 +22,35 @@ class MovieService:
         """
         self.movies_dao = movies_dao
         self.logger = services_logger
+        self.single_flight = SingleFlight('movies')
 
-    def get_all(self, year=None, did=None, gid=None):
+    def get_all(self, year=None, did=None, gid=None, serializer=None):
         """
-        Retrieve a list of movies filtered by year, director, and/or genre.
+        Retrieve a list of movies filtered by year, director, and/or genre,
+        with the names of their genre and director.
+
+        Concurrent calls with the same filters share one query (and one
+        serialization when ``serializer`` is given).
 
         :param year: The year to filter movies by.
         :param did: The ID of the director to filter movies by.
         :param gid: The ID of the genre to filter movies by.
+        :param serializer: An optional callable, e.g. a schema ``dump``
+            method, applied to the movies inside the shared computation.
 
-        :return: A list of Movie instances.
+        :return: A list of MovieListing instances, or the serialized movies
+            when ``serializer`` is given.
         """
         self.logger.info("Retrieving all movies")
-        movies = self.movies_dao.get_all(year, did, gid)
-        self.logger.info(f"Retrieved {len(movies)} movies")
-        return movies
+
+        def load():
+            movies = self.movies_dao.get_listing(year, did, gid)
+            self.logger.info(f"Retrieved {len(movies)} movies")
+            return serializer(movies) if serializer else movies
+
+        return self.single_flight.do(
+            ("get_all", year, did, gid, serializer), load
+        )
 
     def get_one(self, mid):
         """
@@ -48,6 +63,24 @@ class MovieService:
         self.logger.info(f"Retrieving movie with ID {mid}")
         return self.movies_dao.get_one(mid)
 
+    def get_many(self, mids):
+        """
+        Retrieve several movies by their IDs in one query.
+
+        :param mids: A list of movie IDs.
+
+        :return: A tuple of the found Movie instances, in the order of
+            ``mids``, and the list of IDs that were not found.
+        """
+        self.logger.info(f"Retrieving movies with IDs {mids}")
+        found = {movie.id: movie for movie in self.movies_dao.get_many(mids)}
+        movies = [found[mid] for mid in mids if mid in found]
+        missing = [mid for mid in mids if mid not in found]
+        self.logger.info(
+            f"Retrieved {len(movies)} movies, {len(missing)} missing"
+        )
+        return movies, missing
+
     def create(self, movie):
         """
         Add a new movie.
@@ -59,32 +92,62 @@ class MovieService:
         self.logger.info("Adding a new movie")
         return self.movies_dao.create(movie)
 
-    def update(self, mid, movie):
+    def update(self, mid, movie, versions=None):
         """
         Update an existing movie.
 
         :param mid: The ID of the movie to update.
         :param movie: A dictionary containing the updated details of the movie.
+        :param versions: An optional list of the versions the movie is
+            expected to be at.
 
         :return: The number of rows affected by the update.
         """
-        count_columns = Movie.__table__.columns
-        if len(count_columns) - 1 != len(movie.keys()):
+        count_columns = [
+            column for column in Movie.__table__.columns.keys()
+            if column not in ('id', 'version')
+        ]
+        if len(count_columns) != len(movie.keys()):
             self.logger.error(
                 "Failed to update movie: Invalid number of columns"
             )
             abort(400)
 
         self.logger.info(f"Updating movie with ID {mid}")
-        result = self.movies_dao.update(mid, movie)
+        result = self.movies_dao.update(mid, movie, versions)
         self.logger.info(f"Updated {result} rows")
         return result
 
-    def delete(self, mid):
+    def patch(self, mid, fields, versions=None):
+        """
+        Partially update an existing movie: only the given fields are
+        written. The fields are expected to be validated by the view.
+
+        :param mid: The ID of the movie to update.
+        :param fields: A dictionary of the fields to change.
+        :param versions: An optional list of the versions the movie is
+            expected to be at.
+
+        :return: The new version of the movie.
+        """
+        if not isinstance(fields, dict) or not fields:
+            self.logger.error("Failed to patch movie: no fields given")
+            abort(400, "must contain at least one field")
+
+        if 'id' in fields:
+            self.logger.error("Failed to patch movie: id is read-only")
+            abort(400, {"id": ["Read-only field."]})
+
+        self.logger.info(f"Patching movie with ID {mid}: {list(fields)}")
+        return self.movies_dao.patch(mid, fields, versions)
+
+    def delete(self, mid, versions=None):
         """
         Delete a movie by its ID.
 
         :param mid: The ID of the movie to delete.
+        :param versions: An optional list of the versions the movie is
+            expected to be at.
         """
         self.logger.info(f"Deleting movie with ID {mid}")
-        self.movies_dao.delete(mid)
+        self.movies_dao.delete(mid, versions)
@@ -0,0 +1,156 @@
+"""Similar movies service module"""
+import threading
+import time
+
+from dao.changes import ChangeDAO
+from dao.movies import MovieDAO
+from helpers.constants import MAX_CHANGES_PAGE_SIZE
+from helpers.similarity import SimilarityIndex
+from log_handler import services_logger
+
+
+class SimilarityService:
+    """
+    SimilarityService class answers "more like this" queries from a
+    precomputed SimilarityIndex, kept up to date with the movies changed
+    by MovieDAO writes through the change log.
+
+    Lookups do not wait for the index to be updated, except for its
+    first build: the change log is read at most every
+    ``refresh_interval`` seconds, by a single thread, while the other
+    lookups answer from the current index.
+
+    :param movies_dao: A MovieDAO object to use for database interaction.
+    :param changes_dao: A ChangeDAO object reading the change log.
+    :param index: The SimilarityIndex object.
+    :param refresh_interval: The number of seconds between two reads of
+        the change log.
+    """
+
+    def __init__(
+            self,
+            movies_dao: MovieDAO,
+            changes_dao: ChangeDAO,
+            index: SimilarityIndex,
+            refresh_interval: float = 1.0
+    ):
+        """
+        Constructor method.
+
+        :param movies_dao: A MovieDAO object to use for database
+            interaction.
+        :param changes_dao: A ChangeDAO object reading the change log.
+        :param index: The SimilarityIndex object.
+        :param refresh_interval: The number of seconds between two reads
+            of the change log.
+        """
+        self.movies_dao = movies_dao
+        self.changes_dao = changes_dao
+        self.index = index
+        self.refresh_interval = refresh_interval
+        self.logger = services_logger
+        # serializes the builds and updates of the index, not the lookups
+        self._lock = threading.Lock()
+        self._refreshed_at = float('-inf')
+
+    def get_similar(self, mid, limit):
+        """
+        Retrieve the movies most similar to a movie.
+
+        :param mid: The ID of the movie.
+        :param limit: The maximum number of movies to return.
+
+        :return: A list of (Movie, score) tuples by decreasing score.
+        """
+        self.logger.info(f"Retrieving movies similar to movie with ID {mid}")
+        self._refresh()
+        similar = self.index.similar(mid, limit)
+
+        if similar is None:
+            # aborts with 404 for a missing movie
+            self.movies_dao.get_one(mid)
+            return []
+
+        movies = {
+            movie.id: movie for movie
+            in self.movies_dao.get_many([sid for sid, _ in similar])
+        }
+        return [
+            (movies[sid], score) for sid, score in similar if sid in movies
+        ]
+
+    def rebuild(self):
+        """
+        Rebuild the whole index from the current movies. Lookups answer
+        from the previous index meanwhile.
+        """
+        with self._lock:
+            self._build(self.changes_dao.last_token())
+
+    def _refresh(self):
+        """
+        Build the index on first use, then bring it up to date with the
+        change log every ``refresh_interval`` seconds, unless another
+        thread is already doing it.
+        """
+        if self.index.token is None:
+            with self._lock:
+                if self.index.token is None:
+                    self._build(self.changes_dao.last_token())
+            return
+
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._apply_changes()
+        finally:
+            self._lock.release()
+
+    def _apply_changes(self):
+        """
+        Apply the movie changes since the token of the index and rebuild
+        it once too many rows were updated incrementally.
+        """
+        token = self.changes_dao.last_token()
+        self._refreshed_at = time.monotonic()
+        since = self.index.token
+        while since < token:
+            changes = self.changes_dao.get_since(since, MAX_CHANGES_PAGE_SIZE)
+            if not changes:
+                break
+            mids = [
+                change.entity_id for change in changes
+                if change.entity == 'movie'
+            ]
+            if mids:
+                movies = {
+                    movie.id: movie
+                    for movie in self.movies_dao.get_many(mids)
+                }
+                for changed_id in mids:
+                    if changed_id in movies:
+                        self.index.update(movies[changed_id])
+                    else:
+                        self.index.remove(changed_id)
+                self.logger.info(
+                    f"Similarity index updated with {len(mids)} movies"
+                )
+            since = changes[-1].id
+        self.index.token = max(since, token)
+
+        if self.index.needs_rebuild():
+            self._build(token)
+
+    def _build(self, token):
+        """
+        Build the whole index from the current movies.
+        """
+        movies = self.movies_dao.get_all()
+        self.index.build(movies, token)
+        self._refreshed_at = time.monotonic()
+        self.logger.info(
+            f"Similarity index built with {len(movies)} movies and "
+            f"{len(self.index.state.vocabulary)} words"
+        )
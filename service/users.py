@@ -1,15 +1,20 @@
 """User Service module"""
-import base64
-import hashlib
-import hmac
+from collections import namedtuple
 
 from flask import abort
 
 from dao.users import UserDAO
-from helpers.constants import CRYPTOGRAPHIC_HASH_FUNCTION, \
-    PWD_HASH_ITERATIONS, PWD_HASH_SALT
+from helpers.passwords import PasswordHasher
+from helpers.revocation import RevocationList
+from helpers.ttl_cache import TTLCache
 from log_handler import services_logger
 
+# the columns of a user cached by username; a detached copy, so that the
+# cached users never go back to a session
+CachedUser = namedtuple(
+    'CachedUser', ['id', 'username', 'password', 'role', 'version']
+)
+
 
 class UserService:
     """
@@ -18,18 +23,45 @@ class UserService:
     :param users_dao: A UserDAO object to use for database interaction.
     """
 
-    def __init__(self, users_dao: UserDAO):
+    def __init__(
+            self,
+            users_dao: UserDAO,
+            password_hasher: PasswordHasher,
+            revocation_list: RevocationList = None,
+            username_cache: TTLCache = None
+    ):
+        """
+        Constructor method.
+
+        :param users_dao: A UserDAO object to use for database interaction.
+        :param password_hasher: A PasswordHasher object hashing and
+            verifying passwords.
+        :param revocation_list: optional RevocationList object, updated
+            when a user is updated or deleted so their tokens can no
+            longer be refreshed in this process; the other processes
+            notice the change of version when they recheck the user.
+        :param username_cache: optional TTLCache of the users looked up
+            by username, invalidated when a user is updated or deleted.
+        """
         self.users_dao = users_dao
+        self.password_hasher = password_hasher
+        self.revocation_list = revocation_list
+        self.username_cache = username_cache
         self.logger = services_logger
 
-    def get_all(self):
+    def get_all(self, role=None, prefix=None, after=None, limit=None):
         """
-        Retrieve all users.
+        Retrieve a page of users ordered by username.
 
-        :return: A list of all users.
+        :param role: An optional role to filter by.
+        :param prefix: An optional username prefix to filter by.
+        :param after: The last username of the previous page, if any.
+        :param limit: The maximum number of users, or None for all.
+
+        :return: A list of users.
         """
-        self.logger.info('Retrieving all users')
-        return self.users_dao.get_all()
+        self.logger.info('Retrieving users')
+        return self.users_dao.get_all(role, prefix, after, limit)
 
     def get_one(self, uid):
         """
@@ -48,10 +80,24 @@ class UserService:
 
         :param username: The username of the user to retrieve.
 
-        :return: The user with the specified username.
+        :return: The user with the specified username, or None. Cached
+            users are read-only copies of the columns of the user.
         """
         self.logger.info(f'Retrieving user with username {username}')
-        return self.users_dao.get_by_username(username)
+        if self.username_cache is None:
+            return self.users_dao.get_by_username(username)
+
+        user = self.username_cache.get(username)
+        if user is None:
+            user = self.users_dao.get_by_username(username)
+            if user is not None:
+                # missing users are not cached: they may be created
+                user = CachedUser(
+                    user.id, user.username, user.password, user.role,
+                    user.version
+                )
+                self.username_cache.set(username, user)
+        return user
 
     def create(self, user_data):
         """
@@ -71,13 +117,15 @@ class UserService:
         )
         return self.users_dao.create(user_data)
 
-    def update(self, uid, user_data):
+    def update(self, uid, user_data, versions=None):
         """
         Update an existing user.
 
         :param uid: The ID of the user to update.
         :param user_data: A dictionary containing the updated details
             of the user.
+        :param versions: An optional list of the versions the user is
+            expected to be at.
 
         :return: The number of rows affected by the update.
         """
@@ -85,53 +133,82 @@ class UserService:
         user_data["password"] = self.hash_password(
             user_data.get("password")
         )
-        return self.users_dao.update(uid, user_data)
-
-    def delete(self, uid):
+        username = self.users_dao.get_one(uid).username
+        try:
+            result = self.users_dao.update(uid, user_data, versions)
+        finally:
+            self.invalidate(username, user_data.get("username"))
+        # only once the update passed its version check
+        if self.revocation_list is not None:
+            self.revocation_list.revoke(username)
+        return result
+
+    def delete(self, uid, versions=None):
         """
         Delete a user.
 
         :param uid: The ID of the user to delete.
+        :param versions: An optional list of the versions the user is
+            expected to be at.
         """
         self.logger.info(f"Deleting user with ID {uid}")
-        self.users_dao.delete(uid)
+        username = self.users_dao.get_one(uid).username
+        try:
+            self.users_dao.delete(uid, versions)
+        finally:
+            self.invalidate(username)
+        # only once the deletion passed its version check
+        if self.revocation_list is not None:
+            self.revocation_list.revoke(username)
 
-    @staticmethod
-    def hash_password(password):
+    def invalidate(self, *usernames):
         """
-        Hash a password using a cryptographic hash function.
+        Remove users from the username cache after a change.
+
+        :param usernames: The usernames of the changed users; None values
+            are ignored.
+        """
+        if self.username_cache is None:
+            return
+        for username in usernames:
+            if username is not None:
+                self.username_cache.pop(username)
+
+    def hash_password(self, password):
+        """
+        Hash a password with the configured algorithm and a random salt.
 
         :param password: The password to hash.
 
-        :return: The hashed password.
+        :return: The hashed password in the versioned
+            ``$<algorithm>$<params>$<salt>$<hash>`` format.
         """
-        return base64.b64encode(
-            hashlib.pbkdf2_hmac(
-                CRYPTOGRAPHIC_HASH_FUNCTION,
-                password.encode('utf-8'),
-                PWD_HASH_SALT,
-                PWD_HASH_ITERATIONS
-            )
-        )
+        return self.password_hasher.hash(password)
 
-    @staticmethod
-    def compare_passwords(db_pwd, received_pwd) -> bool:
+    def compare_passwords(self, db_pwd, received_pwd, uid=None) -> bool:
         """
         Compares two passwords for equality.
 
-        :param db_pwd: A base64 encoded hashed password string from
-            the database.
+        When the passwords match and the stored hash was made with another
+        algorithm or other parameters than the configured ones (including
+        legacy hashes), the password is rehashed and stored for ``uid``.
+
+        :param db_pwd: A hashed password string from the database.
         :param received_pwd: A plain text password string received from
             the user.
+        :param uid: The ID of the user owning ``db_pwd``; required to
+            upgrade the stored hash.
 
         :return: A boolean indicating whether the passwords match.
         """
-        return hmac.compare_digest(
-            base64.b64decode(db_pwd),
-            hashlib.pbkdf2_hmac(
-                CRYPTOGRAPHIC_HASH_FUNCTION,
-                received_pwd.encode('utf-8'),
-                PWD_HASH_SALT,
-                PWD_HASH_ITERATIONS
+        if not self.password_hasher.verify(db_pwd, received_pwd):
+            return False
+
+        if uid is not None and self.password_hasher.needs_rehash(db_pwd):
+            self.logger.info(f"Rehashing password of user with ID {uid}")
+            self.users_dao.update_password(
+                uid, self.password_hasher.hash(received_pwd)
             )
-        )
+            if self.username_cache is not None:
+                self.invalidate(self.users_dao.get_one(uid).username)
+        return True
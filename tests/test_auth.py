@@ -0,0 +1,117 @@
+"""Auth view"""
+import base64
+
+import pytest
+from werkzeug.exceptions import PreconditionFailed
+
+from helpers.constants import LEGACY_PWD_HASH_ITERATIONS, \
+    LOGIN_USERNAME_CAPACITY, PWD_HASH_SALT
+from helpers.implemented import user_dao, user_service
+from helpers.passwords import PBKDF2Hasher
+
+
+def test_login(app, client, assert_statements):
+    with app.app_context():
+        user_service.create(
+            {'username': 'budget', 'password': 'secret', 'role': 'user'}
+        )
+
+    with assert_statements(endpoint='POST /auth/'):
+        response = client.post(
+            '/auth/', json={'username': 'budget', 'password': 'secret'}
+        )
+    assert response.status_code == 201
+
+
+def test_login_throttled_per_username(client):
+    credentials = {'username': 'throttled', 'password': 'guess'}
+    for index in range(LOGIN_USERNAME_CAPACITY):
+        response = client.post(
+            '/auth/', json=credentials,
+            environ_base={'REMOTE_ADDR': f'10.0.1.{index}'}
+        )
+        assert response.status_code == 404
+
+    response = client.post(
+        '/auth/', json=credentials, environ_base={'REMOTE_ADDR': '10.0.1.99'}
+    )
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+
+def test_login_rejects_non_string_credentials(client):
+    response = client.post(
+        '/auth/', json={'username': ['admin'], 'password': 'secret'}
+    )
+    assert response.status_code == 400
+
+
+def create_user(app, username, password='secret'):
+    with app.app_context():
+        user_service.create(
+            {'username': username, 'password': password, 'role': 'user'}
+        )
+        return user_service.get_by_username(username).id
+
+
+def login(client, username, password='secret'):
+    # every login from its own address, the IP limit is not under test
+    return client.post(
+        '/auth/', json={'username': username, 'password': password},
+        environ_base={'REMOTE_ADDR': f'10.0.2.{hash(username) % 250}'}
+    )
+
+
+def refresh(client, tokens):
+    return client.put(
+        '/auth/', json={'refresh_token': tokens['refresh_token']}
+    )
+
+
+def test_refresh_revoked_by_an_update(app, client):
+    uid = create_user(app, 'refreshed')
+    tokens = login(client, 'refreshed').json
+    response = refresh(client, tokens)
+    assert response.status_code == 201
+    assert refresh(client, response.json).status_code == 201
+
+    # an update failing its version check revokes nothing
+    with app.app_context(), pytest.raises(PreconditionFailed):
+        user_service.update(
+            uid, {'username': 'refreshed', 'password': 'other'},
+            versions=[1000]
+        )
+    assert refresh(client, tokens).status_code == 201
+
+    with app.app_context():
+        user_service.update(uid, {'username': 'refreshed', 'password': 'x'})
+    assert refresh(client, tokens).status_code == 401
+    assert refresh(client, response.json).status_code == 401
+
+
+def test_refresh_of_a_deleted_user(app, client):
+    uid = create_user(app, 'deleted')
+    tokens = login(client, 'deleted').json
+    with app.app_context():
+        user_service.delete(uid)
+    assert refresh(client, tokens).status_code == 401
+
+
+def test_login_rehashes_a_legacy_password(app, client):
+    uid = create_user(app, 'legacy')
+    legacy = base64.b64encode(
+        PBKDF2Hasher(LEGACY_PWD_HASH_ITERATIONS).derive(
+            b'secret', PWD_HASH_SALT
+        )
+    ).decode()
+    with app.app_context():
+        user_dao.update_password(uid, legacy)
+        user_service.invalidate('legacy')
+
+    assert login(client, 'legacy', 'wrong').status_code == 400
+    assert login(client, 'legacy').status_code == 201
+    with app.app_context():
+        password = user_dao.get_one(uid).password
+    assert password.startswith('$')
+    # the new hash is checked like any other
+    assert login(client, 'legacy').status_code == 201
@@ -0,0 +1,66 @@
+"""Change feed view"""
+import json
+
+import pytest
+
+from helpers.statement_budget import StatementBudgetExceeded
+
+
+def test_get_changes(client, admin_headers, assert_statements):
+    # the snapshot is streamed: its statements run as the body is read
+    with assert_statements(endpoint='GET /changes/') as counter:
+        with client.get('/changes/', headers=admin_headers) as response:
+            records = response.get_data(as_text=True).splitlines()
+    assert response.status_code == 200
+    assert len(records) > 1
+    # the token, then the rows of every table
+    assert counter.count == 4
+
+
+def test_streamed_statements_count_against_the_budget(app, client,
+                                                      admin_headers):
+    app.config['STATEMENT_BUDGETS'] = {'GET /changes/': 2}
+    response = client.get('/changes/', headers=admin_headers)
+    response.get_data()
+    with pytest.raises(StatementBudgetExceeded):
+        response.close()
+
+
+def test_get_changes_rejects_non_decimal_since(client, admin_headers):
+    response = client.get('/changes/?since=²', headers=admin_headers)
+    assert response.status_code == 400
+    assert 'since' in response.json
+
+
+def sync(client, headers, since):
+    with client.get(f'/changes/?since={since}', headers=headers) as response:
+        assert response.status_code == 200
+        records = [
+            json.loads(line)
+            for line in response.get_data(as_text=True).splitlines()
+        ]
+    return int(response.headers['X-Next-Token']), records
+
+
+def test_resume_from_token(client, admin_headers):
+    with client.get('/changes/', headers=admin_headers) as response:
+        response.get_data()
+    token = int(response.headers['X-Next-Token'])
+
+    assert client.patch(
+        '/movies/1', json={'year': 1999}, headers=admin_headers
+    ).status_code == 200
+    assert client.delete('/movies/2', headers=admin_headers).status_code \
+        == 204
+
+    next_token, records = sync(client, admin_headers, token)
+    assert next_token > token
+    assert [(r['entity'], r['id'], r['op']) for r in records] == [
+        ('movie', 1, 'update'), ('movie', 2, 'delete')
+    ]
+    assert records[0]['data']['year'] == 1999
+    # deleted rows are tombstones without data
+    assert 'data' not in records[1]
+
+    # nothing changed since the last sync
+    assert sync(client, admin_headers, next_token) == (next_token, [])
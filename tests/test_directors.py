@@ -0,0 +1,13 @@
+"""Statement budgets of the director views"""
+
+
+def test_get_directors(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /directors/'):
+        response = client.get('/directors/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_director(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /directors/<int:did>'):
+        response = client.get('/directors/1', headers=admin_headers)
+    assert response.status_code == 200
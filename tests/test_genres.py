@@ -0,0 +1,13 @@
+"""Statement budgets of the genre views"""
+
+
+def test_get_genres(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /genres/'):
+        response = client.get('/genres/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_genre(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /genres/<int:gid>'):
+        response = client.get('/genres/1', headers=admin_headers)
+    assert response.status_code == 200
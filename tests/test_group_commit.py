@@ -0,0 +1,76 @@
+"""Group commit of concurrent writes"""
+import threading
+
+from sqlalchemy import select
+
+from dao.model.movie import Movie
+from helpers.group_commit import GroupCommitter
+from setup_db import db
+
+WRITERS = 5
+
+
+def test_failing_write_rolls_back_only_itself(create_test_app, monkeypatch):
+    # a window long enough for every writer to join the first batch
+    app = create_test_app(GROUP_COMMIT=True, GROUP_COMMIT_WINDOW_MS=500)
+    committer = app.extensions['group_commit']
+
+    connections = []
+    run_batch = GroupCommitter._run_batch
+
+    def spy(connection, batch):
+        driver_connection = connection.connection.driver_connection
+        connections.append(
+            (driver_connection, driver_connection.isolation_level)
+        )
+        return run_batch(connection, batch)
+
+    monkeypatch.setattr(GroupCommitter, '_run_batch', staticmethod(spy))
+
+    def write(title):
+        db.session.add(Movie(title=title))
+        db.session.flush()
+        if title == 'failing':
+            raise RuntimeError('write failed')
+        # like the DAOs: commits the SAVEPOINT of the write only
+        db.session.commit()
+        return title
+
+    titles = [f'grouped {number}' for number in range(WRITERS - 1)]
+    titles.insert(2, 'failing')
+    barrier = threading.Barrier(WRITERS)
+    outcomes = {}
+
+    def writer(title):
+        barrier.wait()
+        try:
+            outcomes[title] = committer.submit(lambda: write(title))
+        except RuntimeError as err:
+            outcomes[title] = err
+
+    threads = [
+        threading.Thread(target=writer, args=(title,)) for title in titles
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert committer.stats()['batches'] == 1
+    assert committer.stats()['max_batch_size'] == WRITERS
+    assert isinstance(outcomes.pop('failing'), RuntimeError)
+    assert outcomes == {
+        title: title for title in titles if title != 'failing'
+    }
+
+    with app.app_context():
+        stored = set(db.session.scalars(
+            select(Movie.title).where(Movie.title.in_(titles))
+        ))
+    assert stored == set(titles) - {'failing'}
+
+    # the batch switched pysqlite to manual transactions, then back
+    [(driver_connection, isolation_level)] = connections
+    assert driver_connection.isolation_level == isolation_level
+    assert isolation_level is not None
+
@@ -0,0 +1,63 @@
+"""Job views and runner"""
+from dao.model.job import JOB_CANCELLED, JOB_CANCELLING, JOB_PENDING, \
+    JOB_RUNNING
+from helpers.implemented import jobs_dao, jobs_service
+
+
+def test_get_jobs(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /jobs/'):
+        response = client.get('/jobs/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_jobs_rejects_non_decimal_limit(client, admin_headers):
+    response = client.get('/jobs/?limit=²', headers=admin_headers)
+    assert response.status_code == 400
+    assert 'limit' in response.json
+
+
+def submit(client, headers):
+    response = client.post(
+        '/jobs/', json={'type': 'rebuild-similarity-index'}, headers=headers
+    )
+    assert response.status_code == 202
+    assert response.json['status'] == JOB_PENDING
+    return response.json['id']
+
+
+def test_cancel_pending_job(client, admin_headers):
+    jid = submit(client, admin_headers)
+    response = client.delete(f'/jobs/{jid}', headers=admin_headers)
+    assert response.json['status'] == JOB_CANCELLED
+    # a finished job can no longer be cancelled
+    assert client.delete(
+        f'/jobs/{jid}', headers=admin_headers
+    ).status_code == 409
+
+
+def test_cancel_running_job(app, client, admin_headers):
+    jid = submit(client, admin_headers)
+    with app.app_context():
+        job = jobs_dao.claim('test-worker')
+        assert job.id == jid
+
+    response = client.delete(f'/jobs/{jid}', headers=admin_headers)
+    assert response.json['status'] == JOB_CANCELLING
+
+    # the job stops at its first progress report
+    with app.app_context():
+        app.extensions['job_runner']._execute(jobs_service, jobs_dao, job)
+    response = client.get(f'/jobs/{jid}', headers=admin_headers)
+    assert response.json['status'] == JOB_CANCELLED
+
+
+def test_requeue_stale_job(app, client, admin_headers):
+    jid = submit(client, admin_headers)
+    with app.app_context():
+        assert jobs_dao.claim('test-worker').status == JOB_RUNNING
+        # every running job is stale when no silence is tolerated
+        assert jobs_dao.requeue_stale(-1) == 1
+
+    job = client.get(f'/jobs/{jid}', headers=admin_headers).json
+    assert job['status'] == JOB_PENDING
+    assert job['worker'] is None
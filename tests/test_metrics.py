@@ -0,0 +1,14 @@
+"""Metrics views"""
+
+
+def test_get_metrics(client, admin_headers, assert_statements):
+    # the metrics are kept in memory
+    with assert_statements(0):
+        response = client.get('/metrics/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_query_metrics_rejects_non_decimal_limit(client, admin_headers):
+    response = client.get('/metrics/queries?limit=²', headers=admin_headers)
+    assert response.status_code == 400
+    assert 'limit' in response.json
@@ -0,0 +1,74 @@
+"""Movie views"""
+
+
+def test_get_movies(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /movies/'):
+        response = client.get('/movies/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_movies_by_ids(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /movies/'):
+        response = client.get('/movies/?ids=1,2,3', headers=admin_headers)
+    assert response.status_code == 200
+    assert [movie['id'] for movie in response.json['items']] == [1, 2, 3]
+
+
+def test_get_movie(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /movies/<int:mid>'):
+        response = client.get('/movies/1', headers=admin_headers)
+    assert response.status_code == 200
+
+
+MOVIE = {
+    'title': 'Title', 'description': 'Description', 'trailer': 'url',
+    'year': 2000, 'rating': '7.5', 'genre_id': 1, 'director_id': 1,
+}
+
+
+def test_patch_movie_if_match(client, admin_headers):
+    etag = client.get('/movies/1', headers=admin_headers).headers['ETag']
+    response = client.patch(
+        '/movies/1', json={'year': 2001},
+        headers={**admin_headers, 'If-Match': etag}
+    )
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    # the movie is no longer at the version of the first request
+    response = client.patch(
+        '/movies/1', json={'year': 2002},
+        headers={**admin_headers, 'If-Match': etag}
+    )
+    assert response.status_code == 412
+
+
+def test_conditional_write_of_missing_movie(client, admin_headers):
+    headers = {**admin_headers, 'If-Match': '"1"'}
+    assert client.put(
+        '/movies/100000', json=MOVIE, headers=headers
+    ).status_code == 404
+    assert client.patch(
+        '/movies/100000', json={'year': 2001}, headers=headers
+    ).status_code == 404
+
+
+def test_post_movie_validation(client, admin_headers):
+    response = client.post('/movies/', json={}, headers=admin_headers)
+    assert response.status_code == 400
+    assert 'title' in response.json['message']
+
+    response = client.post(
+        '/movies/', json={'title': 'Title', 'rating': 'nan', 'year': 'x'},
+        headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert set(response.json['message']) == {'rating', 'year'}
+
+    # the rating is stored as a number, and sent as one by clients
+    assert client.post(
+        '/movies/', json={**MOVIE, 'rating': 9.9}, headers=admin_headers
+    ).status_code == 201
+    assert client.patch(
+        '/movies/1', json={'rating': 8}, headers=admin_headers
+    ).status_code == 200
@@ -0,0 +1,74 @@
+"""Token bucket storage and login throttle"""
+import pytest
+from werkzeug.exceptions import TooManyRequests
+
+from helpers.rate_limit import (
+    LoginThrottle, MemoryBucketStorage, SQLiteBucketStorage,
+    TokenBucketLimiter
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteBucketStorage(str(tmp_path / 'rate_limits.db'))
+    return MemoryBucketStorage()
+
+
+def test_take_until_empty_then_refill(storage):
+    assert [storage.take('key', 2, 1, 100) for _ in range(2)] == [0, 0]
+    assert storage.take('key', 2, 1, 100) == pytest.approx(1)
+    assert storage.take('key', 2, 1, 101) == 0
+
+
+def test_refund(storage):
+    storage.take('key', 1, 1, 100)
+    storage.refund('key', 1, 1, 100)
+    assert storage.take('key', 1, 1, 100) == 0
+
+
+def test_shared_storage_keeps_the_rate_of_each_bucket():
+    storage = MemoryBucketStorage(max_keys=2)
+    storage.take('fast', 1, 10, 100)
+    storage.take('slow', 1, 0.01, 100)
+    # the refilled fast bucket is pruned, the slow one is kept although
+    # it would be full at the rate of the fast one
+    storage.take('other', 1, 10, 101)
+    assert list(storage._buckets) == ['slow', 'other']
+    assert storage.take('slow', 1, 0.01, 101) > 0
+
+
+def test_prune_drops_refilled_buckets_first():
+    storage = MemoryBucketStorage(max_keys=3)
+    for key in ('a', 'b', 'c'):
+        storage.take(key, 2, 1, 100)
+    # 'a' to 'c' are full again at 101
+    storage.take('d', 2, 1, 101)
+    assert list(storage._buckets) == ['d']
+
+
+def test_prune_bounds_the_number_of_buckets():
+    storage = MemoryBucketStorage(max_keys=100)
+    for index in range(1000):
+        storage.take(f'user{index}', 5, 5 / 60, 100)
+    assert len(storage._buckets) == 100
+    assert 'user999' in storage._buckets
+
+
+def test_login_throttle_spends_no_token_of_a_rejecting_limit():
+    storage = MemoryBucketStorage()
+    throttle = LoginThrottle(
+        TokenBucketLimiter(storage, 2, 1e-6, prefix='username:'),
+        TokenBucketLimiter(storage, 1, 1e-6, prefix='ip:')
+    )
+    throttle.check('alice', '10.0.0.1')
+    # rejected by the IP limit: the token of bob is refunded
+    with pytest.raises(TooManyRequests):
+        throttle.check('bob', '10.0.0.1')
+    throttle.check('bob', '10.0.0.2')
+    throttle.check('bob', '10.0.0.3')
+    # rejected by the username limit: the IP bucket stays full
+    with pytest.raises(TooManyRequests) as error:
+        throttle.check('bob', '10.0.0.4')
+    assert error.value.retry_after > 0
+    throttle.check('carol', '10.0.0.4')
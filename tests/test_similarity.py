@@ -0,0 +1,86 @@
+"""Similar movies index"""
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from helpers import similarity
+from helpers.similarity import SimilarityIndex
+from service.similarity import SimilarityService
+
+WEIGHTS = {'description': 1.0, 'genre': 0.5, 'director': 0.3, 'year': 0.2}
+
+
+def movie(mid, description, genre_id=1, director_id=1, year=2000):
+    return SimpleNamespace(
+        id=mid, description=description, genre_id=genre_id,
+        director_id=director_id, year=year
+    )
+
+
+def index_in(directory):
+    return SimilarityIndex(str(directory), WEIGHTS, 10, 100, 10)
+
+
+def test_inserted_rows_are_buffered(tmp_path):
+    index = index_in(tmp_path)
+    index.build(
+        [movie(1, 'space pirates'), movie(2, 'cooking show')], token=0
+    )
+    matrix = index.state.matrix
+    for mid in range(3, 40):
+        index.update(movie(mid, 'space station', genre_id=2))
+
+    # the memory-mapped matrix of the build is neither copied nor grown
+    assert index.state.matrix is matrix
+    assert isinstance(matrix, np.memmap)
+    assert index.state.size == 39
+    similar = index.similar(39, 50)
+    assert len(similar) == 38
+    assert {mid for mid, _ in similar[:36]} == set(range(3, 39))
+
+    index.remove(3)
+    assert 3 not in {mid for mid, _ in index.similar(39, 50)}
+    assert index.similar(3, 50) is None
+
+
+def test_matrix_mapped_before_it_is_replaced(tmp_path, monkeypatch):
+    other = index_in(tmp_path)
+    other.build([movie(1, 'other words entirely')] * 3, token=0)
+    replace = os.replace
+
+    def replace_then_race(source, destination):
+        # another process replaces the file right after this one
+        replace(source, destination)
+        monkeypatch.setattr(similarity.os, 'replace', replace)
+        other.build([movie(1, 'other words entirely')] * 3, token=0)
+
+    monkeypatch.setattr(similarity.os, 'replace', replace_then_race)
+    index = index_in(tmp_path)
+    index.build([movie(1, 'space pirates'), movie(2, 'cooking')], token=0)
+    assert index.state.matrix.shape == (2, 3)
+    assert [mid for mid, _ in index.similar(1, 5)] == [2]
+
+
+def test_lookup_does_not_wait_for_a_refresh(app, tmp_path):
+    from helpers.implemented import changes_dao, movies_dao
+
+    service = SimilarityService(
+        movies_dao, changes_dao, index_in(tmp_path), refresh_interval=0
+    )
+    with app.app_context():
+        service.rebuild()
+    results = []
+
+    def lookup():
+        with app.app_context():
+            results.append(service.get_similar(1, 3))
+
+    # another thread is refreshing the index
+    with service._lock:
+        thread = threading.Thread(target=lookup)
+        thread.start()
+        thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert len(results[0]) == 3
@@ -0,0 +1,13 @@
+"""User views"""
+
+
+def test_get_users(client, admin_headers, assert_statements):
+    with assert_statements(endpoint='GET /users/'):
+        response = client.get('/users/', headers=admin_headers)
+    assert response.status_code == 200
+
+
+def test_get_users_rejects_non_decimal_limit(client, admin_headers):
+    response = client.get('/users/?limit=²', headers=admin_headers)
+    assert response.status_code == 400
+    assert 'limit' in response.json
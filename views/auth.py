@@ -19,6 +19,7 @@ class AuthView(Resource):
     @staticmethod
     @auth_ns.response(201, 'Created')
     @auth_ns.response(400, 'Bad Request')
+    @auth_ns.response(429, 'Too Many Requests')
     def post():
         """
         Authenticate user and generate access token.
@@ -26,16 +27,23 @@ class AuthView(Resource):
         :return: Generated access and refresh tokens.
         :rtype: tuple
         """
-        data = request.json
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            views_logger.info("Invalid request parameters")
+            return "", 400
 
         username = data.get('username', None)
         password = data.get('password', None)
 
-        if None in [username, password]:
+        # checked before the login throttle, which keys its buckets by
+        # the username
+        if not isinstance(username, str) or not isinstance(password, str):
             views_logger.info("Invalid request parameters")
             return "", 400
 
-        tokens = auth_service.generate_token(username, password)
+        tokens = auth_service.generate_token(
+            username, password, client_ip=request.remote_addr
+        )
 
         views_logger.info("Generated tokens for user {}".format(username))
 
@@ -0,0 +1,97 @@
+"""Change feed view module"""
+import json
+
+from flask import Response, request, stream_with_context
+from flask_restx import Namespace, Resource
+
+from dao.model.director import DirectorSchema
+from dao.model.genre import GenreSchema
+from dao.model.movie import MovieSchema
+from helpers.constants import MAX_CHANGES_PAGE_SIZE
+from helpers.implemented import changes_service
+from helpers.permissions import namespace_scopes
+from log_handler import views_logger
+
+# GET requires the 'changes:read' scope, other methods 'changes:write'
+changes_ns = Namespace(
+    'changes', decorators=[namespace_scopes('changes')]
+)
+
+entity_schemas = {
+    'movie': MovieSchema(),
+    'genre': GenreSchema(),
+    'director': DirectorSchema(),
+}
+
+
+@changes_ns.route('/')
+class ChangesView(Resource):
+    """
+    A view streaming the catalog changes for incremental replication.
+
+    Methods:
+    --------
+    get():
+        Stream the rows changed since a sync token.
+    """
+    @staticmethod
+    @changes_ns.doc(params={
+        'since': 'Token returned by the previous sync (X-Next-Token); '
+                 'missing for a full snapshot',
+        'limit': f'Maximum number of changed rows, up to '
+                 f'{MAX_CHANGES_PAGE_SIZE}'
+    })
+    @changes_ns.response(200, 'Success')
+    @changes_ns.response(400, 'Bad Request')
+    def get():
+        """
+        Stream the movies, genres and directors inserted, updated or
+        deleted after the ``since`` token, one JSON object per line.
+        Deleted rows are tombstones without data.
+
+        The token to pass to the next sync is sent in the X-Next-Token
+        header; a page holding ``limit`` rows means more changes may be
+        pending.
+
+        :return: A newline delimited JSON streamed response.
+        """
+        views_logger.info(
+            'Request received: %s %s',
+            request.method, request.url
+        )
+        errors = {
+            param: f"{param.title()} must be a digital value" for param
+            in ['since', 'limit'] if
+            request.args.get(param) and not request.args.get(
+                param
+            ).isdecimal()
+        }
+        if errors:
+            views_logger.warning('Invalid request parameters: %s', errors)
+            return errors, 400
+
+        since = request.args.get('since', None, type=int)
+        limit = min(
+            request.args.get('limit', MAX_CHANGES_PAGE_SIZE, type=int),
+            MAX_CHANGES_PAGE_SIZE
+        )
+        next_token, changes = changes_service.get_changes(since, limit)
+
+        def generate():
+            for token, entity, entity_id, operation, row in changes:
+                record = {
+                    "token": token,
+                    "entity": entity,
+                    "id": entity_id,
+                    "op": operation
+                }
+                if row is not None:
+                    record["data"] = entity_schemas[entity].dump(row)
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+
+        views_logger.info('Response sent: changes until %s', next_token)
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'X-Next-Token': str(next_token)}
+        )
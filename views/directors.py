@@ -3,16 +3,31 @@ from flask import request
 from flask_restx import Namespace, Resource
 
 from dao.model.director import DirectorSchema
-from helpers.decorators import admin_required, auth_required, \
-    put_logging_and_response
+from helpers.decorators import put_logging_and_response
 from helpers.implemented import directors_service
+from helpers.parsers import parse_if_match, parse_ids
+from helpers.permissions import namespace_scopes
+from helpers.validation import CompiledSchema
 from log_handler import views_logger
+from views.jobs import queue_job
 
-directors_ns = Namespace('directors')
+# GET requires the 'directors:read' scope, other methods 'directors:write'
+directors_ns = Namespace(
+    'directors', decorators=[namespace_scopes('directors')]
+)
 
 directors_schema = DirectorSchema(many=True)
 director_schema = DirectorSchema()
 
+# compiled once at import time, see helpers.validation
+director_body = CompiledSchema(DirectorSchema(), read_only=('id',))
+director_put_body = CompiledSchema(
+    DirectorSchema(), all_required=True, read_only=('id',)
+)
+director_model = directors_ns.schema_model(
+    'Director', director_body.json_schema
+)
+
 
 @directors_ns.route('/')
 class DirectorsView(Resource):
@@ -22,26 +37,42 @@ class DirectorsView(Resource):
     Methods:
     --------
     get():
-        Retrieve all directors.
+        Retrieve all directors, or a batch of directors by their ids.
 
     post():
         Create a new director.
     """
     @staticmethod
-    @auth_required
     def get():
         """
         Retrieve all directors.
 
+        When the ``ids`` query parameter is given, only the requested
+        directors are returned, in the requested order, together with the
+        list of ids that were not found.
+
         :return: A list of dictionaries representing all directors.
         """
+        if request.args.get('ids') is not None:
+            dids = parse_ids(request.args['ids'])
+            views_logger.info('Getting directors with ids %s...', dids)
+            directors, missing = directors_service.get_many(dids)
+            return {
+                "items": directors_schema.dump(directors),
+                "missing": missing
+            }, 200
+
         views_logger.info('Getting all directors...')
-        directors = directors_service.get_all()
+        directors = directors_service.get_all(
+            serializer=directors_schema.dump
+        )
         views_logger.info('Returned %s directors', len(directors))
-        return directors_schema.dump(directors), 200
+        return directors, 200
 
     @staticmethod
-    @admin_required
+    @directors_ns.expect(director_model)
+    @directors_ns.response(201, 'Created')
+    @directors_ns.response(400, 'Bad Request')
     def post():
         """
         Create a new director.
@@ -52,7 +83,7 @@ class DirectorsView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        director = request.json
+        director = director_body.load_json()
         directors_service.create(director)
         views_logger.info('Response sent: Success')
         return "", 201
@@ -75,7 +106,6 @@ class DirectorView(Resource):
         Delete a specific director.
     """
     @staticmethod
-    @auth_required
     @directors_ns.response(200, 'Success')
     @directors_ns.response(404, 'Not Found')
     def get(did):
@@ -89,12 +119,16 @@ class DirectorView(Resource):
         views_logger.info('Getting director with id %d...', did)
         director = directors_service.get_one(did)
         views_logger.info(f'Returned director: {director.name}')
-        return director_schema.dump(director), 200
+        return director_schema.dump(director), 200, {
+            "ETag": f'"{director.version}"'
+        }
 
     @staticmethod
-    @admin_required
+    @directors_ns.expect(director_model)
     @directors_ns.response(200, 'Success')
     @directors_ns.response(204, 'No Content')
+    @directors_ns.response(400, 'Bad Request')
+    @directors_ns.response(412, 'Precondition Failed')
     @put_logging_and_response
     def put(did):
         """
@@ -104,26 +138,44 @@ class DirectorView(Resource):
 
         :return: The updated director object.
         """
-        director = request.json
-        return directors_service.update(did, director)
+        director = director_put_body.load_json()
+        return directors_service.update(did, director, parse_if_match())
 
     @staticmethod
-    @admin_required
+    @directors_ns.doc(params={
+        'background': '(optional) "true" to delete the director and '
+                      'release their movies in a background job'
+    })
     @directors_ns.response(200, 'Success')
+    @directors_ns.response(202, 'Accepted')
     @directors_ns.response(204, 'No Content')
     @directors_ns.response(404, 'Not Found')
+    @directors_ns.response(412, 'Precondition Failed')
     def delete(did):
         """
-        Delete a director by ID.
+        Delete a director by ID; their movies are released according to
+        ``DIRECTOR_ON_DELETE``. With ``background=true``, the movies are
+        released and the director deleted by a background job, in chunks
+        that do not block the other requests.
 
         :param did: The ID of the director to delete.
 
-        :return: An empty response with status code 204.
+        :return: An empty response with status code 204, or the queued
+            job with status code 202.
         """
         views_logger.info(
             'Request received: %s %s',
             request.method, request.url
         )
-        directors_service.delete(did)
+        versions = parse_if_match()
+        if request.args.get('background') == 'true':
+            # aborts with 404 for a missing director and with 412 for
+            # an unexpected version, before any movie is released
+            directors_service.get_expected(did, versions)
+            return queue_job(
+                'delete-director', {"director_id": did, "versions": versions}
+            )
+
+        directors_service.delete(did, versions)
         views_logger.info('Response sent: No Content')
         return "", 204
@@ -3,16 +3,28 @@ from flask import request
 from flask_restx import Namespace, Resource
 
 from dao.model.genre import GenreSchema
-from helpers.decorators import admin_required, auth_required, \
-    put_logging_and_response
+from helpers.decorators import put_logging_and_response
 from helpers.implemented import genres_service
+from helpers.parsers import parse_if_match, parse_ids
+from helpers.permissions import namespace_scopes
+from helpers.validation import CompiledSchema
 from log_handler import views_logger
 
-genres_ns = Namespace('genres')
+# GET requires the 'genres:read' scope, other methods 'genres:write'
+genres_ns = Namespace(
+    'genres', decorators=[namespace_scopes('genres')]
+)
 
 genres_schema = GenreSchema(many=True)
 genre_schema = GenreSchema()
 
+# compiled once at import time, see helpers.validation
+genre_body = CompiledSchema(GenreSchema(), read_only=('id',))
+genre_put_body = CompiledSchema(
+    GenreSchema(), all_required=True, read_only=('id',)
+)
+genre_model = genres_ns.schema_model('Genre', genre_body.json_schema)
+
 
 @genres_ns.route('/')
 class GenresView(Resource):
@@ -22,26 +34,40 @@ class GenresView(Resource):
     Methods:
     --------
     get():
-        Retrieve all genres.
+        Retrieve all genres, or a batch of genres by their ids.
 
     post():
         Create a new genre.
     """
     @staticmethod
-    @auth_required
     def get():
         """
         Retrieve all genres.
 
+        When the ``ids`` query parameter is given, only the requested
+        genres are returned, in the requested order, together with the
+        list of ids that were not found.
+
         :return: A list of dictionaries representing all genres.
         """
+        if request.args.get('ids') is not None:
+            gids = parse_ids(request.args['ids'])
+            views_logger.info('Retrieving genres with ids %s', gids)
+            genres, missing = genres_service.get_many(gids)
+            return {
+                "items": genres_schema.dump(genres),
+                "missing": missing
+            }, 200
+
         views_logger.info('Retrieving all genres')
-        genres = genres_service.get_all()
+        genres = genres_service.get_all(serializer=genres_schema.dump)
         views_logger.debug('Retrieved %s genres', len(genres))
-        return genres_schema.dump(genres), 200
+        return genres, 200
 
     @staticmethod
-    @admin_required
+    @genres_ns.expect(genre_model)
+    @genres_ns.response(201, 'Created')
+    @genres_ns.response(400, 'Bad Request')
     def post():
         """
         Create a new genre.
@@ -52,7 +78,7 @@ class GenresView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        genre = request.json
+        genre = genre_body.load_json()
         genres_service.create(genre)
         views_logger.info('Response sent: Success')
         return "", 201
@@ -75,7 +101,6 @@ class GenreView(Resource):
         Delete a specific genre.
     """
     @staticmethod
-    @auth_required
     def get(gid):
         """
         Retrieve a specific genre.
@@ -90,15 +115,19 @@ class GenreView(Resource):
 
         if genre:
             views_logger.debug('Retrieved genre: %s', genre)
-            return genre_schema.dump(genre), 200
+            return genre_schema.dump(genre), 200, {
+                "ETag": f'"{genre.version}"'
+            }
 
         views_logger.warning('Genre with id %s not found', gid)
         return {'message': 'Genre not found'}, 404
 
     @staticmethod
-    @admin_required
+    @genres_ns.expect(genre_model)
     @genres_ns.response(200, 'Success')
     @genres_ns.response(204, 'No Content')
+    @genres_ns.response(400, 'Bad Request')
+    @genres_ns.response(412, 'Precondition Failed')
     @put_logging_and_response
     def put(gid):
         """
@@ -109,14 +138,14 @@ class GenreView(Resource):
             status code, or an empty string with a 204 status code if the
             genre was not found.
         """
-        genre = request.json
-        return genres_service.update(gid, genre)
+        genre = genre_put_body.load_json()
+        return genres_service.update(gid, genre, parse_if_match())
 
     @staticmethod
-    @admin_required
     @genres_ns.response(200, 'Success')
     @genres_ns.response(204, 'No Content')
     @genres_ns.response(404, 'Not Found')
+    @genres_ns.response(412, 'Precondition Failed')
     def delete(gid):
         """
         Delete a specific genre.
@@ -129,6 +158,6 @@ class GenreView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        genres_service.delete(gid)
+        genres_service.delete(gid, parse_if_match())
         views_logger.info('Response sent: No Content')
         return "", 204
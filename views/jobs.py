@@ -0,0 +1,142 @@
+"""Background jobs view module"""
+from flask import current_app, request
+from flask_restx import Namespace, Resource
+
+from dao.model.job import JobSchema
+from helpers.constants import MAX_JOBS_PAGE_SIZE
+from helpers.implemented import jobs_service
+from helpers.permissions import namespace_scopes
+from log_handler import views_logger
+
+# GET requires the 'jobs:read' scope, other methods 'jobs:write'
+jobs_ns = Namespace(
+    'jobs', decorators=[namespace_scopes('jobs')]
+)
+
+jobs_schema = JobSchema(many=True)
+job_schema = JobSchema()
+
+
+def queue_job(job_type, params=None):
+    """
+    Queue a background job and build the 202 Accepted response pointing
+    to its status.
+
+    :param job_type: The type of the job.
+    :param params: A dictionary of its parameters.
+
+    :return: The response tuple.
+    """
+    job = jobs_service.submit(job_type, params)
+    current_app.extensions['job_runner'].wake()
+    views_logger.info('Job queued: %s', job)
+    return job_schema.dump(job), 202, {"Location": f"/jobs/{job.id}"}
+
+
+@jobs_ns.route('/')
+class JobsView(Resource):
+    """
+    A view for listing and queueing background jobs.
+
+    Methods:
+    --------
+    get():
+        Retrieve the latest jobs.
+    post():
+        Queue a new job.
+    """
+    @staticmethod
+    @jobs_ns.doc(params={
+        'status': '(optional) Filter by status: pending, running, '
+                  'cancelling, succeeded, failed or cancelled',
+        'limit': f'(optional) Number of jobs, up to {MAX_JOBS_PAGE_SIZE}'
+    })
+    @jobs_ns.response(200, 'Success')
+    @jobs_ns.response(400, 'Bad Request')
+    def get():
+        """
+        Retrieve the latest jobs with their status and progress.
+
+        :return: JSON response with the jobs, the latest first.
+        """
+        views_logger.info(
+            'Request received: %s %s',
+            request.method, request.url
+        )
+        limit = request.args.get('limit', str(MAX_JOBS_PAGE_SIZE))
+        if not limit.isdecimal() or not 0 < int(limit) <= MAX_JOBS_PAGE_SIZE:
+            error = {
+                "limit": f"Limit must be a digital value between 1 and "
+                         f"{MAX_JOBS_PAGE_SIZE}"
+            }
+            views_logger.warning('Invalid request parameters: %s', error)
+            return error, 400
+
+        jobs = jobs_service.get_all(request.args.get('status'), int(limit))
+        return jobs_schema.dump(jobs), 200
+
+    @staticmethod
+    @jobs_ns.response(202, 'Accepted')
+    @jobs_ns.response(400, 'Bad Request')
+    def post():
+        """
+        Queue a job, e.g. {"type": "delete-director", "params":
+        {"director_id": 1}}. Job types: delete-director,
+        rebuild-movie-listing, rebuild-similarity-index.
+
+        :return: The queued job, with its URL in the Location header.
+        """
+        views_logger.info(
+            'Request received: %s %s',
+            request.method, request.url
+        )
+        payload = request.json
+        if not isinstance(payload, dict) or not isinstance(
+                payload.get('params', {}), dict
+        ):
+            views_logger.warning('Invalid job: %s', payload)
+            return {"message": "Expected a type and a params object"}, 400
+        return queue_job(payload.get('type'), payload.get('params'))
+
+
+@jobs_ns.route('/<int:jid>')
+class JobView(Resource):
+    """
+    A view for the status of a specific background job.
+
+    Methods:
+    --------
+    get(jid):
+        Retrieve a job.
+    delete(jid):
+        Cancel a job.
+    """
+    @staticmethod
+    @jobs_ns.response(200, 'Success')
+    @jobs_ns.response(404, 'Not Found')
+    def get(jid):
+        """
+        Retrieve the status and progress of a job.
+
+        :param jid: The ID of the job.
+
+        :return: The job object.
+        """
+        views_logger.info('Getting job with id %d...', jid)
+        return job_schema.dump(jobs_service.get_one(jid)), 200
+
+    @staticmethod
+    @jobs_ns.response(202, 'Accepted')
+    @jobs_ns.response(404, 'Not Found')
+    @jobs_ns.response(409, 'Conflict')
+    def delete(jid):
+        """
+        Cancel a pending job, or stop a running job after its current
+        chunk; the chunks already committed are kept.
+
+        :param jid: The ID of the job.
+
+        :return: The job object.
+        """
+        views_logger.info('Cancelling job with id %d...', jid)
+        return job_schema.dump(jobs_service.cancel(jid)), 202
@@ -0,0 +1,115 @@
+"""Metrics view module"""
+from flask import current_app, request
+from flask_restx import Namespace, Resource
+
+from helpers.permissions import namespace_scopes
+from helpers.single_flight import single_flight_groups
+from log_handler import views_logger
+
+# GET requires the 'metrics:read' scope, other methods 'metrics:write'
+metrics_ns = Namespace(
+    'metrics', decorators=[namespace_scopes('metrics')]
+)
+
+
+@metrics_ns.route('/')
+class MetricsView(Resource):
+    """
+    A view exposing runtime metrics of the application to admins.
+
+    Methods:
+    --------
+    get():
+        Retrieve the current metrics.
+    """
+    @staticmethod
+    @metrics_ns.response(200, 'Success')
+    def get():
+        """
+        Retrieve the current metrics.
+
+        :return: A dictionary of metrics grouped by subsystem.
+        """
+        views_logger.info('Retrieving metrics')
+        metrics = {
+            "single_flight": {
+                name: group.stats()
+                for name, group in single_flight_groups.items()
+            }
+        }
+        if 'compression' in current_app.extensions:
+            metrics["compression_cache"] = (
+                current_app.extensions['compression'].stats()
+            )
+        if 'group_commit' in current_app.extensions:
+            metrics["group_commit"] = (
+                current_app.extensions['group_commit'].stats()
+            )
+        return metrics, 200
+
+
+# orders of the query stats, by decreasing value
+QUERY_STATS_ORDERS = (
+    'total_ms', 'count', 'mean_ms', 'p95_ms', 'max_ms', 'slow'
+)
+
+
+@metrics_ns.route('/queries')
+class QueryMetricsView(Resource):
+    """
+    A view exposing the aggregated SQL statement durations to admins.
+
+    Methods:
+    --------
+    get():
+        Retrieve the stats of the statements by fingerprint.
+    delete():
+        Reset the stats.
+    """
+    @staticmethod
+    @metrics_ns.doc(params={
+        'order': f'(optional) Stat to sort by: '
+                 f'{", ".join(QUERY_STATS_ORDERS)}',
+        'limit': '(optional) Number of statements'
+    })
+    @metrics_ns.response(200, 'Success')
+    @metrics_ns.response(400, 'Bad Request')
+    def get():
+        """
+        Retrieve the count, total, mean, p95 and maximum durations, the
+        number of slow executions, the calling DAO method and the query
+        plan of the statements, by fingerprint.
+
+        :return: JSON response with the stats of the statements.
+        """
+        views_logger.info('Retrieving query metrics')
+        order = request.args.get('order', 'total_ms')
+        limit = request.args.get('limit', '50')
+        error = {}
+        if order not in QUERY_STATS_ORDERS:
+            error["order"] = (
+                f"Order must be one of {', '.join(QUERY_STATS_ORDERS)}"
+            )
+        if not limit.isdecimal() or not int(limit):
+            error["limit"] = "Limit must be a positive digital value"
+        if error:
+            views_logger.warning('Invalid request parameters: %s', error)
+            return error, 400
+
+        monitor = current_app.extensions['sql_monitor']
+        return {
+            "slow_query_ms": monitor.slow_threshold * 1000,
+            "items": monitor.stats(order, int(limit))
+        }, 200
+
+    @staticmethod
+    @metrics_ns.response(204, 'No Content')
+    def delete():
+        """
+        Reset the stats of the statements.
+
+        :return: An empty response.
+        """
+        views_logger.info('Resetting query metrics')
+        current_app.extensions['sql_monitor'].reset()
+        return '', 204
@@ -2,17 +2,87 @@
 
 from flask import request
 from flask_restx import Api, Namespace, Resource, reqparse
+from marshmallow import EXCLUDE, Schema, fields
+from marshmallow.validate import Range
 from werkzeug.exceptions import HTTPException
 
-from dao.model.movie import MovieSchema
-from helpers.decorators import admin_required, auth_required
-from helpers.implemented import movies_service
+from dao.model.movie import MovieBodySchema, MovieSchema
+from dao.model.movie_listing import MovieListingSchema
+from helpers.constants import MAX_SIMILAR_MOVIES
+from helpers.implemented import movies_service, similarity_service
+from helpers.parsers import parse_if_match, parse_ids
+from helpers.permissions import namespace_scopes
+from helpers.validation import CompiledSchema
 from log_handler import views_logger
 
-movies_ns = Namespace('movies')
+# GET requires the 'movies:read' scope, other methods 'movies:write'
+movies_ns = Namespace(
+    'movies', decorators=[namespace_scopes('movies')]
+)
 
 movies_schema = MovieSchema(many=True)
 movie_schema = MovieSchema()
+movie_listings_schema = MovieListingSchema(many=True)
+
+
+class MovieFiltersSchema(Schema):
+    """
+    Query arguments of the movie list
+    """
+    year = fields.Int(
+        validate=Range(min=0, error='Year must be a digital value'),
+        error_messages={'invalid': 'Year must be a digital value'}
+    )
+    director_id = fields.Int(
+        validate=Range(min=0, error='Director_Id must be a digital value'),
+        error_messages={'invalid': 'Director_Id must be a digital value'}
+    )
+    genre_id = fields.Int(
+        validate=Range(min=0, error='Genre_Id must be a digital value'),
+        error_messages={'invalid': 'Genre_Id must be a digital value'}
+    )
+    ids = fields.Str()
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+class SimilarMoviesQuerySchema(Schema):
+    """
+    Query arguments of the similar movies
+    """
+    limit = fields.Int(
+        load_default=10,
+        validate=Range(
+            min=1, max=MAX_SIMILAR_MOVIES,
+            error=f"Limit must be a digital value between 1 and "
+                  f"{MAX_SIMILAR_MOVIES}"
+        ),
+        error_messages={
+            'invalid': f"Limit must be a digital value between 1 and "
+                       f"{MAX_SIMILAR_MOVIES}"
+        }
+    )
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+# compiled once at import time, see helpers.validation
+movie_filters = CompiledSchema(MovieFiltersSchema())
+similar_movies_query = CompiledSchema(SimilarMoviesQuerySchema())
+movie_body = CompiledSchema(MovieBodySchema(), read_only=('id',))
+movie_put_body = CompiledSchema(
+    MovieBodySchema(), all_required=True, read_only=('id',)
+)
+movie_patch_body = CompiledSchema(
+    MovieBodySchema(), partial=True, read_only=('id',)
+)
+
+movie_model = movies_ns.schema_model('Movie', movie_body.json_schema)
+movie_put_model = movies_ns.schema_model(
+    'MovieReplacement', movie_put_body.json_schema
+)
 
 api = Api()
 
@@ -35,6 +105,12 @@ movies_parser.add_argument(
     help='(optional) Filter by genre ID:'
 )
 
+movies_parser.add_argument(
+    'ids',
+    type=str,
+    help='(optional) Comma separated list of movie IDs to fetch at once'
+)
+
 
 @movies_ns.route('/')
 class MoviesView(Resource):
@@ -46,49 +122,49 @@ class MoviesView(Resource):
     --------
     get():
         retrieves a list of movies with optional filtering based on year,
-        director ID, and genre ID
+        director ID, and genre ID, or a batch of movies by their IDs
     post():
         creates a new movie
     """
     @api.doc(parser=movies_parser)
-    @auth_required
     @movies_ns.response(200, 'Success')
     @movies_ns.response(400, 'Bad Request')
     def get(self):
         """
         Retrieve all movies based on optional query parameters.
 
+        When the ``ids`` parameter is given, only the requested movies are
+        returned, in the requested order, together with the list of IDs
+        that were not found.
+
         :return: JSON response with all the movies.
         """
         views_logger.info(
             'Request received: %s - %s',
             request.method, request.url
         )
-        params = ['year', 'director_id', 'genre_id']
-        errors = {
-            param: f"{param.title()} must be a digital value" for param
-            in params if
-            request.args.get(param) and not request.args.get(
-                param
-            ).isdigit()
-        }
+        filters = movie_filters.load_args()
+        if filters.get('ids') is not None:
+            mids = parse_ids(filters['ids'])
+            movies, missing = movies_service.get_many(mids)
+            response = {
+                "items": movies_schema.dump(movies),
+                "missing": missing
+            }
+            views_logger.info('Response sent: %s', response)
+            return response, 200
 
-        if errors:
-            views_logger.warning('Invalid request parameters: %s', errors)
-            return errors, 400
-
-        year, director_id, genre_id = (
-            request.args.get(param, 0, type=int)
-            for param in params
+        response = movies_service.get_all(
+            filters.get('year'), filters.get('director_id'),
+            filters.get('genre_id'), serializer=movie_listings_schema.dump
         )
-
-        movies = movies_service.get_all(year, director_id, genre_id)
-        response = movies_schema.dump(movies)
         views_logger.info('Response sent: %s', response)
         return response, 200
 
     @staticmethod
-    @admin_required
+    @movies_ns.expect(movie_model)
+    @movies_ns.response(201, 'Created')
+    @movies_ns.response(400, 'Bad Request')
     def post():
         """
         Create a new movie.
@@ -99,7 +175,7 @@ class MoviesView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        movie = request.json
+        movie = movie_body.load_json()
         movies_service.create(movie)
         views_logger.info('Response sent: Success')
         return "", 201
@@ -118,11 +194,13 @@ class MovieView(Resource):
     put(mid):
         Update a specific movie.
 
+    patch(mid):
+        Update some fields of a specific movie.
+
     delete(mid):
         Delete a specific movie.
     """
     @staticmethod
-    @auth_required
     @movies_ns.response(200, 'Success')
     @movies_ns.response(404, 'Not Found')
     def get(mid):
@@ -131,7 +209,8 @@ class MovieView(Resource):
 
         :param mid: The ID of the movie to retrieve.
 
-        :return: JSON response with the movie details.
+        :return: JSON response with the movie details and its version as
+            the ETag header.
         """
         views_logger.info(
             'Request received: %s %s',
@@ -148,12 +227,14 @@ class MovieView(Resource):
 
         response = movie_schema.dump(movie)
         views_logger.info('Response sent: %s', response)
-        return response, 200
+        return response, 200, {"ETag": f'"{movie.version}"'}
 
     @staticmethod
-    @admin_required
+    @movies_ns.expect(movie_put_model)
     @movies_ns.response(200, 'Success')
     @movies_ns.response(204, 'No Content')
+    @movies_ns.response(400, 'Bad Request')
+    @movies_ns.response(412, 'Precondition Failed')
     def put(mid):
         """
         Update a single movie based on the ID.
@@ -166,8 +247,8 @@ class MovieView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        movie = request.json
-        result = movies_service.update(mid, movie)
+        movie = movie_put_body.load_json()
+        result = movies_service.update(mid, movie, parse_if_match())
         if result:
             views_logger.info('Response sent: Success')
             return "Success", 200
@@ -177,9 +258,35 @@ class MovieView(Resource):
         return {"error": "must contain all required fields"}, 204
 
     @staticmethod
-    @admin_required
+    @movies_ns.expect(movie_model)
+    @movies_ns.response(200, 'Success')
+    @movies_ns.response(400, 'Bad Request')
+    @movies_ns.response(404, 'Not Found')
+    @movies_ns.response(412, 'Precondition Failed')
+    def patch(mid):
+        """
+        Update only the given fields of a single movie based on the ID.
+
+        :param mid: The ID of the movie to update.
+
+        :return: JSON response with the movie ID and its new version,
+            which is also sent as the ETag header.
+        """
+        views_logger.info(
+            'Request received: %s %s',
+            request.method, request.url
+        )
+        version = movies_service.patch(
+            mid, movie_patch_body.load_json(), parse_if_match()
+        )
+        response = {"id": mid, "version": version}
+        views_logger.info('Response sent: %s', response)
+        return response, 200, {"ETag": f'"{version}"'}
+
+    @staticmethod
     @movies_ns.response(204, 'No Content')
     @movies_ns.response(404, 'Not Found')
+    @movies_ns.response(412, 'Precondition Failed')
     def delete(mid):
         """
         Delete a single movie based on the ID.
@@ -192,6 +299,49 @@ class MovieView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        movies_service.delete(mid)
+        movies_service.delete(mid, parse_if_match())
         views_logger.info('Response sent: No Content')
         return "", 204
+
+
+@movies_ns.route('/<int:mid>/similar')
+class SimilarMoviesView(Resource):
+    """
+    A view for "more like this" requests on a specific movie.
+
+    Methods:
+    --------
+    get(mid):
+        Retrieve the movies most similar to a specific movie.
+    """
+    @staticmethod
+    @movies_ns.doc(params={
+        'limit': f'(optional) Number of movies, up to {MAX_SIMILAR_MOVIES}'
+    })
+    @movies_ns.response(200, 'Success')
+    @movies_ns.response(400, 'Bad Request')
+    @movies_ns.response(404, 'Not Found')
+    def get(mid):
+        """
+        Retrieve the movies most similar to a movie, by description,
+        genre, director and release year.
+
+        :param mid: The ID of the movie.
+
+        :return: JSON response with the similar movies by decreasing
+            similarity score.
+        """
+        views_logger.info(
+            'Request received: %s %s',
+            request.method, request.url
+        )
+        limit = similar_movies_query.load_args()['limit']
+        similar = similarity_service.get_similar(mid, limit)
+        response = {
+            "items": [
+                {**movie_schema.dump(movie), "score": round(score, 4)}
+                for movie, score in similar
+            ]
+        }
+        views_logger.info('Response sent: %s', response)
+        return response, 200
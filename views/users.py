@@ -1,13 +1,20 @@
 """User view module"""
+from urllib.parse import quote
+
 from flask import request
 from flask_restx import Namespace, Resource
 
 from dao.model.user import UserSchema
-from helpers.decorators import admin_required
+from helpers.constants import MAX_USERS_PAGE_SIZE
 from helpers.implemented import user_service
+from helpers.parsers import parse_if_match
+from helpers.permissions import namespace_scopes
 from log_handler import views_logger
 
-users_ns = Namespace('users')
+# GET requires the 'users:read' scope, other methods 'users:write'
+users_ns = Namespace(
+    'users', decorators=[namespace_scopes('users')]
+)
 
 users_schema = UserSchema(many=True)
 user_schema = UserSchema()
@@ -21,26 +28,52 @@ class UsersView(Resource):
     Methods:
     --------
     get():
-        Retrieve all users.
+        Retrieve a page of users.
 
     post():
         Create a new user.
     """
     @staticmethod
-    @admin_required
+    @users_ns.doc(params={
+        'role': '(optional) Filter by role',
+        'prefix': '(optional) Filter by username prefix',
+        'after': '(optional) Username after which the page starts: the '
+                 'X-Next-Token of the previous page',
+        'limit': f'(optional) Number of users, up to {MAX_USERS_PAGE_SIZE}'
+    })
+    @users_ns.response(200, 'Success')
+    @users_ns.response(400, 'Bad Request')
     def get():
         """
-        Retrieve all users.
+        Retrieve a page of users ordered by username, optionally filtered
+        by role and username prefix.
 
-        :return: A list of all users with status code 200.
+        When the page is full, the X-Next-Token header holds the ``after``
+        value of the next page.
+
+        :return: A list of users with status code 200.
         """
-        views_logger.info('Retrieving all users')
-        users = user_service.get_all()
+        views_logger.info('Retrieving users')
+        limit = request.args.get('limit', str(MAX_USERS_PAGE_SIZE))
+        if not limit.isdecimal() or not 0 < int(limit) <= MAX_USERS_PAGE_SIZE:
+            error = {
+                "limit": f"Limit must be a digital value between 1 and "
+                         f"{MAX_USERS_PAGE_SIZE}"
+            }
+            views_logger.warning('Invalid request parameters: %s', error)
+            return error, 400
+
+        users = user_service.get_all(
+            request.args.get('role'), request.args.get('prefix'),
+            request.args.get('after'), int(limit)
+        )
         views_logger.debug('Retrieved %s users', len(users))
-        return users_schema.dump(users), 200
+        headers = {}
+        if len(users) == int(limit):
+            headers["X-Next-Token"] = quote(users[-1].username, safe='')
+        return users_schema.dump(users), 200, headers
 
     @staticmethod
-    @admin_required
     @users_ns.response(201, 'Created')
     def post():
         """
@@ -72,7 +105,6 @@ class UserView(Resource):
         Delete a specific user.
     """
     @staticmethod
-    @admin_required
     def get(uid):
         """
         Retrieve a user by their ID.
@@ -87,15 +119,17 @@ class UserView(Resource):
 
         if user:
             views_logger.debug('Retrieved user: %s', user)
-            return user_schema.dump(user), 200
+            return user_schema.dump(user), 200, {
+                "ETag": f'"{user.version}"'
+            }
 
         views_logger.warning('User with id %s not found', uid)
         return {'message': 'User not found'}, 404
 
     @staticmethod
-    @admin_required
     @users_ns.response(200, 'Success')
     @users_ns.response(204, 'No Content')
+    @users_ns.response(412, 'Precondition Failed')
     def put(uid):
         """
         Update a user by their ID.
@@ -110,7 +144,7 @@ class UserView(Resource):
             request.method, request.url
         )
         user_data = request.json
-        result = user_service.update(uid, user_data)
+        result = user_service.update(uid, user_data, parse_if_match())
         if result:
             views_logger.info('Response sent: Success')
             return "Success", 200
@@ -120,9 +154,9 @@ class UserView(Resource):
         return {"error": "must contain all required fields"}, 204
 
     @staticmethod
-    @admin_required
     @users_ns.response(200, 'Success')
     @users_ns.response(204, 'No Content')
+    @users_ns.response(412, 'Precondition Failed')
     def delete(uid):
         """
         Delete a user by their ID.
@@ -136,6 +170,6 @@ class UserView(Resource):
             'Request received: %s %s',
             request.method, request.url
         )
-        user_service.delete(uid)
+        user_service.delete(uid, parse_if_match())
         views_logger.info('Response sent: No Content')
         return "", 204